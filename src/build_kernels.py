@@ -0,0 +1,16 @@
+import time
+#Importing the loader imports every model, and with them all of their Lagrange segments.
+import logic.networkloader
+from logic.lagrangesegment import LagrangeSegment
+
+#Derives the stamp kernels of every model ahead of time and stores them in the derivative cache,
+#so the solver only has to load them.
+start_time = time.perf_counter_ns()
+
+for segment in LagrangeSegment.segments:
+    segment.get_derivatives()
+
+duration_seconds = (time.perf_counter_ns() - start_time) * 1e-9
+
+print(f"Built the kernels of {len(LagrangeSegment.segments)} segments in {duration_seconds:.3f}s")
+print(f"Derivative cache: {LagrangeSegment._cache.cache_file}")
@@ -0,0 +1,180 @@
+import os
+import re
+
+#A token is a quoted string, a brace, a semicolon, or a run of anything else that is not whitespace.
+TOKEN_PATTERN = re.compile(r'"[^"]*"|[{};]|[^\s{};"]+')
+
+#Statements that open a block when followed by a brace.
+OBJECT_KEYWORD = "object"
+SCHEDULE_KEYWORD = "schedule"
+
+#One GridLAB-D object, as a dict of property name to (unit stripped) value.
+#
+#Missing properties raise AttributeError, both through obj["property"] and obj._property, the way the
+#GridLAB-D format classes do, so the reader can keep handling optional properties with try/except.
+class GlmObject(dict):
+    def __init__(self, obj_class) -> None:
+        super().__init__()
+        self.obj_class = obj_class
+        self.units = {}
+        #Nested objects, held back until this object closes so its name is known.
+        self.children = []
+
+    def __getitem__(self, key):
+        try:
+            return dict.__getitem__(self, key)
+        except KeyError:
+            raise AttributeError(f"{key} not found in {self.obj_class}")
+
+    def __getattr__(self, name):
+        if name[:1] == "_" and name[1:2] != "_":
+            try:
+                return dict.__getitem__(self, name[1:])
+            except KeyError:
+                pass
+
+        raise AttributeError(name)
+
+#A schedule block, as a list of (cron expression, value) entries in file order.
+class GlmSchedule:
+    def __init__(self, name) -> None:
+        self.name = name
+        self.entries = []
+
+#Yields the tokens of each line of a glm file, following #include directives recursively.
+#Included files are resolved relative to the current directory first, then to the including file.
+def iterate_glm_tokens(path, include_stack = None):
+    path = os.path.abspath(path)
+    include_stack = [] if include_stack is None else include_stack
+
+    if path in include_stack:
+        raise Exception(f"Circular #include of {path}")
+    include_stack.append(path)
+
+    with open(path, "r") as glm_file:
+        for line in glm_file:
+            comment_start = line.find("//")
+            if comment_start != -1:
+                line = line[:comment_start]
+
+            line = line.strip()
+            if len(line) == 0:
+                continue
+
+            if line[0] == "#":
+                if line.startswith("#include"):
+                    location = line[len("#include"):].strip().strip('";')
+                    yield from iterate_glm_tokens(resolve_include(location, path), include_stack)
+                #Other macros (#set, #define, ...) don't affect the network.
+                continue
+
+            yield TOKEN_PATTERN.findall(line)
+
+    include_stack.pop()
+
+def resolve_include(location, including_path):
+    if os.path.isabs(location) or os.path.exists(location):
+        return location
+
+    return os.path.join(os.path.dirname(including_path), location)
+
+#Streams the objects and schedules of a glm file in a single pass, without loading the file into memory.
+#
+#Objects are yielded as GlmObject when their block closes. A nested object is yielded as an object of its
+#own, with its parent property set to the enclosing object (unless it sets one itself), and does not
+#change the enclosing object. Property statements end at a semicolon or at the end of the line.
+def iterate_glm_records(path):
+    #The open blocks. Each is a GlmObject, a GlmSchedule, or None for a block that is ignored (module, clock, ...).
+    blocks = []
+    statement = []
+
+    for tokens in iterate_glm_tokens(path):
+        for token in tokens:
+            if token == "{":
+                blocks.append(open_block(statement, blocks))
+                statement = []
+            elif token == "}":
+                add_statement(statement, blocks)
+                statement = []
+
+                if len(blocks) == 0:
+                    continue
+
+                block = blocks.pop()
+                if block is None:
+                    continue
+                #A brace group inside a schedule continues the same schedule.
+                if len(blocks) > 0 and blocks[-1] is block:
+                    continue
+
+                if isinstance(block, GlmObject):
+                    yield from close_object(block, blocks)
+                else:
+                    yield block
+            elif token == ";":
+                add_statement(statement, blocks)
+                statement = []
+            else:
+                if token[0] == '"':
+                    token = token[1:-1]
+                statement.append(token)
+
+        #A block header may have its brace on the next line.
+        if len(statement) > 0 and statement[0] not in (OBJECT_KEYWORD, SCHEDULE_KEYWORD):
+            add_statement(statement, blocks)
+            statement = []
+
+def open_block(header, blocks):
+    enclosing = blocks[-1] if len(blocks) > 0 else None
+
+    if isinstance(enclosing, GlmSchedule):
+        return enclosing
+
+    if len(header) > 1 and header[0] == OBJECT_KEYWORD:
+        class_and_id = header[1].split(":")
+        obj_class = class_and_id[0]
+
+        obj = GlmObject(obj_class)
+        if len(class_and_id) > 1:
+            obj["name"] = obj_class + ":" + class_and_id[1]
+        return obj
+
+    if len(header) > 1 and header[0] == SCHEDULE_KEYWORD and enclosing is None:
+        return GlmSchedule(header[1])
+
+    return None
+
+#Returns the objects to yield once obj has closed: obj followed by its nested objects, or nothing while
+#obj is itself nested, in which case it waits for the enclosing object.
+def close_object(obj, blocks):
+    for child in obj.children:
+        if "parent" not in child and "name" in obj:
+            child["parent"] = obj["name"]
+
+    enclosing = blocks[-1] if len(blocks) > 0 else None
+    if isinstance(enclosing, GlmObject):
+        enclosing.children.append(obj)
+        return []
+
+    return flatten_objects(obj)
+
+def flatten_objects(obj):
+    objects = [obj]
+    for child in obj.children:
+        objects += flatten_objects(child)
+    obj.children = []
+    return objects
+
+def add_statement(statement, blocks):
+    if len(statement) == 0 or len(blocks) == 0:
+        return
+
+    block = blocks[-1]
+    if isinstance(block, GlmObject):
+        if len(statement) > 1:
+            block[statement[0]] = statement[1]
+            if len(statement) > 2:
+                block.units[statement[0]] = statement[2]
+    elif isinstance(block, GlmSchedule):
+        if len(statement) > 5:
+            block.entries.append((" ".join(statement[:-1]), statement[-1]))
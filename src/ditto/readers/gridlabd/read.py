@@ -23,6 +23,7 @@ from ditto.readers.gridlabd.line_impedance import compute_overhead_capacitance,
 from ditto.readers.gridlabd.load_parser import LoadParser
 from ditto.readers.abstract_reader import AbstractReader
 from ditto.readers.gridlabd.helpers import parse_phases, triplex_phases
+from ditto.readers.gridlabd.glm_parser import iterate_glm_records, GlmSchedule
 
 logger = logging.getLogger(__name__)
 
@@ -66,132 +67,50 @@ shared_config_objects = [
 
 def read_gld_objects_and_schedules(input_file, origin_datetime="2017 Jun 1 2:00PM"):
     all_gld_objects = {}
+    all_schedules = {}
 
     origin_datetime = datetime.strptime(origin_datetime, "%Y %b %d %I:%M%p")
     delta_datetime = timedelta(minutes=1)
     sub_datetime = origin_datetime - delta_datetime
 
-    curr_object = None
-    curr_schedule = None
-    ignore_elements = False
-    found_schedule = False
-    all_includes = []
-    all_schedules = {}
-
-    inputfile = open(input_file, "r")
-    all_rows = inputfile.readlines()
-
-    for row in all_rows:
-        if row[:8] == "#include":
-            entries = row.split()
-            location = entries[1].strip('";')
-            include_file = open(location, "r")
-            include_rows = include_file.readlines()
-            all_includes = all_includes + include_rows
-    all_rows = all_rows + all_includes
+    known_classes = set()
 
-    for row in all_rows:
-        row = row.strip()
-        units = None
-
-        # Deal with comments
-        if row[:2] == "//":
+    for record in iterate_glm_records(input_file):
+        if isinstance(record, GlmSchedule):
+            for (cron, value) in record.entries:
+                iter = croniter(cron, sub_datetime)
+                if iter.get_next(datetime) == origin_datetime:
+                    all_schedules[record.name] = value
+                    break
             continue
-        if row.find("//") != -1:
-            row = row[:row.find("//")]
-
-        entries = row.split()
-        if len(entries) > 0 and entries[0] == "object":
-            if curr_object is None:
-                obj = entries[1].split(":")
-                obj_class = obj[0]
-                if obj_class in skipped_objects:
-                    continue
-                curr_object = getattr(gridlabd, obj_class)()
-                if len(obj) > 1:
-                    curr_object["name"] = obj_class + ":" + obj[1]
-            else:
-                ignore_elements = True
 
-        elif len(entries) > 0 and entries[0] == "schedule":
-            if curr_schedule is None:
-                schedule = entries[1]
-                schedule_bracket_cnt = 1
-            curr_schedule = schedule
+        obj_class = record.obj_class
+        if obj_class in skipped_objects:
+            continue
 
-        else:
-            if curr_object == None and curr_schedule == None:
+        if not obj_class in known_classes:
+            if not hasattr(gridlabd, obj_class):
+                raise AttributeError(f"Unknown GridLAB-D object class {obj_class}")
+            known_classes.add(obj_class)
+
+        # TODO: Deal with units correctly
+        if obj_class == "line_spacing":
+            for (element, units) in record.units.items():
+                if units == "in":
+                    record[element] = str(float(record[element]) / 12)
+        if obj_class == "capacitor":
+            for (element, units) in record.units.items():
+                if units == "MVAr":
+                    record[element] = str(float(record[element]) * 1e6)
+
+        if not "name" in record:
+            if "from" in record and "to" in record:
+                record["name"] = record["from"] + "-" + record["to"]
+            else:
+                logger.debug("Warning object missing a name")
                 continue
-            if curr_object != None:
-                if len(row) > 0 and row.find(";") != -1:	
-                    row = row[:row.find(";")]
-                entries = row.split()
-                if len(entries) > 1:
-                    element = entries[0]
-                    value = entries[1].replace('"', "")
-
-                    if len(entries) > 2:
-                        units = entries[2]
-                        # TODO: Deal with units correctly
-                        if obj_class == "line_spacing" and units == "in":
-                            value = str(float(value) / 12)
-                        if obj_class == "capacitor" and units == "MVAr":
-                            value = str(float(value) * 1e6)
-                        # print element,value,units
-                        # if units[0] =='k':
-                        #    value = value/1000.0
-
-                    # Assuming no nested objects for now.
-                    curr_object[element] = value
-
-                if len(row) >= 1:
-                    if row[-1] == "}" or row[-2:] == "};":
-                        if ignore_elements:  # Assumes only one layer of nesting
-                            ignore_elements = False
-                        else:
-                            try:
-                                all_gld_objects[
-                                    curr_object["name"]
-                                ] = curr_object
-                                curr_object = None
-                            except:
-
-                                if (
-                                    curr_object["from"] != None
-                                    and curr_object["to"] != None
-                                ):
-                                    curr_object["name"] = (
-                                        curr_object["from"]
-                                        + "-"
-                                        + curr_object["to"]
-                                    )
-                                    all_gld_objects[
-                                        curr_object["name"]
-                                    ] = curr_object
 
-                                else:
-                                    logger.debug("Warning object missing a name")
-                                curr_object = None
-
-            if curr_schedule != None:
-                row = row.strip(";")
-                entries = row.split()
-                if len(entries) > 5 and not found_schedule:
-                    cron = " ".join(entries[:-1])
-                    value = entries[-1]
-                    iter = croniter(cron, sub_datetime)
-                    if iter.get_next(datetime) == origin_datetime:
-                        found_schedule = True
-                        all_schedules[curr_schedule] = value
-
-                if len(row) >= 1:
-                    if row[-1] == "}":
-                        schedule_bracket_cnt = schedule_bracket_cnt - 1
-                    if row[0] == "{":
-                        schedule_bracket_cnt = schedule_bracket_cnt + 1
-                    if schedule_bracket_cnt == 0:
-                        curr_schedule = None
-                        found_schedule = False
+        all_gld_objects[record["name"]] = record
 
     return (all_gld_objects, all_schedules)
 
@@ -236,7 +155,7 @@ class Reader(AbstractReader):
         self.all_gld_objects, all_schedules = read_gld_objects_and_schedules(self.input_file, origin_datetime)
 
         for name, obj in self.all_gld_objects.items():
-            obj_type = type(obj).__name__
+            obj_type = obj.obj_class
 
             if obj_type in shared_config_objects:
                 continue
@@ -0,0 +1,280 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from logic.devicecontroller import get_device_states, set_device_states
+from logic.networkmodel import NetworkModel
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+from models.singlephase.switch import SwitchStatus
+
+#Scenario parameters, as (element list, attribute). Values are given as stored on the elements, so
+#generator P is negative for generation, like Generator.P.
+SCENARIO_PARAMETERS = {
+    "load_P": ("loads", "P"),
+    "load_Q": ("loads", "Q"),
+    "generator_P": ("generators", "P"),
+    "generator_Vset": ("generators", "Vset"),
+    "switch_closed": ("switches", None),
+    "tap_position": ("regulators", "tap_position")
+}
+
+#One variant of the base network. Each parameter is None (unchanged) or an array with one value per
+#element, in the order of the network's lists (network.loads, network.generators, network.switches and
+#network.regulators).
+class Scenario:
+    def __init__(
+        self,
+        load_P = None,
+        load_Q = None,
+        generator_P = None,
+        generator_Vset = None,
+        switch_closed = None,
+        tap_position = None
+        ) -> None:
+        self.load_P = load_P
+        self.load_Q = load_Q
+        self.generator_P = generator_P
+        self.generator_Vset = generator_Vset
+        self.switch_closed = switch_closed
+        self.tap_position = tap_position
+
+    #Only the parameters that differ from the base network are sent to the workers.
+    def get_changes(self):
+        changes = {}
+        for parameter in SCENARIO_PARAMETERS:
+            values = getattr(self, parameter)
+            if values is not None:
+                changes[parameter] = np.asarray(values)
+
+        return changes
+
+#Solves many variants (scenarios) of one network, in a pool of worker processes.
+#
+#The base network is assigned once in the calling process, and the workers are forked from it, so they
+#share its topology and index maps copy-on-write instead of loading or receiving their own copy. The base
+#parameter values and the result arrays live in shared memory: a task carries only the changed arrays of
+#one scenario, and each worker writes its solution straight into the stacked results. Where fork is not
+#available, or with a single worker, the scenarios are solved in the calling process.
+class BatchPowerFlow:
+    def __init__(self, network: NetworkModel, settings: PowerFlowSettings = PowerFlowSettings(), workers = 1) -> None:
+        self.network = network
+        self.settings = settings
+        self.workers = workers
+
+    def solve(self, scenarios) -> "BatchPowerFlowResults":
+        for scenario in scenarios:
+            self.__validate(scenario)
+
+        if self.network.size_Y is None:
+            self.network.assign_matrix(self.settings.infeasibility_analysis)
+
+        scenario_count = len(scenarios)
+        bus_count = len(self.network.buses)
+
+        base = SharedArrays(get_base_parameters(self.network))
+        results = SharedArrays({
+            "is_success": np.zeros(scenario_count, dtype=bool),
+            "iterations": np.zeros(scenario_count, dtype=np.int64),
+            "bus_V_r": np.zeros((scenario_count, bus_count)),
+            "bus_V_i": np.zeros((scenario_count, bus_count))
+        })
+
+        try:
+            tasks = [(idx, scenario.get_changes()) for (idx, scenario) in enumerate(scenarios)]
+
+            if self.workers > 1 and scenario_count > 1 and "fork" in multiprocessing.get_all_start_methods():
+                self.__solve_parallel(tasks, base, results)
+            else:
+                self.__solve_sequential(tasks, base, results)
+
+            return BatchPowerFlowResults(self.network, results.copy_arrays())
+        finally:
+            base.release()
+            results.release()
+
+    def __solve_sequential(self, tasks, base, results):
+        worker = BatchWorker(self.network, self.settings, base.arrays, results.arrays)
+        for task in tasks:
+            worker.solve(task)
+        worker.restore()
+
+    def __solve_parallel(self, tasks, base, results):
+        global _worker
+        #Inherited by the forked workers, along with the network and the shared memory mappings.
+        _worker = BatchWorker(self.network, self.settings, base.arrays, results.arrays)
+
+        workers = min(self.workers, len(tasks))
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+                for _ in executor.map(run_batch_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))):
+                    pass
+        finally:
+            _worker = None
+
+    def __validate(self, scenario: Scenario):
+        for (parameter, values) in scenario.get_changes().items():
+            element_count = len(get_elements(self.network, SCENARIO_PARAMETERS[parameter][0]))
+            if len(values) != element_count:
+                raise Exception(f"Scenario {parameter} has {len(values)} values, the network has {element_count} elements")
+
+#Stacked results of a batch, one row per scenario and one column per entry of network.buses.
+#A scenario that failed to converge (or raised) has is_success False and NaN voltages.
+class BatchPowerFlowResults:
+    def __init__(self, network: NetworkModel, arrays) -> None:
+        self.network = network
+        self.is_success = arrays["is_success"]
+        self.iterations = arrays["iterations"]
+        self.bus_V_r = arrays["bus_V_r"]
+        self.bus_V_i = arrays["bus_V_i"]
+
+    @property
+    def scenario_count(self):
+        return len(self.is_success)
+
+    @property
+    def bus_V_mag(self):
+        return np.hypot(self.bus_V_r, self.bus_V_i)
+
+    @property
+    def bus_V_deg(self):
+        bus_V_mag = self.bus_V_mag
+        return np.where(bus_V_mag < 1e-8, 0, np.degrees(np.arctan2(self.bus_V_i, self.bus_V_r)))
+
+#Solves scenarios against one copy of the network. Each scenario is applied to the base values, solved,
+#and reverted again before the next one. The device states the device controller left behind (capacitor
+#switches, blown fuses, regulator taps) are reverted too, so a scenario's result does not depend on which
+#scenarios the same worker solved before it.
+class BatchWorker:
+    def __init__(self, network: NetworkModel, settings: PowerFlowSettings, base, results) -> None:
+        self.network = network
+        self.settings = settings
+        self.base = base
+        self.results = results
+
+        self.powerflow = PowerFlow(network, settings)
+        self.is_reassigned = False
+
+    def solve(self, task):
+        (idx, changes) = task
+
+        self.__apply(changes)
+        try:
+            powerflow_results = self.powerflow.execute()
+            is_success = powerflow_results.is_success
+            iterations = powerflow_results.iterations
+            bus_V_r = powerflow_results.bus_V_r
+            bus_V_i = powerflow_results.bus_V_i
+        except Exception:
+            is_success = False
+            iterations = 0
+            bus_V_r = np.nan
+            bus_V_i = np.nan
+        finally:
+            self.__apply(dict([(parameter, self.base[parameter]) for parameter in changes]))
+            self.__restore_devices()
+
+        self.results["is_success"][idx] = is_success
+        self.results["iterations"][idx] = iterations
+        self.results["bus_V_r"][idx] = bus_V_r
+        self.results["bus_V_i"][idx] = bus_V_i
+
+    #Leaves the network as it was before the batch, including its matrix assignment.
+    def restore(self):
+        if self.is_reassigned:
+            self.network.assign_matrix(self.settings.infeasibility_analysis)
+
+    def __restore_devices(self):
+        nrsolver = None
+        if self.powerflow.device_controller != None:
+            nrsolver = self.powerflow.device_controller.homotopy.nrsolver
+
+        set_device_states(self.network, self.base, nrsolver)
+
+    def __apply(self, changes):
+        for (parameter, values) in changes.items():
+            (elements_name, attribute) = SCENARIO_PARAMETERS[parameter]
+            elements = get_elements(self.network, elements_name)
+
+            if parameter == "switch_closed":
+                self.__set_switches(elements, values)
+            elif parameter == "tap_position":
+                self.__set_taps(elements, values)
+            else:
+                for (element, value) in zip(elements, values):
+                    setattr(element, attribute, float(value))
+
+    #Switching changes the matrix assignment, so a new PowerFlow (which assigns the matrix again) is needed.
+    def __set_switches(self, switches, closed):
+        statuses = [SwitchStatus.CLOSED if is_closed else SwitchStatus.OPEN for is_closed in closed]
+        if all(switch.status == status for (switch, status) in zip(switches, statuses)):
+            return
+
+        for (switch, status) in zip(switches, statuses):
+            switch.status = status
+        self.powerflow = PowerFlow(self.network, self.settings)
+        self.is_reassigned = True
+
+    def __set_taps(self, regulators, tap_positions):
+        for (regulator, tap_position) in zip(regulators, tap_positions):
+            if not regulator.try_increment_tap_position(int(tap_position) - regulator.tap_position):
+                continue
+
+            #The regulator's linear stamps changed.
+            if self.powerflow.device_controller != None:
+                self.powerflow.device_controller.homotopy.nrsolver.invalidate_element(regulator)
+
+#Numpy arrays backed by one shared memory block, which forked processes see (and write) as well.
+class SharedArrays:
+    def __init__(self, arrays) -> None:
+        layout = []
+        size = 0
+        for (name, array) in arrays.items():
+            #Keep every array aligned to 8 bytes.
+            layout.append((name, size, array))
+            size += -(-array.nbytes // 8) * 8
+
+        self.shared_memory = SharedMemory(create=True, size=max(size, 1))
+
+        self.arrays = {}
+        for (name, offset, array) in layout:
+            shared_array = np.ndarray(array.shape, dtype=array.dtype, buffer=self.shared_memory.buf, offset=offset)
+            shared_array[...] = array
+            self.arrays[name] = shared_array
+
+    def copy_arrays(self):
+        return dict([(name, np.copy(array)) for (name, array) in self.arrays.items()])
+
+    def release(self):
+        #The views must be gone before the block can be closed.
+        self.arrays = None
+        self.shared_memory.close()
+        self.shared_memory.unlink()
+
+def get_elements(network: NetworkModel, elements_name):
+    if elements_name == "regulators" and not network.is_three_phase:
+        return []
+
+    return getattr(network, elements_name)
+
+def get_base_parameters(network: NetworkModel):
+    base = {}
+    for (parameter, (elements_name, attribute)) in SCENARIO_PARAMETERS.items():
+        elements = get_elements(network, elements_name)
+        if parameter == "switch_closed":
+            base[parameter] = np.array([element.status == SwitchStatus.CLOSED for element in elements], dtype=bool)
+        elif parameter == "tap_position":
+            base[parameter] = np.array([element.tap_position for element in elements], dtype=np.int64)
+        else:
+            base[parameter] = np.array([getattr(element, attribute) for element in elements], dtype=np.float64)
+
+    #The device states before the batch, restored after every scenario (tap_position is the same in both).
+    base.update(get_device_states(network))
+
+    return base
+
+#One worker per process, inherited from the parent when the pool forks.
+_worker: BatchWorker = None
+
+def run_batch_task(task):
+    _worker.solve(task)
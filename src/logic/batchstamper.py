@@ -0,0 +1,151 @@
+import numpy as np
+from logic.jitkernels import get_batch_kernel
+from logic.lagrangestamper import SKIP
+
+STAMPING_BACKEND_PYTHON = "python"
+STAMPING_BACKEND_NUMPY = "numpy"
+#Like the numpy backend, with the segment kernels compiled by numba. Falls back to numpy without numba.
+STAMPING_BACKEND_NUMBA = "numba"
+
+#All stampers of one LagrangeSegment that were queued during a stamping pass.
+#The segment kernel is evaluated once for the whole group, with NumPy arrays or as a compiled loop.
+class StampGroup:
+    def __init__(self, segment, is_dual, use_jit) -> None:
+        self.segment = segment
+        self.is_dual = is_dual
+        self.use_jit = use_jit
+
+        self.owners = []
+        self.constants = []
+
+        self._structure_owners = None
+
+    def clear(self):
+        self.owners = []
+        self.constants = []
+
+    def flush(self, Y, J, v_previous):
+        if len(self.owners) == 0:
+            return
+
+        #The structure only depends on which stampers were queued (and in what order).
+        if self.owners != self._structure_owners:
+            self.__build_structure()
+
+        args = self.__gather_args(v_previous)
+
+        kernel, output_indices = self.segment.get_kernel(self.is_dual)
+        values = np.empty((len(output_indices), len(self.owners)), dtype=np.float64)
+
+        if self.use_jit:
+            get_batch_kernel(kernel, args.shape[0], len(output_indices))(args, values)
+        else:
+            #Outputs that don't depend on any argument are scalars, and are broadcast over the owners.
+            for (term_idx, output) in enumerate(kernel(*args)):
+                values[term_idx] = output
+
+        if len(self.y_rows) > 0:
+            Y.stamp_block(self.y_rows, self.y_cols, values[self.y_terms, self.y_owners])
+
+        if len(self.j_rows) > 0:
+            np.add.at(J, self.j_rows, values[self.j_terms, self.j_owners])
+
+    #Returns the kernel arguments as one (argument, owner) array.
+    def __gather_args(self, v_previous):
+        owner_count = len(self.owners)
+        constant_count = len(self.segment.constants)
+
+        args = np.empty((constant_count + self.variable_indices.shape[1], owner_count), dtype=np.float64)
+
+        if constant_count > 0:
+            args[:constant_count] = np.array(self.constants, dtype=np.float64).reshape(owner_count, constant_count).T
+
+        if v_previous is None:
+            #Linear stamps never reference the primal or dual values.
+            args[constant_count:] = 0
+        else:
+            #The appended zero is picked up by every SKIP index (-1).
+            args[constant_count:] = np.append(v_previous, 0)[self.variable_indices].T
+
+        return args
+
+    def __build_structure(self):
+        structures = [get_stamper_structure(stamper, self.is_dual) for stamper in self.owners]
+        owner_indices = np.arange(len(structures))
+
+        self.y_rows = concatenate([structure.y_rows for structure in structures])
+        self.y_cols = concatenate([structure.y_cols for structure in structures])
+        self.y_terms = concatenate([structure.y_terms for structure in structures])
+        self.y_owners = np.repeat(owner_indices, [len(structure.y_rows) for structure in structures])
+
+        self.j_rows = concatenate([structure.j_rows for structure in structures])
+        self.j_terms = concatenate([structure.j_terms for structure in structures])
+        self.j_owners = np.repeat(owner_indices, [len(structure.j_rows) for structure in structures])
+
+        self.variable_indices = np.vstack([structure.variable_indices for structure in structures])
+
+        self._structure_owners = list(self.owners)
+
+#Where the kernel outputs of one stamper go, and which entries of v it reads. Built once per stamper.
+class StamperStructure:
+    def __init__(self, stamper, is_dual) -> None:
+        layout = stamper.dual_layout if is_dual else stamper.primal_layout
+
+        var_indices = np.array([-1 if index == SKIP else index for index in stamper.var_indices], dtype=np.int64)
+        if stamper.eqn_indices is stamper.var_indices:
+            eqn_indices = var_indices
+        else:
+            eqn_indices = np.array([-1 if index == SKIP else index for index in stamper.eqn_indices], dtype=np.int64)
+
+        self.y_rows = eqn_indices[layout.y_row_positions]
+        self.y_cols = var_indices[layout.y_col_positions]
+        self.y_terms = layout.y_terms
+
+        self.j_rows = eqn_indices[layout.j_row_positions]
+        self.j_terms = layout.j_terms
+
+        if not stamper.optimization_enabled:
+            var_indices[len(stamper.handler.primals):] = -1
+
+        self.variable_indices = var_indices
+
+def get_stamper_structure(stamper, is_dual):
+    if stamper.batch_structures == None:
+        stamper.batch_structures = {}
+
+    if not is_dual in stamper.batch_structures:
+        stamper.batch_structures[is_dual] = StamperStructure(stamper, is_dual)
+
+    return stamper.batch_structures[is_dual]
+
+def concatenate(arrays):
+    if len(arrays) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    return np.concatenate(arrays)
+
+#Collects LagrangeStamper calls during a stamping pass instead of evaluating them one element at a time.
+#Attach it to a MatrixBuilder (Y.batch) and call flush() once all elements have been stamped.
+class BatchStamper:
+    def __init__(self, use_jit = False) -> None:
+        self.use_jit = use_jit
+        self.groups = {}
+        self.v_previous = None
+
+    def enqueue(self, stamper, is_dual, constant_vals, v_previous):
+        key = (stamper.handler, is_dual)
+        if not key in self.groups:
+            self.groups[key] = StampGroup(stamper.handler, is_dual, self.use_jit)
+
+        group = self.groups[key]
+        group.owners.append(stamper)
+        group.constants.append(constant_vals)
+
+        self.v_previous = v_previous
+
+    def flush(self, Y, J):
+        for group in self.groups.values():
+            group.flush(Y, J, self.v_previous)
+            group.clear()
+
+        self.v_previous = None
@@ -0,0 +1,310 @@
+from fnmatch import fnmatch
+import glob
+import json
+import math
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from logic.profiler import PHASE_PARSE, PHASE_POWERFLOW
+from logic.syntheticfeeder import write_replicated_feeder
+
+HISTORY_VERSION = 1
+
+#Solver configurations every case is run under, as PowerFlowSettings keyword arguments.
+BENCHMARK_CONFIGS = {
+    "default": {},
+    "tx_stepping": {"tx_stepping": True},
+    "infeasibility": {"infeasibility_analysis": True},
+    "voltage_limiting": {"voltage_limiting": True}
+}
+
+#The taxonomy feeder replicated into the synthetic cases, and the numbers of copies.
+SYNTHETIC_FEEDER = "r1_12_47_1"
+SYNTHETIC_COPIES = [1, 2, 4, 8]
+
+#A case regresses when it is slower than its baseline by more than TIME_TOLERANCE (and by at least
+#MIN_TIME_DIFFERENCE seconds, so timer noise on the small cases is not flagged), or uses more than
+#MEMORY_TOLERANCE more memory.
+TIME_TOLERANCE = 0.2
+MIN_TIME_DIFFERENCE = 0.05
+MEMORY_TOLERANCE = 0.1
+
+CASE_TIMEOUT_SECONDS = 600
+
+class BenchmarkCase:
+    def __init__(self, name, path, series = None, scale = None) -> None:
+        self.name = name
+        self.path = path
+        #Synthetic cases of one feeder form a series, ordered by scale (the number of copies).
+        self.series = series
+        self.scale = scale
+
+#The measurements of one case under one configuration. Times are in seconds, memory in MB.
+class BenchmarkRecord:
+    def __init__(
+        self,
+        case,
+        config,
+        is_success = False,
+        parse_time = None,
+        solve_time = None,
+        iterations = None,
+        peak_rss = None,
+        matrix_size = None,
+        matrix_nnz = None,
+        error = None,
+        series = None,
+        scale = None
+        ) -> None:
+        self.case = case
+        self.config = config
+        self.is_success = is_success
+        self.parse_time = parse_time
+        self.solve_time = solve_time
+        self.iterations = iterations
+        self.peak_rss = peak_rss
+        self.matrix_size = matrix_size
+        self.matrix_nnz = matrix_nnz
+        self.error = error
+        self.series = series
+        self.scale = scale
+
+    def get_key(self):
+        return (self.case, self.config)
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @staticmethod
+    def from_dict(values):
+        return BenchmarkRecord(**values)
+
+class Regression:
+    def __init__(self, case, config, metric, baseline, value) -> None:
+        self.case = case
+        self.config = config
+        self.metric = metric
+        self.baseline = baseline
+        self.value = value
+
+    def __str__(self) -> str:
+        return f'{self.case} ({self.config}): {self.metric} {self.baseline} -> {self.value}'
+
+#Runs the bundled test cases (and synthetic, replicated feeders) under several solver configurations and
+#records how long parsing and solving take, the iterations, peak memory and the size of the matrix.
+#
+#Each run happens in its own forked process, so the peak RSS is that of the case alone and no state
+#(caches, orderings) carries over from one case to the next.
+class BenchmarkRunner:
+    def __init__(self, configs = BENCHMARK_CONFIGS, timeout = CASE_TIMEOUT_SECONDS) -> None:
+        self.configs = configs
+        self.timeout = timeout
+
+    def run(self, cases):
+        records = []
+        for case in cases:
+            for config in self.configs.keys():
+                record = self.run_case(case, config)
+                records.append(record)
+                print(format_record(record))
+
+        return records
+
+    def run_case(self, case: BenchmarkCase, config):
+        context = multiprocessing.get_context("fork")
+        (receiver, sender) = context.Pipe(duplex=False)
+
+        process = context.Process(target=run_case_process, args=(case, config, self.configs[config], sender))
+        process.start()
+        sender.close()
+
+        values = None
+        if receiver.poll(self.timeout):
+            try:
+                values = receiver.recv()
+            except EOFError:
+                pass
+
+        process.join(1)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+        if values is None:
+            error = "timed out" if process.exitcode is None or process.exitcode < 0 else f"exit code {process.exitcode}"
+            return BenchmarkRecord(case.name, config, error=error, series=case.series, scale=case.scale)
+
+        return BenchmarkRecord.from_dict(values)
+
+def run_case_process(case: BenchmarkCase, config, config_settings, sender):
+    #Imported here so the benchmark process itself stays small, and the children start from the same state.
+    from logic.networkloader import NetworkLoader
+    from logic.powerflow import PowerFlow
+    from logic.powerflowsettings import PowerFlowSettings
+
+    record = BenchmarkRecord(case.name, config, series=case.series, scale=case.scale)
+
+    try:
+        with open(os.devnull, "w") as devnull:
+            stdout = sys.stdout
+            sys.stdout = devnull
+            try:
+                settings = PowerFlowSettings(profile=True, **config_settings)
+                network = NetworkLoader(settings).from_file(case.path)
+                results = PowerFlow(network, settings).execute()
+            finally:
+                sys.stdout = stdout
+
+        summary = settings.profiler.get_summary()
+        record.is_success = bool(results.is_success)
+        record.parse_time = summary["phases"][PHASE_PARSE]["total"]
+        record.solve_time = summary["phases"][PHASE_POWERFLOW]["total"]
+        record.iterations = int(results.iterations)
+        record.matrix_size = int(network.size_Y)
+        if "matrix_nnz" in summary["metrics"]:
+            record.matrix_nnz = int(summary["metrics"]["matrix_nnz"]["last"])
+    except Exception as e:
+        record.error = str(e)
+
+    #ru_maxrss is in kB on Linux.
+    record.peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    sender.send(record.to_dict())
+    sender.close()
+
+#The cases of test/data: every RAW file in positive_seq and every feeder (node.glm) in three_phase.
+def get_test_cases(data_directory, pattern = "*"):
+    cases = []
+
+    for path in sorted(glob.glob(os.path.join(data_directory, "positive_seq", "*.RAW"))):
+        name = Path(path).stem
+        if fnmatch(name, pattern):
+            cases.append(BenchmarkCase(name, path))
+
+    for path in sorted(glob.glob(os.path.join(data_directory, "three_phase", "*", "node.glm"))):
+        name = Path(path).parent.name
+        if fnmatch(name, pattern):
+            cases.append(BenchmarkCase(name, path))
+
+    return cases
+
+#Replicated copies of a taxonomy feeder (see logic.syntheticfeeder), written to output_directory.
+def get_synthetic_cases(data_directory, output_directory, feeder = SYNTHETIC_FEEDER, copies = SYNTHETIC_COPIES):
+    glm_path = os.path.join(data_directory, "three_phase", feeder, "node.glm")
+
+    cases = []
+    for copy_count in copies:
+        name = f"{feeder}_x{copy_count}"
+        path = write_replicated_feeder(glm_path, copy_count, os.path.join(output_directory, name))
+        cases.append(BenchmarkCase(name, path, series=feeder, scale=copy_count))
+
+    return cases
+
+#The history is a JSON lines file with one entry per benchmark run.
+def append_history(filepath, records, label = None):
+    entry = {
+        "version": HISTORY_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": get_commit(),
+        "label": label,
+        "records": [record.to_dict() for record in records]
+    }
+
+    Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+def load_history(filepath):
+    entries = []
+    with open(filepath) as f:
+        for line in f:
+            if line.strip():
+                entries.append(json.loads(line))
+
+    return entries
+
+def save_baseline(filepath, records):
+    Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, "w") as f:
+        json.dump({"version": HISTORY_VERSION, "commit": get_commit(), "records": [record.to_dict() for record in records]}, f, indent=1)
+
+def load_baseline(filepath):
+    with open(filepath) as f:
+        return [BenchmarkRecord.from_dict(values) for values in json.load(f)["records"]]
+
+#Compares records with the baseline records of the same case and configuration.
+def find_regressions(baseline_records, records):
+    baseline = dict([(record.get_key(), record) for record in baseline_records])
+
+    regressions = []
+    for record in records:
+        if not record.get_key() in baseline:
+            continue
+        base = baseline[record.get_key()]
+
+        if base.is_success and not record.is_success:
+            regressions.append(Regression(record.case, record.config, "is_success", True, False))
+            continue
+
+        if not record.is_success:
+            continue
+
+        for metric in ["parse_time", "solve_time"]:
+            (base_value, value) = (getattr(base, metric), getattr(record, metric))
+            if base_value is not None and value > base_value * (1 + TIME_TOLERANCE) and value - base_value > MIN_TIME_DIFFERENCE:
+                regressions.append(Regression(record.case, record.config, metric, base_value, value))
+
+        if base.iterations is not None and record.iterations > base.iterations:
+            regressions.append(Regression(record.case, record.config, "iterations", base.iterations, record.iterations))
+
+        if base.peak_rss is not None and record.peak_rss > base.peak_rss * (1 + MEMORY_TOLERANCE):
+            regressions.append(Regression(record.case, record.config, "peak_rss", base.peak_rss, record.peak_rss))
+
+    return regressions
+
+#How parse and solve times grow with the matrix size over each synthetic series, as the exponent of a
+#power law fit (1 is linear). Returns {(series, config): {"parse_time": exponent, "solve_time": exponent}}.
+def get_scaling_exponents(records):
+    series_records = {}
+    for record in records:
+        if record.series is not None and record.is_success:
+            series_records.setdefault((record.series, record.config), []).append(record)
+
+    exponents = {}
+    for (key, series) in series_records.items():
+        if len(series) < 2:
+            continue
+
+        exponents[key] = {}
+        for metric in ["parse_time", "solve_time"]:
+            points = [(math.log(record.matrix_size), math.log(getattr(record, metric))) for record in series if getattr(record, metric) > 0]
+            exponents[key][metric] = fit_slope(points)
+
+    return exponents
+
+def fit_slope(points):
+    if len(points) < 2:
+        return None
+
+    x_mean = sum([x for (x, _) in points]) / len(points)
+    y_mean = sum([y for (_, y) in points]) / len(points)
+    denominator = sum([(x - x_mean) ** 2 for (x, _) in points])
+    if denominator == 0:
+        return None
+
+    return sum([(x - x_mean) * (y - y_mean) for (x, y) in points]) / denominator
+
+def format_record(record: BenchmarkRecord):
+    if record.error is not None:
+        return f'{record.case} ({record.config}): error: {record.error}'
+
+    return f'{record.case} ({record.config}): {"converged" if record.is_success else "not converged"}, parse {record.parse_time:.3f}s, solve {record.solve_time:.3f}s, {record.iterations} iterations, {record.peak_rss:.0f}MB, size {record.matrix_size}'
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(__file__), capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
@@ -0,0 +1,24 @@
+import os
+import stat
+
+#The caches keep their files under the user's cache directory (~/.cache, or $XDG_CACHE_HOME), never in a
+#shared one like the temp directory. Their files are unpickled (network cache) or executed (derivative
+#cache) when loaded, so anyone able to write to the directory could run code in the solver's process.
+def get_default_cache_dir(name):
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "combined-txds", name)
+
+#Creates the cache directory, readable and writable by the user only, unless it exists.
+def ensure_private_dir(path):
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    check_private_dir(path)
+
+#Raises PermissionError unless the directory belongs to the user and no one else can write to it.
+def check_private_dir(path):
+    status = os.stat(path)
+
+    if hasattr(os, "getuid") and status.st_uid != os.getuid():
+        raise PermissionError(f"Cache directory {path} is not owned by the current user")
+
+    if status.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"Cache directory {path} is writable by other users")
@@ -0,0 +1,241 @@
+from pathlib import Path
+import numpy as np
+from logic.global_vars import global_vars
+from logic.graphanalyzer import get_network_islands
+from logic.networkmodel import TxNetworkModel
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+
+CONTINGENCY_LINE = "line"
+CONTINGENCY_TRANSFORMER = "transformer"
+CONTINGENCY_GENERATOR = "generator"
+
+VIOLATION_LOW_VOLTAGE = "low_voltage"
+VIOLATION_HIGH_VOLTAGE = "high_voltage"
+VIOLATION_OVERLOAD = "overload"
+
+#A violation already present in the base case is reported against a contingency when it grows by more than
+#this (in percent).
+SEVERITY_TOLERANCE = 0.1
+
+#One limit violation in the solution of a contingency. Severity is the excess over the limit in percent
+#(of nominal voltage, or of the branch rating), so voltage and loading violations rank together.
+class Violation:
+    def __init__(self, violation_type, name, value, limit, severity) -> None:
+        self.violation_type = violation_type
+        self.name = name
+        self.value = value
+        self.limit = limit
+        self.severity = severity
+
+    def get_key(self):
+        return (self.violation_type, self.name)
+
+    def __str__(self) -> str:
+        return f'{self.violation_type} at {self.name}: {self.value:.4g} (limit {self.limit:.4g})'
+
+class ContingencyResult:
+    def __init__(self, contingency_type, element, name, is_success, is_islanding, iterations, violations, v_final = None) -> None:
+        self.contingency_type = contingency_type
+        self.element = element
+        self.name = name
+        self.is_success = is_success
+        #The outage splits off part of the network, which is reported without solving.
+        self.is_islanding = is_islanding
+        self.iterations = iterations
+        self.violations = violations
+        self.v_final = v_final
+
+    @property
+    def severity(self):
+        return sum([violation.severity for violation in self.violations])
+
+    #Contingencies that did not converge rank first, then those that island part of the network (which are
+    #not solved), then the solved ones by total severity.
+    def get_rank_key(self):
+        return (self.is_success, self.is_islanding, -self.severity)
+
+class ContingencyReport:
+    def __init__(self, base_violations, results) -> None:
+        self.base_violations = base_violations
+        self.results = sorted(results, key=ContingencyResult.get_rank_key)
+
+    #The contingencies that cause a problem (divergence, islanding or violations), most severe first.
+    def get_critical_results(self):
+        return [result for result in self.results if not result.is_success or len(result.violations) > 0]
+
+    def display(self, count = 20):
+        print("=====================")
+        print("Contingency Analysis:")
+        print(f'Contingencies: {len(self.results)}')
+        print(f'Base case violations: {len(self.base_violations)}')
+
+        critical_results = self.get_critical_results()
+        print(f'Critical contingencies: {len(critical_results)}')
+
+        for result in critical_results[:count]:
+            if result.is_islanding:
+                status = "islanding"
+            elif not result.is_success:
+                status = "not converged"
+            else:
+                status = f'{len(result.violations)} violations, severity {result.severity:.3g}'
+            print(f'{result.contingency_type} {result.name}: {status}')
+
+            for violation in sorted(result.violations, key=lambda violation: -violation.severity)[:5]:
+                print(f'    {violation}')
+
+    def output(self, outputfilepath):
+        if not outputfilepath:
+            return
+
+        filepath = Path(f"{outputfilepath}_contingencies.csv")
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(filepath, "w+") as f:
+            f.write("rank,type,element,converged,islanding,violation,name,value,limit,severity\n")
+            for (rank, result) in enumerate(self.results):
+                prefix = f'{rank + 1},{result.contingency_type},{result.name},{result.is_success},{result.is_islanding}'
+                if len(result.violations) == 0:
+                    f.write(f'{prefix},,,,,\n')
+                for violation in result.violations:
+                    f.write(f'{prefix},{violation.violation_type},{violation.name},{violation.value:.6g},{violation.limit:.6g},{violation.severity:.6g}\n')
+
+#N-1 contingency analysis of a transmission network: each in-service line, transformer and generator is
+#taken out of service in turn, and the network solved again.
+#
+#All solves share one PowerFlow, so the network is parsed and its stampers built only once. Each solve
+#starts from the base case solution, and the outage of a line or transformer is folded into the current
+#factors as a low-rank update (see SparseLULinearSolver.update_factors), so most contingencies are solved
+#without a fresh factorization.
+class ContingencyAnalysis:
+    def __init__(
+        self,
+        network: TxNetworkModel,
+        settings: PowerFlowSettings = PowerFlowSettings(),
+        v_min = 0.9,
+        v_max = 1.1,
+        max_loading = 1.0
+        ) -> None:
+        if network.is_three_phase:
+            raise Exception("Contingency analysis is only supported for transmission networks")
+
+        self.network = network
+        self.settings = settings
+        self.v_min = v_min
+        self.v_max = v_max
+        self.max_loading = max_loading
+
+    def get_contingencies(self):
+        contingencies = []
+        contingencies += [(CONTINGENCY_LINE, line) for line in self.network.lines if line.status]
+        contingencies += [(CONTINGENCY_TRANSFORMER, transformer) for transformer in self.network.transformers if transformer.status]
+        contingencies += [(CONTINGENCY_GENERATOR, generator) for generator in self.network.generators if generator.status]
+        return contingencies
+
+    #contingencies is a list of (contingency type, element), all of get_contingencies by default.
+    def execute(self, contingencies = None) -> ContingencyReport:
+        if contingencies is None:
+            contingencies = self.get_contingencies()
+
+        powerflow = PowerFlow(self.network, self.settings)
+        base_results = powerflow.execute()
+        if not base_results.is_success:
+            raise Exception("The base case did not converge")
+
+        nrsolver = powerflow.device_controller.homotopy.nrsolver
+        base_island_count = get_network_islands(self.network).count
+        base_violations = self.find_violations(base_results.v_final)
+
+        #Only violations that a contingency causes or worsens are reported against it.
+        base_severities = dict([(violation.get_key(), violation.severity) for violation in base_violations])
+
+        results = []
+        for (contingency_type, element) in contingencies:
+            previous_stamps = nrsolver.record_element(element) if contingency_type != CONTINGENCY_GENERATOR else None
+            element.status = False
+            nrsolver.invalidate_element(element, previous_stamps)
+
+            try:
+                results.append(self.__solve(powerflow, base_results.v_final, base_island_count, base_severities, contingency_type, element))
+            finally:
+                previous_stamps = nrsolver.record_element(element) if contingency_type != CONTINGENCY_GENERATOR else None
+                element.status = True
+                nrsolver.invalidate_element(element, previous_stamps)
+
+        return ContingencyReport(base_violations, results)
+
+    def __solve(self, powerflow: PowerFlow, v_base, base_island_count, base_severities, contingency_type, element):
+        name = get_element_name(contingency_type, element)
+
+        if get_network_islands(self.network).count > base_island_count:
+            return ContingencyResult(contingency_type, element, name, False, True, 0, [])
+
+        try:
+            results = powerflow.execute(v_base)
+        except Exception:
+            #Singular or diverging solves are reported like non-converged ones.
+            return ContingencyResult(contingency_type, element, name, False, False, 0, [])
+
+        if not results.is_success:
+            return ContingencyResult(contingency_type, element, name, False, False, results.iterations, [])
+
+        violations = []
+        for violation in self.find_violations(results.v_final):
+            if violation.severity > base_severities.get(violation.get_key(), 0) + SEVERITY_TOLERANCE:
+                violations.append(violation)
+
+        return ContingencyResult(contingency_type, element, name, True, False, results.iterations, violations, results.v_final)
+
+    def find_violations(self, v):
+        violations = []
+
+        for bus in self.network.buses:
+            V_mag = np.hypot(v[bus.node_Vr], v[bus.node_Vi])
+            if V_mag < self.v_min:
+                violations.append(Violation(VIOLATION_LOW_VOLTAGE, f"bus {bus.Bus}", V_mag, self.v_min, (self.v_min - V_mag) * 100))
+            elif V_mag > self.v_max:
+                violations.append(Violation(VIOLATION_HIGH_VOLTAGE, f"bus {bus.Bus}", V_mag, self.v_max, (V_mag - self.v_max) * 100))
+
+        for line in self.network.lines:
+            if line.status and line.rateA > 0:
+                self.__check_loading(violations, get_element_name(CONTINGENCY_LINE, line), get_line_flow(line, v), line.rateA)
+
+        for transformer in self.network.transformers:
+            if transformer.status and transformer.rating > 0:
+                self.__check_loading(violations, get_element_name(CONTINGENCY_TRANSFORMER, transformer), get_transformer_flow(transformer, v), transformer.rating * global_vars.MVAbase)
+
+        return violations
+
+    def __check_loading(self, violations, name, S_mva, rating):
+        loading = S_mva / rating
+        if loading > self.max_loading:
+            violations.append(Violation(VIOLATION_OVERLOAD, name, loading, self.max_loading, (loading - self.max_loading) * 100))
+
+def get_element_name(contingency_type, element):
+    if contingency_type == CONTINGENCY_LINE:
+        return f"{element.from_bus.Bus}-{element.to_bus.Bus}"
+    elif contingency_type == CONTINGENCY_TRANSFORMER:
+        return f"{element.from_bus_pos.Bus}-{element.to_bus_pos.Bus}"
+    else:
+        return f"{element.bus.Bus}"
+
+#The larger of the apparent powers (in MVA) entering the line at either end.
+def get_line_flow(line, v):
+    V_from = complex(v[line.from_bus.node_Vr], v[line.from_bus.node_Vi])
+    V_to = complex(v[line.to_bus.node_Vr], v[line.to_bus.node_Vi])
+
+    Y_series = complex(line.G, line.B)
+    Y_shunt = complex(0, line.B_line)
+
+    I_from = (V_from - V_to) * Y_series + V_from * Y_shunt
+    I_to = (V_to - V_from) * Y_series + V_to * Y_shunt
+
+    return max(abs(V_from * I_from.conjugate()), abs(V_to * I_to.conjugate())) * global_vars.MVAbase
+
+#The apparent power (in MVA) entering the primary winding.
+def get_transformer_flow(transformer, v):
+    V_primary = complex(v[transformer.from_bus_pos.node_Vr], v[transformer.from_bus_pos.node_Vi])
+    I_primary = complex(v[transformer.node_primary_Ir], v[transformer.node_primary_Ii])
+
+    return abs(V_primary * I_primary.conjugate()) * global_vars.MVAbase
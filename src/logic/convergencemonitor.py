@@ -0,0 +1,136 @@
+import math
+
+#Reasons a ConvergenceMonitor stops a solve.
+STOP_NOT_FINITE = "not finite"
+STOP_DIVERGED = "diverged"
+STOP_STALLED = "stalled"
+STOP_OSCILLATING = "oscillating"
+
+#Decides, from the error of each NR iteration, whether a solve is still worth continuing. Hopeless solves
+#are stopped early instead of running to max_iters, which matters most when many solves run in a batch
+#(time series, contingencies) and a failing one would otherwise cost the full iteration budget.
+#
+#A solve is stopped when its error:
+#  - is not finite,
+#  - exceeds its smallest value so far by divergence_ratio,
+#  - has not reached a new minimum (by stall_ratio) for stall_iterations iterations, or
+#  - repeats itself every other iteration (a two-cycle) for oscillation_iterations iterations.
+#
+#Large networks can settle on an error just above the solver tolerance that wanders around for many
+#iterations before dipping below it. Such a solve has not failed, so it is never stopped for stalling,
+#growing or oscillating while its error is within near_tolerance_ratio times the tolerance.
+#
+#Solves started from a nearby solution (the previous snapshot of a time series, the base case of a
+#contingency, the last solution before a device adjustment) converge in a few iterations when they
+#converge at all. They get the much shorter warm_stall_iterations, and are also stopped once the error
+#fails to shrink by warm_contraction_ratio warm_growth_iterations times in a row, so a failing one costs
+#3-5 iterations. Solves from the initial conditions can wander for a while before NR settles, and are given
+#more room.
+#
+#NRSolver calls reset before each solve and check on every iteration. Subclasses can replace either to
+#plug in other criteria, see PowerFlowSettings.convergence_monitor. The residual norm of an iteration costs
+#an extra matrix-vector product, so NRSolver only computes it for monitors that set needs_residual_norm.
+class ConvergenceMonitor:
+    needs_residual_norm = False
+
+    def __init__(
+        self,
+        min_iterations = 3,
+        stall_iterations = 15,
+        warm_stall_iterations = 5,
+        warm_growth_iterations = 3,
+        warm_contraction_ratio = 0.5,
+        stall_ratio = 0.9,
+        divergence_ratio = 1e3,
+        oscillation_iterations = 4,
+        oscillation_tolerance = 1e-3,
+        near_tolerance_ratio = 10
+        ) -> None:
+        #No solve is stopped before this many iterations, unless its error is not finite.
+        self.min_iterations = min_iterations
+        self.stall_iterations = stall_iterations
+        self.warm_stall_iterations = warm_stall_iterations
+        self.warm_growth_iterations = warm_growth_iterations
+        self.warm_contraction_ratio = warm_contraction_ratio
+        self.stall_ratio = stall_ratio
+        self.divergence_ratio = divergence_ratio
+        self.oscillation_iterations = oscillation_iterations
+        self.oscillation_tolerance = oscillation_tolerance
+        self.near_tolerance_ratio = near_tolerance_ratio
+
+        self.reset()
+
+    #tolerance is the solver's convergence tolerance (PowerFlowSettings.tolerance).
+    def reset(self, is_warm_start = False, tolerance = 0):
+        self.is_warm_start = is_warm_start
+        self.tolerance = tolerance
+        self.errors = []
+        self.best_error = math.inf
+        self.best_iteration = 0
+        #Consecutive iterations whose error did not shrink by warm_contraction_ratio.
+        self.growth_count = 0
+
+    #Returns the reason the solve should stop (one of the STOP_ values), or None to continue.
+    def check(self, iteration):
+        err = iteration.err_max
+        self.errors.append(err)
+
+        if not math.isfinite(err):
+            return STOP_NOT_FINITE
+
+        iteration_count = len(self.errors)
+
+        if iteration_count > 1 and err >= self.warm_contraction_ratio * self.errors[-2]:
+            self.growth_count += 1
+        else:
+            self.growth_count = 0
+
+        if err < self.stall_ratio * self.best_error:
+            self.best_error = err
+            self.best_iteration = iteration_count
+        elif err < self.best_error:
+            self.best_error = err
+
+        if iteration_count < self.min_iterations:
+            return None
+
+        if err > self.divergence_ratio * self.best_error:
+            return STOP_DIVERGED
+
+        if err <= self.near_tolerance_ratio * self.tolerance:
+            return None
+
+        stall_iterations = self.warm_stall_iterations if self.is_warm_start else self.stall_iterations
+        if iteration_count - self.best_iteration >= stall_iterations:
+            return STOP_STALLED
+
+        if self.is_warm_start and self.growth_count >= self.warm_growth_iterations:
+            return STOP_DIVERGED
+
+        if self.__is_oscillating():
+            return STOP_OSCILLATING
+
+        return None
+
+    def __is_oscillating(self):
+        #The last oscillation_iterations errors each match the error two iterations earlier, but not the
+        #error right before them.
+        if len(self.errors) < self.oscillation_iterations + 2:
+            return False
+
+        for idx in range(len(self.errors) - self.oscillation_iterations, len(self.errors)):
+            (err, err_previous, err_cycle) = (self.errors[idx], self.errors[idx - 1], self.errors[idx - 2])
+            if abs(err - err_cycle) > self.oscillation_tolerance * err or abs(err - err_previous) <= self.oscillation_tolerance * err:
+                return False
+
+        return True
+
+#Never stops a solve early.
+class NullConvergenceMonitor:
+    needs_residual_norm = False
+
+    def reset(self, is_warm_start = False, tolerance = 0):
+        pass
+
+    def check(self, iteration):
+        return None
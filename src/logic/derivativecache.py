@@ -0,0 +1,144 @@
+import hashlib
+import json
+import marshal
+import os
+import sys
+import tempfile
+import numpy
+from logic.cachedirectory import check_private_dir, ensure_private_dir, get_default_cache_dir
+
+#Increment when the layout of the cache file or of the generated source changes.
+DERIVATIVE_CACHE_VERSION = 2
+
+#Keeps the derivatives of every LagrangeSegment in one versioned file, as generated NumPy source.
+#
+#Each entry is the source of a module of plain functions plus a description of which function evaluates
+#which derivative. Loading an entry only compiles that source: sympy is not imported, and no pickled functions
+#are rebuilt. The models key their stampers by variable name and only build their Lagrange expressions when an
+#entry is missing (see LagrangeSegment).
+#
+#The file is replaced atomically: processes that write at the same time may drop each other's new entries
+#(they are then generated again), but never leave a partially written file behind.
+#
+#Like __pycache__, the compiled bytecode of each entry is kept next to the cache file, per interpreter version.
+#Both are executed when loaded, so the cache directory is a per-user one (see logic.cachedirectory), and a
+#directory other users could write to is neither read nor written.
+class DerivativeCache:
+    def __init__(self, cache_dir = None) -> None:
+        if cache_dir is None:
+            cache_dir = get_default_cache_dir("derivatives")
+
+        self.cache_dir = cache_dir
+        self.cache_file = os.path.join(self.cache_dir, f"derivatives-v{DERIVATIVE_CACHE_VERSION}.json")
+
+        #Read on the first lookup, then kept for the life of the process.
+        self.entries = None
+
+    #Returns the entry stored for lagrange_key, with its functions compiled, or None.
+    def load(self, lagrange_key):
+        if self.entries is None:
+            self.entries = self.__read_entries()
+
+        entry = self.entries.get(get_key_hash(lagrange_key))
+        if entry is None or entry["key"] != lagrange_key:
+            return None
+
+        #Named after the source, so the bytecode of an entry that was generated again is never picked up.
+        code_file = os.path.join(self.cache_dir, f"{get_key_hash(entry['source'])}.{sys.implementation.cache_tag}.marshal")
+        try:
+            with open(code_file, "rb") as f:
+                code = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            code = compile(entry["source"], "<derivatives>", "exec")
+            try:
+                self.__write_atomic(code_file, "wb", lambda f: marshal.dump(code, f))
+            except OSError:
+                pass
+
+        return build_derivatives(code, entry["derivatives"], entry["kernels"])
+
+    #source is the module source of the functions, and derivatives is a list (one per variable) of
+    #{"variable": name, "eqn": function, "constant": function or None, "terms": [[variable name, function], ...]}.
+    #kernels maps "primal_kernel" and "dual_kernel" to the functions whose values each kernel returns, in order.
+    def store(self, lagrange_key, source, derivatives, kernels):
+        entry = {
+            "key": lagrange_key,
+            "source": source,
+            "derivatives": derivatives,
+            "kernels": kernels
+        }
+
+        #Merge with what other processes may have written since this one read the file.
+        entries = self.__read_entries()
+        entries[get_key_hash(lagrange_key)] = entry
+
+        contents = {"version": DERIVATIVE_CACHE_VERSION, "entries": entries}
+        self.__write_atomic(self.cache_file, "w", lambda f: json.dump(contents, f))
+
+        self.entries = entries
+
+    def __write_atomic(self, path, mode, write):
+        ensure_private_dir(self.cache_dir)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, mode) as f:
+                write(f)
+            os.replace(temp_path, path)
+        except:
+            os.remove(temp_path)
+            raise
+
+    def __read_entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return {}
+        check_private_dir(self.cache_dir)
+
+        try:
+            with open(self.cache_file, "r") as f:
+                contents = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if contents.get("version") != DERIVATIVE_CACHE_VERSION:
+            return {}
+
+        return contents["entries"]
+
+#The functions of one cache entry, looked up by variable name.
+class CompiledDerivatives:
+    def __init__(self, derivatives, kernels, namespace) -> None:
+        self.derivatives = {}
+
+        self.kernels = {}
+        for (is_dual, kernel_name) in [(False, "primal_kernel"), (True, "dual_kernel")]:
+            output_indices = dict([(namespace[function], idx) for (idx, function) in enumerate(kernels[kernel_name])])
+            self.kernels[is_dual] = (namespace[kernel_name], output_indices)
+
+        for derivative in derivatives:
+            constant = derivative["constant"]
+
+            self.derivatives[derivative["variable"]] = (
+                namespace[derivative["eqn"]],
+                None if constant is None else namespace[constant],
+                [(variable, namespace[function]) for (variable, function) in derivative["terms"]]
+            )
+
+    #Returns (eqn function, constant function or None, [(variable name, function), ...]).
+    def get(self, variable_name):
+        return self.derivatives[variable_name]
+
+    #Returns (kernel, {function: index of its value in the kernel output}).
+    def get_kernel(self, is_dual):
+        return self.kernels[is_dual]
+
+def compile_derivatives(source, derivatives, kernels):
+    return build_derivatives(compile(source, "<derivatives>", "exec"), derivatives, kernels)
+
+def build_derivatives(code, derivatives, kernels):
+    namespace = {"numpy": numpy}
+    exec(code, namespace)
+
+    return CompiledDerivatives(derivatives, kernels, namespace)
+
+def get_key_hash(lagrange_key):
+    return hashlib.sha256(lagrange_key.encode('utf8')).hexdigest()
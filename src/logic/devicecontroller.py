@@ -1,5 +1,7 @@
+import numpy as np
 from logic.powerflowsettings import PowerFlowSettings
 from logic.homotopycontroller import HomotopyController
+from logic.profiler import PHASE_ASSIGN_MATRIX, PHASE_DEVICE_CONTROL
 from models.singlephase.capacitor import CapSwitchState, Capacitor, CapacitorMode
 from models.singlephase.fuse import Fuse, FuseStatus
 from models.singlephase.regulator import RegControl, Regulator
@@ -16,35 +18,103 @@ class DeviceController:
 
         self.optimization_enabled = self.settings.infeasibility_analysis
         self.network = self.homotopy.nrsolver.network
+        self.is_matrix_assigned = False
 
-    def run_powerflow(self):
+    def run_powerflow(self, v_init = None):
         #In the future, we may regenerate this based on device changes.
-        self.network.assign_matrix(self.optimization_enabled)
+        if not self.is_matrix_assigned:
+            with self.settings.profiler.section(PHASE_ASSIGN_MATRIX):
+                self.network.assign_matrix(self.optimization_enabled)
+            self.is_matrix_assigned = True
 
-        v_init = self.network.generate_v_init(self.settings)
+        #Solves starting from an earlier solution are expected to converge quickly, see ConvergenceMonitor.
+        is_warm_start = v_init is not None
+        if v_init is None:
+            v_init = self.network.generate_v_init(self.settings)
 
         #Preliminary adjustments based on initial conditions
         if self.settings.device_control:
             self.try_adjust_devices(v_init)
 
         for _ in range(MAX_DEVICE_ITERATIONS):
-            results = is_success, v_final, _, _ = self.homotopy.run_powerflow(v_init)
+            results = is_success, v_final, _, _ = self.homotopy.run_powerflow(v_init, is_warm_start)
             if not is_success:
                 return results
             if not self.settings.device_control or not self.try_adjust_devices(v_final):
                 return results
+
+            if self.settings.incremental_device_control:
+                #Only a few devices changed, so the last solution is a much better starting point.
+                v_init = v_final
+                is_warm_start = True
         
         raise Exception("Could not find solution where no device adjustments were required.")
 
     def try_adjust_devices(self, v):
+        with self.settings.profiler.section(PHASE_DEVICE_CONTROL):
+            return self.__try_adjust_devices(v)
+
+    def __try_adjust_devices(self, v):
+        nrsolver = self.homotopy.nrsolver
+
         adjustment_made = False
         if self.network.is_three_phase:
             for device in self.network.get_all_elements():
                 if isinstance(device, (Fuse, Capacitor, Regulator)):
+                    previous_stamps = None
+                    if self.settings.incremental_device_control:
+                        previous_stamps = nrsolver.record_element(device)
+
                     if device.try_adjust_device(v):
+                        nrsolver.invalidate_element(device, previous_stamps)
                         adjustment_made = True
         else:
             #No device control for transmission networks for now.
             pass
 
         return adjustment_made
+
+def get_devices(network):
+    if not network.is_three_phase:
+        return ([], [], [])
+
+    return (network.capacitors, network.fuses, network.regulators)
+
+#The states the device controller changes during a solve, one array per kind of device in the order of the
+#network's lists. Solves that must not depend on the ones before them (batch scenarios, chunks of a time
+#series) save these up front and restore them before each solve.
+def get_device_states(network):
+    (capacitors, fuses, regulators) = get_devices(network)
+
+    return {
+        "capacitor_closed": np.array([capacitor.switch == CapSwitchState.CLOSED for capacitor in capacitors], dtype=bool),
+        "fuse_blown": np.array([fuse.status == FuseStatus.BLOWN for fuse in fuses], dtype=bool),
+        "tap_position": np.array([regulator.tap_position for regulator in regulators], dtype=np.int64)
+    }
+
+#Returns the devices whose state changed. Their cached stamps are invalidated if an NRSolver is given.
+def set_device_states(network, states, nrsolver = None):
+    (capacitors, fuses, regulators) = get_devices(network)
+
+    changed = []
+    for (capacitor, is_closed) in zip(capacitors, states["capacitor_closed"]):
+        switch = CapSwitchState.CLOSED if is_closed else CapSwitchState.OPEN
+        if capacitor.switch != switch:
+            capacitor.switch = switch
+            changed.append(capacitor)
+
+    for (fuse, is_blown) in zip(fuses, states["fuse_blown"]):
+        status = FuseStatus.BLOWN if is_blown else FuseStatus.GOOD
+        if fuse.status != status:
+            fuse.status = status
+            changed.append(fuse)
+
+    for (regulator, tap_position) in zip(regulators, states["tap_position"]):
+        if regulator.try_increment_tap_position(int(tap_position) - regulator.tap_position):
+            changed.append(regulator)
+
+    if nrsolver != None:
+        for device in changed:
+            nrsolver.invalidate_element(device)
+
+    return changed
@@ -1,5 +1,8 @@
 from collections import defaultdict
 import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
 from models.singlephase.bus import GROUND
 from models.singlephase.load import Load
 from models.threephase.center_tap_transformer import CenterTapTransformer
@@ -39,4 +42,88 @@ class GraphAnalyzer:
                         self.edge_color[(from_bus.NodeName, to_bus.NodeName)] = "gray"
 
     def get_island_count(self):
-        return len(list(nx.connected_components(self.G)))
+        return get_network_islands(self.network).count
+
+#Returns the islands of the network, computed again only when its topology changed (see get_topology_key).
+def get_network_islands(network):
+    topology_key = network.get_topology_key()
+    if network.islands is None or network.islands.topology_key != topology_key:
+        network.islands = NetworkIslands(network, topology_key)
+
+    return network.islands
+
+#The connected components of the bus graph, found with a single sparse pass instead of a networkx graph.
+#
+#Nodes are bus names (all phases of a node belong to one island), and edges are the element connections,
+#ignoring loads and connections to ground, the way GraphAnalyzer draws them. An island is energized when
+#it contains a slack bus.
+class NetworkIslands:
+    def __init__(self, network, topology_key) -> None:
+        self.topology_key = topology_key
+
+        node_index = {}
+        bus_nodes = np.array([node_index.setdefault(bus.NodeName, len(node_index)) for bus in network.buses], dtype=np.int64)
+
+        from_nodes = []
+        to_nodes = []
+        for element in network.get_all_elements():
+            if type(element) == Load:
+                continue
+            for (from_bus, to_bus) in element.get_connections():
+                if from_bus == GROUND or to_bus == GROUND:
+                    continue
+                from_nodes.append(node_index.setdefault(from_bus.NodeName, len(node_index)))
+                to_nodes.append(node_index.setdefault(to_bus.NodeName, len(node_index)))
+
+        node_count = len(node_index)
+        graph = csr_matrix((np.ones(len(from_nodes)), (from_nodes, to_nodes)), shape=(node_count, node_count))
+        _, node_islands = connected_components(graph, directed=False)
+
+        #Virtual buses without any connection are not islands of their own.
+        is_counted = np.zeros(node_count, dtype=bool)
+        is_counted[bus_nodes[[not bus.IsVirtual for bus in network.buses]]] = True
+        is_counted[from_nodes] = True
+        is_counted[to_nodes] = True
+
+        #Renumber the counted islands 0..count-1, everything else gets -1.
+        counted_islands, labels = np.unique(node_islands[is_counted], return_inverse=True)
+        island_labels = np.full(node_islands.max(initial=-1) + 1, -1, dtype=np.int64)
+        island_labels[counted_islands] = np.arange(len(counted_islands))
+
+        self.count = len(counted_islands)
+
+        #The island of each entry of network.buses.
+        self.bus_islands = island_labels[node_islands[bus_nodes]]
+
+        self.energized = np.zeros(self.count, dtype=bool)
+        for slack in network.slack:
+            island = island_labels[node_islands[node_index[slack.bus.NodeName]]]
+            if island >= 0:
+                self.energized[island] = True
+
+        #Matrix indices of the unknowns in de-energized islands, known once the matrix is partitioned.
+        self.deenergized_indices = None
+
+    @property
+    def energized_count(self):
+        return int(self.energized.sum())
+
+    #Splits the (block diagonal) matrix of an assigned network into its independent blocks, and returns the
+    #indices of each energized block. A block is de-energized when it holds the voltages of a de-energized
+    #island only. Blocks without any bus voltage are solved like energized ones.
+    def partition_matrix(self, network, Y):
+        block_count, blocks = connected_components(Y, directed=False)
+
+        bus_Vr = np.array([bus.node_Vr for bus in network.buses], dtype=np.int64)
+        is_bus_energized = self.energized[self.bus_islands] | (self.bus_islands < 0)
+
+        is_deenergized = np.zeros(block_count, dtype=bool)
+        is_deenergized[blocks[bus_Vr[~is_bus_energized]]] = True
+        is_deenergized[blocks[bus_Vr[is_bus_energized]]] = False
+
+        order = np.argsort(blocks, kind="stable")
+        block_indices = np.split(order, np.flatnonzero(np.diff(blocks[order])) + 1)
+
+        self.deenergized_indices = np.flatnonzero(is_deenergized[blocks])
+
+        return [indices for (block, indices) in enumerate(block_indices) if not is_deenergized[block]]
@@ -1,3 +1,4 @@
+import logging
 import numpy as np
 from logic.nrsolver import NRSolver
 from logic.powerflowsettings import PowerFlowSettings
@@ -5,17 +6,30 @@ from logic.powerflowsettings import PowerFlowSettings
 TX_ITERATIONS = 1000
 TX_SCALE = 1.0 / TX_ITERATIONS
 
+#Adaptive stepping: the step grows after a fast NR solve, and is halved when NR fails.
+TX_STEP_INITIAL = 10 * TX_SCALE
+TX_STEP_MAX = 0.25
+TX_STEP_MIN = TX_SCALE / 64
+TX_STEP_GROWTH = 2
+#A solve needing at most this many iterations counts as fast.
+TX_FAST_ITERATIONS = 2
+
+logger = logging.getLogger(__name__)
+
 class HomotopyController:
     def __init__(self, settings: PowerFlowSettings, solver: NRSolver) -> None:
         self.settings = settings
         self.nrsolver = solver
 
-    def run_powerflow(self, v_init):
+    def run_powerflow(self, v_init, is_warm_start = False):
         #optimistically try to solve without homotopy first.
-        is_success, v_final, iteration_num = self.nrsolver.run_powerflow(v_init, 0)
+        is_success, v_final, iteration_num = self.nrsolver.run_powerflow(v_init, 0, is_warm_start)
         if is_success or not self.settings.tx_stepping:
             return (is_success, v_final, iteration_num, 0)
 
+        if self.settings.adaptive_tx_stepping:
+            return self.run_adaptive_powerflow(v_init)
+
         tx_factor = TX_ITERATIONS
         iterations = 0
         v_next = v_init
@@ -23,7 +37,7 @@ class HomotopyController:
 
         while tx_factor >= 0:
             if tx_factor % 10 == 0:
-                print(f'Tx factor: {tx_factor}')
+                logger.info("Tx factor: %d", tx_factor)
 
             is_success, v_final, iteration_num = self.nrsolver.run_powerflow(v_next, tx_factor * TX_SCALE)
             iterations = iteration_num + 1
@@ -35,3 +49,42 @@ class HomotopyController:
             tx_factor -= 1
 
         return (is_success, v_next, iterations, tx_factor * TX_SCALE)
+
+    #Walks tx_factor from 1 down to 0 with a variable step. Each corrector (NR solve) starts from a secant
+    #prediction through the last two converged points.
+    def run_adaptive_powerflow(self, v_init):
+        is_success, v_final, iteration_num = self.nrsolver.run_powerflow(v_init, 1)
+        if not is_success:
+            return (is_success, v_final, iteration_num + 1, 1)
+
+        tx_factor = 1
+        v_current = v_final
+        tx_previous = None
+        v_previous = None
+        step = TX_STEP_INITIAL
+
+        while tx_factor > 0:
+            tx_next = max(tx_factor - step, 0)
+            logger.info("Tx factor: %.6f", tx_next)
+
+            if v_previous is None:
+                v_predicted = v_current
+            else:
+                slope = (v_current - v_previous) / (tx_factor - tx_previous)
+                v_predicted = v_current + (tx_next - tx_factor) * slope
+
+            is_success, v_final, iteration_num = self.nrsolver.run_powerflow(v_predicted, tx_next)
+
+            if not is_success:
+                step /= 2
+                if step < TX_STEP_MIN:
+                    return (False, v_current, iteration_num + 1, tx_factor)
+                continue
+
+            tx_previous, v_previous = tx_factor, v_current
+            tx_factor, v_current = tx_next, v_final
+
+            if iteration_num + 1 <= TX_FAST_ITERATIONS:
+                step = min(step * TX_STEP_GROWTH, TX_STEP_MAX)
+
+        return (True, v_current, iteration_num + 1, 0)
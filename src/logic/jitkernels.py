@@ -0,0 +1,38 @@
+try:
+    import numba
+except ImportError:
+    numba = None
+
+#Group evaluators that have been compiled, by segment kernel.
+_batch_kernels = {}
+
+def is_jit_available():
+    return numba != None
+
+#Returns a nopython function batch_kernel(args, values) that evaluates kernel for each column of the
+#(argument, element) array args, and writes its outputs into the (output, element) array values.
+#Compilation happens on the first call, and is done once per kernel and process.
+def get_batch_kernel(kernel, argument_count, output_count):
+    if not kernel in _batch_kernels:
+        _batch_kernels[kernel] = compile_batch_kernel(kernel, argument_count, output_count)
+
+    return _batch_kernels[kernel]
+
+def compile_batch_kernel(kernel, argument_count, output_count):
+    if numba == None:
+        raise Exception("The JIT backend needs numba to be installed")
+
+    arguments = ", ".join([f"args[{idx}, element]" for idx in range(argument_count)])
+
+    lines = [
+        "def batch_kernel(args, values):",
+        "    for element in range(args.shape[1]):",
+        f"        outputs = kernel({arguments})"
+    ]
+    for idx in range(output_count):
+        lines.append(f"        values[{idx}, element] = outputs[{idx}]")
+
+    namespace = {"kernel": numba.njit(kernel)}
+    exec(compile("\n".join(lines) + "\n", "<batch kernel>", "exec"), namespace)
+
+    return numba.njit(namespace["batch_kernel"])
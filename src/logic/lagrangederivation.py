@@ -0,0 +1,154 @@
+from sympy import Add, cse, diff, expand, Pow, Symbol, sympify
+from sympy.printing.numpy import NumPyPrinter
+
+#The symbolic side of a LagrangeSegment: differentiating its Lagrange expression and printing the derivatives
+#as NumPy source. Only imported when a segment's derivatives are missing from the derivative cache, or when
+#its expressions are asked for, so that loading cached derivatives does not import sympy.
+
+def is_constant(expr, vars):
+    for symbol in expr.free_symbols:
+        if symbol in vars:
+            return False
+    return True
+
+def is_linear(expr, vars):
+    if is_constant(expr, vars):
+        return False
+
+    var_found = False
+    for symbol in expr.free_symbols:
+        if symbol in vars:
+            if var_found:
+                return False
+            elif len(expr.atoms(Pow)) > 0:
+                return False
+            var_found = True
+    return True
+
+def get_linear_term(expr, vars):
+    if not is_linear(expr, vars):
+        raise Exception("Expression is not linear")
+
+    result = None
+    for symbol in expr.free_symbols:
+        if symbol in vars:
+            result = symbol
+    return result
+
+def linearize_expr(expr, variables):
+    kth_sum = -expr
+    Y_components = {}
+
+    for variable in variables:
+        derivative = diff(expr, variable)
+        Y_components[variable] = derivative
+        kth_sum += derivative * variable
+
+    return (kth_sum, Y_components)
+
+def split_expr(eqn, vars):
+    eqn = expand(eqn)
+
+    constant_expr = 0
+    variable_expr_dict = {}
+
+    if isinstance(eqn, Add):
+        expressions = eqn.args
+    else:
+        expressions = [eqn]
+
+    for expr in expressions:
+        if is_constant(expr, vars):
+            constant_expr += -expr
+        elif is_linear(expr, vars):
+            term = get_linear_term(expr, vars)
+            if not term in variable_expr_dict:
+                variable_expr_dict[term] = 0
+            variable_expr_dict[term] += diff(expr, term)
+        else:
+            (J_expr, Y_expr_dict) =  linearize_expr(expr, vars)
+
+            constant_expr += J_expr
+            for key, value in Y_expr_dict.items():
+                if not key in variable_expr_dict:
+                    variable_expr_dict[key] = 0
+                variable_expr_dict[key] += value
+
+    return (constant_expr, variable_expr_dict)
+
+#One sympy symbol per name, for the constants and variables of a segment.
+def build_symbols(names):
+    return [Symbol(name) for name in names]
+
+#Returns {variable name: (derivative, constant part, {variable name: coefficient})}, as sympy expressions.
+def get_symbolic_derivatives(lagrange, variables):
+    symbolic_derivatives = {}
+    for first_order in variables:
+        derivative = diff(lagrange, first_order)
+
+        constant_expr, variable_exprs = split_expr(derivative, variables)
+
+        variable_exprs = dict([(str(variable), expr) for (variable, expr) in variable_exprs.items()])
+        symbolic_derivatives[str(first_order)] = (derivative, constant_expr, variable_exprs)
+
+    return symbolic_derivatives
+
+#Generates NumPy source for the derivatives of a segment. Returns the source, with the description of its
+#functions that DerivativeCache.store takes.
+#
+#Each derivative gets an eval function of its own. In addition, the stamps of the segment are generated
+#as two kernels, one for the primal stamps and one for the dual stamps, that share their common
+#subexpressions (1/(Vr**2 + Vi**2) in a load, for instance).
+def generate_derivative_source(symbolic_derivatives, inputs, primal_names, dual_names):
+    #Symbol names such as 'V_from\,r' aren't valid python identifiers.
+    arguments = [Symbol(f"a{idx}") for idx in range(len(inputs))]
+    replacements = dict(zip(inputs, arguments))
+    signature = ", ".join([str(argument) for argument in arguments])
+    printer = NumPyPrinter()
+
+    functions = []
+    exprs_by_function = {}
+    def add_function(expr):
+        name = f"f{len(functions)}"
+        expr = sympify(expr).xreplace(replacements)
+        functions.append(f"def {name}({signature}):\n    return {printer.doprint(expr)}\n")
+        exprs_by_function[name] = expr
+        return name
+
+    derivatives = []
+    for (variable, (derivative, constant_expr, variable_exprs)) in symbolic_derivatives.items():
+        terms = []
+        for (term_variable, variable_eqn) in variable_exprs.items():
+            if variable_eqn != 0:
+                terms.append([term_variable, add_function(variable_eqn)])
+
+        derivatives.append({
+            "variable": variable,
+            "eqn": add_function(derivative),
+            "constant": add_function(constant_expr) if constant_expr != 0 else None,
+            "terms": terms
+        })
+
+    kernels = {}
+    for (kernel_name, variable_names) in [("primal_kernel", dual_names), ("dual_kernel", primal_names)]:
+        outputs = []
+        for derivative in derivatives:
+            if derivative["variable"] in variable_names:
+                if derivative["constant"] != None:
+                    outputs.append(derivative["constant"])
+                outputs += [function for (_, function) in derivative["terms"]]
+
+        functions.append(generate_kernel(kernel_name, signature, [exprs_by_function[name] for name in outputs], printer))
+        kernels[kernel_name] = outputs
+
+    return ("\n".join(functions), derivatives, kernels)
+
+def generate_kernel(name, signature, exprs, printer):
+    intermediates, outputs = cse(exprs)
+
+    lines = [f"def {name}({signature}):"]
+    for (symbol, expr) in intermediates:
+        lines.append(f"    {symbol} = {printer.doprint(expr)}")
+    lines.append(f"    return ({''.join([printer.doprint(output) + ', ' for output in outputs])})")
+
+    return "\n".join(lines) + "\n"
@@ -1,102 +1,49 @@
-from collections import defaultdict
+import hashlib
+import re
 import typing
-from sympy import Add, diff, lambdify, expand, Pow, Symbol
-from logic.lagrangepickler import LagrangePickler
-
-def is_constant(expr, vars):
-    for symbol in expr.free_symbols:
-        if symbol in vars:
-            return False
-    return True
-
-def is_linear(expr, vars):
-    if is_constant(expr, vars):
-        return False
-
-    var_found = False
-    for symbol in expr.free_symbols:
-        if symbol in vars:
-            if var_found:
-                return False
-            elif len(expr.atoms(Pow)) > 0:
-                return False
-            var_found = True
-    return True 
-
-def get_linear_term(expr, vars):
-    if not is_linear(expr, vars):
-        raise Exception("Expression is not linear")
-
-    result = None
-    for symbol in expr.free_symbols:
-        if symbol in vars:
-            result = symbol
-    return result
-
-def linearize_expr(expr, variables):
-    kth_sum = -expr
-    Y_components = {}
-
-    for variable in variables:
-        derivative = diff(expr, variable) 
-        Y_components[variable] = derivative
-        kth_sum += derivative * variable
-    
-    return (kth_sum, Y_components)
-
-def split_expr(eqn, vars):
-    eqn = expand(eqn)
-
-    constant_expr = 0
-    variable_expr_dict = {}
-
-    if isinstance(eqn, Add):
-        expressions = eqn.args
-    else:
-        expressions = [eqn]
-
-    for expr in expressions:
-        if is_constant(expr, vars):
-            constant_expr += -expr
-        elif is_linear(expr, vars):
-            term = get_linear_term(expr, vars)
-            if not term in variable_expr_dict:
-                variable_expr_dict[term] = 0
-            variable_expr_dict[term] += diff(expr, term)
-        else:
-            (J_expr, Y_expr_dict) =  linearize_expr(expr, vars)
-
-            constant_expr += J_expr
-            for key, value in Y_expr_dict.items():
-                if not key in variable_expr_dict:
-                    variable_expr_dict[key] = 0
-                variable_expr_dict[key] += value
-    
-    return (constant_expr, variable_expr_dict)
+from logic.derivativecache import DerivativeCache, compile_derivatives
+
+#Splits a string of names the way sympy.symbols does ("a b" or "a, b", with "\," for a comma in a name).
+def variable_names(names):
+    return tuple([name.replace("\\,", ",") for name in re.split(r"\s+|(?<!\\),\s*", names.strip()) if name != ""])
 
 class DerivativeEntry:
-    def __init__(self, variable, expr, constant_expr, variable_exprs, lambda_inputs) -> None:
+    def __init__(self, variable, eqn_eval, constant_eval, variable_evals, segment) -> None:
         self.variable = variable
-        self.expr = expr
-        
-        self.constant_expr = constant_expr
-        self.variable_exprs = variable_exprs
-        self.lambda_inputs = lambda_inputs
-
-        #separate step so that we can pickle this object beforehand.
-        self.eqn_eval = lambdify(self.lambda_inputs, self.expr)
-        self.constant_eval = lambdify(self.lambda_inputs, self.constant_expr)
-        self.variable_evals = {}
-        for var, variable_eqn in self.variable_exprs.items():
-            if variable_eqn != 0:
-                self.variable_evals[var] = lambdify(self.lambda_inputs, variable_eqn)
+
+        self.eqn_eval = eqn_eval
+        #None when the constant part of the derivative is zero.
+        self.constant_eval = constant_eval
+        #Only the variables with a nonzero coefficient.
+        self.variable_evals = variable_evals
+
+        #The expressions are only needed to stamp symbols, and are derived again on demand.
+        self.segment = segment
+
+    @property
+    def expr(self):
+        return self.segment.get_symbolic_derivatives()[self.variable][0]
+
+    @property
+    def constant_expr(self):
+        return self.segment.get_symbolic_derivatives()[self.variable][1]
+
+    @property
+    def variable_exprs(self):
+        return self.segment.get_symbolic_derivatives()[self.variable][2]
 
     def get_evals(self):
-        if self.constant_expr != 0:
-            yield (None, self.constant_eval, self.constant_expr)
+        if self.constant_eval != None:
+            yield (None, self.constant_eval)
 
         for (variable, func) in self.variable_evals.items():
-            yield(variable, func, self.variable_exprs[variable])
+            yield (variable, func)
+
+    def get_term_expr(self, variable):
+        if variable == None:
+            return self.constant_expr
+
+        return self.variable_exprs[variable]
 
     def __repr__(self) -> str:
         return f"Entry {self.variable}: {self.expr}"
@@ -104,48 +51,123 @@ class DerivativeEntry:
 #This class manages individual segments of the lagrange equation that is supplied by different models.
 #algebraically, you can think of all the segments as summing together to make the full Lagrange equation,
 #but in reality we map individual components straight onto the matrix (see: LagrangeStamper)
+#
+#The constants and variables of a segment are given by name, and build_lagrange(constants, primals, duals)
+#returns the Lagrange expression from sympy symbols with those names. The expression is only built when
+#the derivatives are missing from the derivative cache or its expressions are asked for, so models can be
+#imported and stamped from the cache without importing sympy (see logic.lagrangederivation).
 class LagrangeSegment:
-    VERSION = 1 #Increment if changes have been made to bust the derivative cache.
-    _pickler = LagrangePickler()
+    VERSION = 2 #Increment if changes have been made to bust the derivative cache.
+    _cache = DerivativeCache()
+    #Every segment created so far, so their kernels can be generated ahead of time (see build_kernels.py).
+    segments = []
 
-    def __init__(self, lagrange, constant_symbols, primal_symbols, dual_symbols) -> None:
-        self.lagrange = lagrange
-        self.constants = constant_symbols
-        self.primals = primal_symbols
-        self.duals = dual_symbols
-        self.lagrange = lagrange
-        self.lagrange_key = f"{LagrangeSegment.VERSION},{lagrange},{constant_symbols},{primal_symbols},{dual_symbols}"
+    def __init__(self, build_lagrange, constant_names, primal_names, dual_names) -> None:
+        self.build_lagrange = build_lagrange
+        self.constants = tuple(constant_names)
+        self.primals = tuple(primal_names)
+        self.duals = tuple(dual_names)
 
         self.variables = self.primals + self.duals
 
+        self._lagrange = None
         self._derivatives = None
-        self._derivatives: typing.Dict[Symbol, DerivativeEntry]
+        self._derivatives: typing.Dict[str, DerivativeEntry]
+        self._symbolic_derivatives = None
+        self._kernels = None
+
+        #Where each stamper of this segment writes its kernel outputs, shared by every stamper with the same
+        #unused (SKIP) variables. See lagrangestamper.get_stamp_layout.
+        self.stamp_layouts = {}
+
+        LagrangeSegment.segments.append(self)
+
+    #The cache key covers the source file of build_lagrange, so editing a model's equations busts its entry.
+    @property
+    def lagrange_key(self):
+        build_lagrange = self.build_lagrange
+        source_digest = get_source_digest(build_lagrange.__code__.co_filename)
+        return f"{LagrangeSegment.VERSION},{build_lagrange.__module__}.{build_lagrange.__qualname__},{source_digest},{self.constants},{self.primals},{self.duals}"
+
+    #The Lagrange expression, as a sympy expression.
+    @property
+    def lagrange(self):
+        if self._lagrange is None:
+            from logic.lagrangederivation import build_symbols
+
+            symbols = [build_symbols(names) for names in [self.constants, self.primals, self.duals]]
+            self._lagrange = self.build_lagrange(*symbols)
+
+        return self._lagrange
 
     def get_derivatives(self):
         if self._derivatives != None:
             return self._derivatives
 
-        if LagrangeSegment._pickler.has_pickle(self.lagrange_key):
-            try:
-                self._derivatives = LagrangeSegment._pickler.try_unpickle(self.lagrange_key)
-            except:
-                self._generated_derivatives()
-        else:
-            self._generated_derivatives()
+        try:
+            compiled = LagrangeSegment._cache.load(self.lagrange_key)
+        except (OSError, ValueError, KeyError):
+            #A missing, unreadable or refused cache; the derivatives are generated instead.
+            compiled = None
+
+        if compiled == None:
+            compiled = self._generate_derivatives()
 
-        return self._derivatives
-    
-    def _generated_derivatives(self):
         self._derivatives = {}
 
-        lambda_inputs = self.constants + self.variables
+        for variable in self.variables:
+            eqn_eval, constant_eval, term_evals = compiled.get(variable)
+            self._derivatives[variable] = DerivativeEntry(variable, eqn_eval, constant_eval, dict(term_evals), self)
+
+        self._kernels = {}
+        for is_dual in [False, True]:
+            self._kernels[is_dual] = compiled.get_kernel(is_dual)
+
+        return self._derivatives
+
+    #Returns (kernel, {eval function: output index}). The kernel takes the same arguments as the eval functions
+    #and returns the values of all of them at once: the derivatives by the duals (the primal stamps), or by
+    #the primals when is_dual is set.
+    def get_kernel(self, is_dual):
+        if self._kernels == None:
+            self.get_derivatives()
+
+        return self._kernels[is_dual]
+
+    #Returns {variable: (derivative, constant part, {variable: coefficient})}, as sympy expressions.
+    def get_symbolic_derivatives(self):
+        if self._symbolic_derivatives != None:
+            return self._symbolic_derivatives
+
+        from logic.lagrangederivation import build_symbols, get_symbolic_derivatives
+
+        self._symbolic_derivatives = get_symbolic_derivatives(self.lagrange, build_symbols(self.variables))
+        return self._symbolic_derivatives
+
+    #Generates NumPy source for the derivatives, stores it in the derivative cache and compiles it.
+    def _generate_derivatives(self):
+        from logic.lagrangederivation import build_symbols, generate_derivative_source
+
+        inputs = build_symbols(self.constants + self.variables)
+        source, derivatives, kernels = generate_derivative_source(self.get_symbolic_derivatives(), inputs, self.primals, self.duals)
 
-        for first_order in self.variables:
-            derivative = diff(self.lagrange, first_order)
+        try:
+            LagrangeSegment._cache.store(self.lagrange_key, source, derivatives, kernels)
+        except OSError:
+            #The derivatives still work without the cache, they are just generated again next time.
+            pass
 
-            constant_expr, variable_exprs = split_expr(derivative, self.variables)
+        return compile_derivatives(source, derivatives, kernels)
 
-            self._derivatives[first_order] = DerivativeEntry(first_order, derivative, constant_expr, variable_exprs, lambda_inputs)
+#sha256 of each source file, read once per process.
+_source_digests = {}
 
-        LagrangeSegment._pickler.try_pickle(self.lagrange_key, self._derivatives)
+def get_source_digest(filename):
+    if not filename in _source_digests:
+        try:
+            with open(filename, "rb") as f:
+                _source_digests[filename] = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            _source_digests[filename] = None
 
+    return _source_digests[filename]
@@ -1,4 +1,5 @@
 from collections import defaultdict
+import numpy as np
 from logic.lagrangesegment import LagrangeSegment
 from logic.matrixbuilder import MatrixBuilder
 
@@ -11,65 +12,72 @@ class StampEntry:
         self.eval_func = eval_func
 
 class LagrangeStamper:
+    #A network has one stamper per element (and per phase pair of a three-phase line), so stampers only keep
+    #their own matrix indices. Where the kernel outputs go is described by a StampLayout shared with every
+    #other stamper of the segment.
+    __slots__ = ("handler", "var_indices", "eqn_indices", "optimization_enabled", "primal_layout", "dual_layout", "batch_structures")
+
     def __init__(self, handler: LagrangeSegment, var_map: dict, optimization_enabled: bool, eqn_map: dict = None) -> None:
         self.handler = handler
 
         #The equation map is really the row index lookup, and the variable map is really the column index lookup.
-        self.var_map = var_map
+        #Both are kept as tuples, in the order of handler.variables (the primals, then the duals).
+        self.var_indices = tuple([var_map[variable] for variable in handler.variables])
         if eqn_map == None:
-            self.eqn_map = var_map
-        else: 
-            self.eqn_map = eqn_map
+            self.eqn_indices = self.var_indices
+        else:
+            self.eqn_indices = tuple([eqn_map[variable] for variable in handler.variables])
 
         self.optimization_enabled = optimization_enabled
 
-        self.empty_primals = [None] * len(self.handler.primals)
-        self.empty_duals = [None] * len(self.handler.duals)
-
         #The 'primal' contributions are really the first derivative of the dual variables.
-        self.primal_components = self.build_component_set(self.handler.duals)
+        self.primal_layout = get_stamp_layout(handler, False, optimization_enabled, self.var_indices, self.eqn_indices)
 
         if self.optimization_enabled:
-            self.dual_components = self.build_component_set(self.handler.primals)
+            self.dual_layout = get_stamp_layout(handler, True, optimization_enabled, self.var_indices, self.eqn_indices)
+        else:
+            self.dual_layout = None
 
-    def build_component_set(self, variables):
-        components = []
-        for variable in variables:
-            row_index = self.get_variable_row_index(variable)
-            if row_index == SKIP:
-                continue
+        #Array form of the components, built by the batch stampers when first needed.
+        self.batch_structures = None
 
-            entry = self.handler.get_derivatives()[variable]
+    @property
+    def var_map(self):
+        return dict(zip(self.handler.variables, self.var_indices))
 
-            for (yth_variable, eval, expr) in entry.get_evals():
+    @property
+    def eqn_map(self):
+        return dict(zip(self.handler.variables, self.eqn_indices))
+
+    #The components stamped, as (row, column or None for J, kernel output index, term).
+    @property
+    def primal_components(self):
+        return self.primal_layout.get_components(self)
+
+    @property
+    def dual_components(self):
+        return self.dual_layout.get_components(self)
 
-                if yth_variable == None:
-                    components.append((row_index, None, eval, expr))
-                else:
-                    col_index = self.var_map[yth_variable]
-                    if col_index == SKIP:
-                        continue
-                    components.append((row_index, col_index, eval, expr))
-        
-        return components
-    
     def get_variable_row_index(self, variable):
-        if self.optimization_enabled:
-            return self.eqn_map[variable]
-        else:
-            #For the optimization disabled case, we can't use the dual variable's index
-            #for the matrix row. Instead, we commandeer the index of it's corresponding primal variable.
-            return self.eqn_map[self.handler.primals[self.handler.duals.index(variable)]]
+        return self.eqn_indices[get_row_position(self.handler, variable, self.optimization_enabled)]
 
     def stamp_primal(self, Y: MatrixBuilder, J, constant_vals, v_prev):
+        if Y.batch != None:
+            Y.batch.enqueue(self, False, constant_vals, v_prev)
+            return
+
         primal_vals, dual_vals = self.__extract_kth_primals_duals(v_prev)
         args = constant_vals + primal_vals + dual_vals
-        self.__stamp_set(Y, J, self.primal_components, args)
+        self.__stamp_set(Y, J, self.primal_layout, args)
 
     def stamp_dual(self, Y: MatrixBuilder, J, constant_vals, v_prev):
+        if Y.batch != None:
+            Y.batch.enqueue(self, True, constant_vals, v_prev)
+            return
+
         primal_vals, dual_vals = self.__extract_kth_primals_duals(v_prev)
         args = constant_vals + primal_vals + dual_vals
-        self.__stamp_set(Y, J, self.dual_components, args)
+        self.__stamp_set(Y, J, self.dual_layout, args)
 
     def calc_residuals(self, constant_vals, v_result):
         residuals = defaultdict(lambda: 0)
@@ -77,54 +85,41 @@ class LagrangeStamper:
         primal_vals, dual_vals = self.__extract_kth_primals_duals(v_result)
         args = constant_vals + primal_vals + dual_vals
 
-        for dual in self.handler.duals:
-            derivative = self.handler.get_derivatives()[dual]
-            row_idx = self.get_variable_row_index(dual)
-            if row_idx == SKIP:
-                continue
-            residuals[row_idx] += derivative.eqn_eval(*args)
+        eqn_indices = self.eqn_indices
+        for (row_position, derivative) in self.primal_layout.residual_components:
+            residuals[eqn_indices[row_position]] += derivative.eqn_eval(*args)
 
         if self.optimization_enabled:
-            for primal in self.handler.primals:
-                derivative = self.handler.get_derivatives()[primal]
-                row_idx = self.get_variable_row_index(primal)
-                if row_idx == SKIP:
-                    continue
-                residuals[row_idx] += derivative.eqn_eval(*args)
+            for (row_position, derivative) in self.dual_layout.residual_components:
+                residuals[eqn_indices[row_position]] += derivative.eqn_eval(*args)
 
         return residuals
 
     def __extract_kth_primals_duals(self, v_prev):
+        primal_count = len(self.handler.primals)
+
         if v_prev is None:
-            return (self.empty_primals, self.empty_duals)
+            return ([None] * primal_count, [None] * len(self.handler.duals))
 
-        primal_vals = []
-        for primal in self.handler.primals:
-            index = self.var_map[primal]
-            if index == SKIP:
-                primal_vals.append(0)
-            else:
-                primal_vals.append(v_prev[index])
+        primal_vals = [0 if index == SKIP else v_prev[index] for index in self.var_indices[:primal_count]]
 
         if self.optimization_enabled:
-            dual_vals = []
-            for dual in self.handler.duals:
-                index = self.var_map[dual]
-                if index == SKIP:
-                    dual_vals.append(0)
-                else:
-                    dual_vals.append(v_prev[index])
+            dual_vals = [0 if index == SKIP else v_prev[index] for index in self.var_indices[primal_count:]]
         else:
-            dual_vals = self.empty_duals
+            dual_vals = [None] * len(self.handler.duals)
 
         return (primal_vals, dual_vals)
 
-    def __stamp_set(self, Y: MatrixBuilder, J, components, args):
-        for (row_index, col_index, eval_func, _) in components:
-            if col_index == None:
-                J[row_index] += eval_func(*args)
-            else:
-                Y.stamp(row_index, col_index, eval_func(*args))
+    def __stamp_set(self, Y: MatrixBuilder, J, layout, args):
+        values = layout.kernel(*args)
+        var_indices = self.var_indices
+        eqn_indices = self.eqn_indices
+
+        for (row_position, col_position, output_index) in layout.y_components:
+            Y.stamp(eqn_indices[row_position], var_indices[col_position], values[output_index])
+
+        for (row_position, output_index) in layout.j_components:
+            J[eqn_indices[row_position]] += values[output_index]
 
     def stamp_primal_symbols(self, Y: MatrixBuilder, J):
         self.__stamp_symbol_set(Y, J, self.primal_components)
@@ -133,8 +128,84 @@ class LagrangeStamper:
         self.__stamp_symbol_set(Y, J, self.dual_components)
 
     def __stamp_symbol_set(self, Y: MatrixBuilder, J, components):
-        for (row_index, col_index, _, expr) in components:
+        for (row_index, col_index, _, (entry, yth_variable)) in components:
+            expr = entry.get_term_expr(yth_variable)
             if col_index == None:
                 J[row_index] += expr
             else:
-                Y.stamp(row_index, col_index, expr)
\ No newline at end of file
+                Y.stamp(row_index, col_index, expr)
+
+#The components one kernel of a segment stamps, with rows and columns given as positions in the index
+#tuples of a stamper (see LagrangeStamper) rather than as matrix indices.
+class StampLayout:
+    def __init__(self, segment: LagrangeSegment, is_dual, optimization_enabled, var_skipped, eqn_skipped) -> None:
+        self.kernel, output_indices = segment.get_kernel(is_dual)
+
+        positions = dict([(variable, idx) for (idx, variable) in enumerate(segment.variables)])
+
+        #(row position, column position, kernel output index)
+        self.y_components = []
+        #(row position, kernel output index)
+        self.j_components = []
+        #(row position, column position or None for J, kernel output index, term)
+        self.components = []
+        #(row position, derivative), for the residuals.
+        self.residual_components = []
+
+        #The 'primal' contributions are really the first derivative of the dual variables.
+        variables = segment.primals if is_dual else segment.duals
+
+        for variable in variables:
+            row_position = get_row_position(segment, variable, optimization_enabled)
+            if eqn_skipped[row_position]:
+                continue
+
+            entry = segment.get_derivatives()[variable]
+            self.residual_components.append((row_position, entry))
+
+            for (yth_variable, eval) in entry.get_evals():
+                if yth_variable == None:
+                    self.j_components.append((row_position, output_indices[eval]))
+                    self.components.append((row_position, None, output_indices[eval], (entry, yth_variable)))
+                else:
+                    col_position = positions[yth_variable]
+                    if var_skipped[col_position]:
+                        continue
+                    self.y_components.append((row_position, col_position, output_indices[eval]))
+                    self.components.append((row_position, col_position, output_indices[eval], (entry, yth_variable)))
+
+        self.y_row_positions = np.array([row for (row, _, _) in self.y_components], dtype=np.int64)
+        self.y_col_positions = np.array([col for (_, col, _) in self.y_components], dtype=np.int64)
+        self.y_terms = np.array([term for (_, _, term) in self.y_components], dtype=np.int64)
+
+        self.j_row_positions = np.array([row for (row, _) in self.j_components], dtype=np.int64)
+        self.j_terms = np.array([term for (_, term) in self.j_components], dtype=np.int64)
+
+    #The components with the matrix indices of one stamper filled in.
+    def get_components(self, stamper: LagrangeStamper):
+        components = []
+        for (row_position, col_position, output_index, term) in self.components:
+            col_index = None if col_position == None else stamper.var_indices[col_position]
+            components.append((stamper.eqn_indices[row_position], col_index, output_index, term))
+
+        return components
+
+#Layouts only depend on which indices of a stamper are SKIP, so nearly all stampers of a segment share one.
+def get_stamp_layout(segment: LagrangeSegment, is_dual, optimization_enabled, var_indices, eqn_indices):
+    var_skipped = tuple([index == SKIP for index in var_indices])
+    eqn_skipped = var_skipped if eqn_indices is var_indices else tuple([index == SKIP for index in eqn_indices])
+
+    key = (is_dual, optimization_enabled, var_skipped, eqn_skipped)
+    if not key in segment.stamp_layouts:
+        segment.stamp_layouts[key] = StampLayout(segment, is_dual, optimization_enabled, var_skipped, eqn_skipped)
+
+    return segment.stamp_layouts[key]
+
+#The position (in segment.variables) of the index used as the matrix row of variable's derivative.
+def get_row_position(segment: LagrangeSegment, variable, optimization_enabled):
+    if optimization_enabled:
+        return segment.variables.index(variable)
+    else:
+        #For the optimization disabled case, we can't use the dual variable's index
+        #for the matrix row. Instead, we commandeer the index of it's corresponding primal variable.
+        return segment.duals.index(variable)
@@ -0,0 +1,298 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from scipy.sparse import csc_matrix
+from scipy.sparse.linalg import spsolve, splu
+from logic.graphanalyzer import get_network_islands
+from logic.powerflowsettings import PowerFlowSettings
+
+#When reusing stale factors, each iteration must shrink the error by at least this ratio to keep them.
+CONTRACTION_RATIO = 0.5
+
+#After a low-rank update, the updated factors are kept for at most this many iterations (while contractive).
+UPDATED_FACTOR_REUSE_ITERATIONS = 10
+
+#Updates touching more columns than this are cheaper to handle with a fresh factorization.
+MAX_UPDATE_RANK = 50
+
+LINEAR_SOLVER_SPSOLVE = "spsolve"
+LINEAR_SOLVER_SPLU = "splu"
+
+def create_linear_solver(settings: PowerFlowSettings):
+    if settings.linear_solver == LINEAR_SOLVER_SPSOLVE:
+        return SpsolveLinearSolver(settings)
+    elif settings.linear_solver == LINEAR_SOLVER_SPLU:
+        return SparseLULinearSolver(settings)
+    else:
+        raise Exception(f"Unknown linear solver {settings.linear_solver}")
+
+#Reference solver, redoes the ordering, symbolic and numeric factorization on every call.
+class SpsolveLinearSolver:
+    def __init__(self, settings: PowerFlowSettings) -> None:
+        self.settings = settings
+        self.factorization_count = 0
+
+    def reset(self):
+        pass
+
+    def solve(self, Y, J, v_previous):
+        self.factorization_count += 1
+        return spsolve(Y, J)
+
+    def report_error(self, err_max):
+        pass
+
+    def update_factors(self, delta):
+        pass
+
+    #spsolve does not keep its factors.
+    def get_factor_nnz(self):
+        return None
+
+#SuperLU based solver. The fill-reducing column ordering is computed once per sparsity pattern and
+#reused for every later factorization. Optionally, the numeric factors are kept for several iterations
+#(chord or "dishonest" Newton) for as long as the iterations stay contractive.
+#
+#Small changes to the matrix (a capacitor switching, say) can be folded into existing factors with a
+#Sherman-Morrison-Woodbury correction instead of a new factorization, see update_factors.
+class SparseLULinearSolver:
+    def __init__(self, settings: PowerFlowSettings) -> None:
+        self.settings = settings
+
+        self.column_order = None
+        self._indptr = None
+        self._indices = None
+
+        self.lu = None
+        self.lu_is_permuted = False
+        self.reuse_count = 0
+        self.last_error = None
+
+        #Low-rank correction on top of lu: the updated matrix is A + U E^T, where E selects update_columns.
+        self.update_delta = None
+        self.update_columns = None
+        self.update_Z = None
+        self.update_capacitance = None
+
+        self.factorization_count = 0
+        self.reused_solve_count = 0
+        self.low_rank_update_count = 0
+
+    #Numeric factors are only valid for a single NR run, unless they were explicitly updated for the next
+    #one with update_factors. The ordering survives as long as the pattern does.
+    def reset(self):
+        if self.update_columns is None:
+            self.lu = None
+        self.reuse_count = 0
+        self.last_error = None
+
+    def solve(self, Y, J, v_previous):
+        if self.__can_reuse_factors():
+            self.reuse_count += 1
+            self.reused_solve_count += 1
+            #Chord step on the Newton equations Y(v) v = J(v), using the factors of an older Y.
+            residual = J - Y @ v_previous
+            return v_previous + self.__solve_factors(residual)
+
+        try:
+            self.__factorize(Y)
+        except RuntimeError:
+            #Mirror spsolve, which returns NaNs for a singular matrix.
+            self.lu = None
+            return np.full(len(J), np.nan)
+
+        return self.__solve_factors(J)
+
+    def report_error(self, err_max):
+        if self.last_error is not None and err_max > CONTRACTION_RATIO * self.last_error:
+            #Not contractive enough, force a fresh factorization on the next iteration.
+            self.reuse_count = self.__get_reuse_limit()
+        self.last_error = err_max
+
+    #Folds a sparse change of the matrix (delta = Y_new - Y_old) into the current factors, so the next
+    #NR run can start with chord steps instead of a fresh factorization.
+    def update_factors(self, delta):
+        if self.lu is None:
+            return
+
+        if self.update_delta is not None:
+            delta = self.update_delta + delta
+
+        delta = csc_matrix(delta)
+        delta.eliminate_zeros()
+
+        columns = np.flatnonzero(np.diff(delta.indptr))
+        if len(columns) == 0:
+            self.__clear_update()
+            return
+        elif len(columns) > MAX_UPDATE_RANK:
+            self.lu = None
+            self.__clear_update()
+            return
+
+        U = delta[:, columns].toarray()
+        Z = self.__solve_base(U)
+        capacitance = np.eye(len(columns)) + Z[columns, :]
+
+        if not np.isfinite(capacitance).all() or np.linalg.cond(capacitance) > 1 / np.finfo(float).eps:
+            self.lu = None
+            self.__clear_update()
+            return
+
+        self.update_delta = delta
+        self.update_columns = columns
+        self.update_Z = Z
+        self.update_capacitance = capacitance
+        self.low_rank_update_count += 1
+
+    #Nonzeros in the current L and U factors, which less the nonzeros of Y is the fill-in.
+    def get_factor_nnz(self):
+        if self.lu is None:
+            return None
+
+        return self.lu.L.nnz + self.lu.U.nnz
+
+    def __clear_update(self):
+        self.update_delta = None
+        self.update_columns = None
+        self.update_Z = None
+        self.update_capacitance = None
+
+    def __get_reuse_limit(self):
+        if self.update_columns is None:
+            return self.settings.factor_reuse_iterations
+
+        return max(self.settings.factor_reuse_iterations, UPDATED_FACTOR_REUSE_ITERATIONS)
+
+    def __can_reuse_factors(self):
+        return self.lu is not None and self.reuse_count < self.__get_reuse_limit()
+
+    def __factorize(self, Y):
+        self.factorization_count += 1
+        self.reuse_count = 0
+        self.__clear_update()
+
+        if self.column_order is None or not self.__is_same_pattern(Y):
+            self.lu = splu(Y)
+            self.lu_is_permuted = False
+            #perm_c maps each original column to its position, invert it to get the column order.
+            self.column_order = np.argsort(self.lu.perm_c)
+            self._indptr = Y.indptr
+            self._indices = Y.indices
+            return
+
+        #Skip the column ordering by handing SuperLU a pre-permuted matrix.
+        self.lu = splu(Y[:, self.column_order], permc_spec="NATURAL")
+        self.lu_is_permuted = True
+
+    def __solve_factors(self, b):
+        x = self.__solve_base(b)
+        if self.update_columns is None:
+            return x
+
+        #Sherman-Morrison-Woodbury: (A + U E^T)^-1 b = x - Z (I + E^T Z)^-1 E^T x, with x = A^-1 b and Z = A^-1 U.
+        return x - self.update_Z @ np.linalg.solve(self.update_capacitance, x[self.update_columns])
+
+    def __solve_base(self, b):
+        y = self.lu.solve(b)
+        if not self.lu_is_permuted:
+            return y
+
+        x = np.empty_like(y)
+        x[self.column_order] = y
+        return x
+
+    def __is_same_pattern(self, Y):
+        if Y.indptr is self._indptr and Y.indices is self._indices:
+            return True
+
+        return np.array_equal(Y.indptr, self._indptr) and np.array_equal(Y.indices, self._indices)
+
+
+#Solves the matrix of a network split into several islands as independent sub-problems, one inner solver
+#(see create_linear_solver) per energized block, on a thread pool.
+#
+#The unknowns of de-energized islands are not solved: they keep their previous values during the NR
+#iterations, and PowerFlow sets them to zero once the solve completes.
+class IslandLinearSolver:
+    def __init__(self, settings: PowerFlowSettings, network) -> None:
+        self.settings = settings
+        self.network = network
+        #The topology the blocks were partitioned for.
+        self.topology_key = None
+
+        self._indptr = None
+        self._indices = None
+
+        self.block_indices = []
+        self.block_solvers = []
+        self.executor = None
+
+    @property
+    def factorization_count(self):
+        return sum(solver.factorization_count for solver in self.block_solvers)
+
+    def reset(self):
+        for solver in self.block_solvers:
+            solver.reset()
+
+    def solve(self, Y, J, v_previous):
+        Y = csc_matrix(Y)
+        #The islands are fetched on every solve, as device control (a blown fuse) can change them.
+        islands = get_network_islands(self.network)
+        if islands.topology_key != self.topology_key or not self.__is_same_pattern(Y):
+            self.__partition(Y, islands)
+
+        blocks = list(zip(self.block_solvers, self.block_indices))
+        solve_block = lambda block: block[0].solve(Y[block[1], :][:, block[1]], J[block[1]], v_previous[block[1]])
+
+        if self.executor is None:
+            block_solutions = map(solve_block, blocks)
+        else:
+            block_solutions = self.executor.map(solve_block, blocks)
+
+        v_next = np.copy(v_previous)
+        for (indices, solution) in zip(self.block_indices, block_solutions):
+            v_next[indices] = solution
+
+        return v_next
+
+    def report_error(self, err_max):
+        for solver in self.block_solvers:
+            solver.report_error(err_max)
+
+    #Changes that connect two blocks alter the pattern, so the next solve partitions the matrix again.
+    def update_factors(self, delta):
+        delta = csc_matrix(delta)
+        for (solver, indices) in zip(self.block_solvers, self.block_indices):
+            solver.update_factors(delta[indices, :][:, indices])
+
+    def get_factor_nnz(self):
+        block_nnz = [solver.get_factor_nnz() for solver in self.block_solvers]
+        if len(block_nnz) == 0 or None in block_nnz:
+            return None
+
+        return sum(block_nnz)
+
+    def __partition(self, Y, islands):
+        self.topology_key = islands.topology_key
+        self.block_indices = islands.partition_matrix(self.network, Y)
+        self.block_solvers = [create_linear_solver(self.settings) for _ in self.block_indices]
+        self._indptr = Y.indptr
+        self._indices = Y.indices
+
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+        if len(self.block_indices) > 1:
+            self.executor = ThreadPoolExecutor(max_workers=min(len(self.block_indices), os.cpu_count() or 1))
+
+    def __is_same_pattern(self, Y):
+        if self._indptr is None:
+            return False
+
+        if Y.indptr is self._indptr and Y.indices is self._indices:
+            return True
+
+        return np.array_equal(Y.indptr, self._indptr) and np.array_equal(Y.indices, self._indices)
@@ -0,0 +1,223 @@
+import numpy as np
+from collections import defaultdict
+from scipy.sparse import csc_matrix
+from logic.matrixbuilder import MatrixBuilder
+
+#tx_factor values used to find out how an element's stamps depend on the homotopy factor.
+TX_PROBES = [0, 1, 0.5]
+
+#Relative tolerance when deciding whether a stamp value is affine in tx_factor.
+AFFINE_RTOL = 1E-12
+
+#Records stamps exactly as they were issued, including zero values.
+class StampRecorder:
+    def __init__(self) -> None:
+        self.batch = None
+        self.rows = []
+        self.cols = []
+        self.vals = []
+        self.J = defaultdict(float)
+
+    def stamp(self, row, column, value):
+        self.rows.append(row)
+        self.cols.append(column)
+        self.vals.append(value)
+
+#The linear stamps of one element (or of the linear optimization block), as value = base + tx_factor * slope.
+#When the stamps are not affine in tx_factor, is_affine is False and the element is stamped directly.
+class ElementStamps:
+    def __init__(self, recordings) -> None:
+        first = recordings[0]
+
+        self.y_rows = np.array(first.rows, dtype=np.int64)
+        self.y_cols = np.array(first.cols, dtype=np.int64)
+        self.j_rows = np.array(list(first.J.keys()), dtype=np.int64)
+
+        self.is_affine = True
+        for recording in recordings[1:]:
+            if recording.rows != first.rows or recording.cols != first.cols or recording.J.keys() != first.J.keys():
+                self.is_affine = False
+                return
+
+        y_values = [np.array(recording.vals, dtype=np.float64) for recording in recordings]
+        j_values = [np.array(list(recording.J.values()), dtype=np.float64) for recording in recordings]
+
+        self.y_base, self.y_slope = self.__fit(y_values)
+        self.j_base, self.j_slope = self.__fit(j_values)
+
+        if self.y_base is None or self.j_base is None:
+            self.is_affine = False
+
+    #Fits the probed values with base + tx * slope, and checks the fit against the remaining probes.
+    def __fit(self, values):
+        base = values[0]
+        slope = values[1] - values[0]
+
+        for (tx_factor, probed) in zip(TX_PROBES[2:], values[2:]):
+            expected = base + tx_factor * slope
+            scale = np.maximum(np.abs(base), np.abs(values[1]))
+            if not np.all(np.abs(probed - expected) <= AFFINE_RTOL * scale):
+                return (None, None)
+
+        return (base, slope)
+
+#Caches the NR-invariant stamps of a network between calls to NRSolver.run_powerflow.
+#
+#The cache is only built on the second stamping pass of a matrix layout, so a single NR solve pays nothing
+#for it. Each element is evaluated a handful of times when the cache is built, to split its stamps into a
+#tx-independent part and a tx-dependent part. After that, stamping the linear block for any tx_factor
+#is an array affine combination. Elements whose stamps are not affine in tx_factor (phase shifting
+#transformers, for instance) are still stamped element by element. Elements that change state, e.g.
+#a capacitor switching, must be invalidated so they are evaluated again.
+class LinearStampCache:
+    def __init__(self, network) -> None:
+        self.network = network
+
+        self.version = None
+        self.optimization_enabled = None
+        self.seen_version = None
+        self.stampers = {}
+        self.element_stamps = {}
+        self.invalid_elements = set()
+
+    def invalidate(self, element = None):
+        if element is None:
+            self.version = None
+            self.seen_version = None
+        else:
+            self.invalid_elements.add(element)
+
+    def stamp(self, Y: MatrixBuilder, J, tx_factor):
+        if not self.__try_refresh():
+            for element in self.network.get_NR_invariant_elements():
+                self.__create_element_stamper(element)(Y, J, tx_factor)
+            if self.network.optimization != None and self.network.optimization.is_linear:
+                self.network.optimization.stamp(Y, J, None, tx_factor, self.network)
+            return
+
+        if len(self.const_y_rows) > 0:
+            Y.stamp_block(self.const_y_rows, self.const_y_cols, self.const_y_values)
+
+        if len(self.tx_y_rows) > 0:
+            Y.stamp_block(self.tx_y_rows, self.tx_y_cols, self.tx_y_base + tx_factor * self.tx_y_slope)
+
+        np.add.at(J, self.j_rows, self.j_base + tx_factor * self.j_slope)
+
+        for key in self.direct_elements:
+            self.stampers[key](Y, J, tx_factor)
+
+    #Returns False when the stamps should be evaluated directly for this pass.
+    def __try_refresh(self):
+        optimization_enabled = self.network.optimization != None
+        if self.version != self.network.matrix_version or self.optimization_enabled != optimization_enabled:
+            if self.seen_version != (self.network.matrix_version, optimization_enabled):
+                self.seen_version = (self.network.matrix_version, optimization_enabled)
+                return False
+
+            self.__build()
+            return True
+
+        if len(self.invalid_elements) > 0:
+            for element in self.invalid_elements:
+                if element in self.stampers:
+                    self.element_stamps[element] = self.__probe(self.stampers[element])
+            self.invalid_elements.clear()
+            self.__assemble()
+
+        return True
+
+    def __build(self):
+        network = self.network
+
+        self.stampers = {}
+        for element in network.get_NR_invariant_elements():
+            self.stampers[element] = self.__create_element_stamper(element)
+
+        if network.optimization != None and network.optimization.is_linear:
+            optimization = network.optimization
+            self.stampers[optimization] = lambda Y, J, tx_factor: optimization.stamp(Y, J, None, tx_factor, network)
+
+        self.element_stamps = {}
+        for (key, stamper) in self.stampers.items():
+            self.element_stamps[key] = self.__probe(stamper)
+
+        self.version = network.matrix_version
+        self.optimization_enabled = network.optimization != None
+        self.invalid_elements.clear()
+        self.__assemble()
+
+    def __create_element_stamper(self, element):
+        return lambda Y, J, tx_factor: stamp_element(element, self.network, Y, J, tx_factor)
+
+    def __probe(self, stamper):
+        recordings = []
+        for tx_factor in TX_PROBES:
+            recorder = StampRecorder()
+            stamper(recorder, recorder.J, tx_factor)
+            recordings.append(recorder)
+
+        return ElementStamps(recordings)
+
+    #Concatenates the per-element stamps (in element order) into the tx-independent and tx-dependent blocks.
+    def __assemble(self):
+        y_rows, y_cols, y_base, y_slope = [], [], [], []
+        j_rows, j_base, j_slope = [], [], []
+        self.direct_elements = []
+
+        for (key, stamps) in self.element_stamps.items():
+            if not stamps.is_affine:
+                self.direct_elements.append(key)
+                continue
+
+            y_rows.append(stamps.y_rows)
+            y_cols.append(stamps.y_cols)
+            y_base.append(stamps.y_base)
+            y_slope.append(stamps.y_slope)
+
+            j_rows.append(stamps.j_rows)
+            j_base.append(stamps.j_base)
+            j_slope.append(stamps.j_slope)
+
+        y_rows = concatenate(y_rows, np.int64)
+        y_cols = concatenate(y_cols, np.int64)
+        y_base = concatenate(y_base, np.float64)
+        y_slope = concatenate(y_slope, np.float64)
+
+        #Kept as lists, MatrixBuilder stores its entries in lists.
+        is_const = y_slope == 0
+        self.const_y_rows = y_rows[is_const].tolist()
+        self.const_y_cols = y_cols[is_const].tolist()
+        self.const_y_values = y_base[is_const].tolist()
+
+        self.tx_y_rows = y_rows[~is_const].tolist()
+        self.tx_y_cols = y_cols[~is_const].tolist()
+        self.tx_y_base = y_base[~is_const]
+        self.tx_y_slope = y_slope[~is_const]
+
+        self.j_rows = concatenate(j_rows, np.int64)
+        self.j_base = concatenate(j_base, np.float64)
+        self.j_slope = concatenate(j_slope, np.float64)
+
+def stamp_element(element, network, Y, J, tx_factor):
+    element.stamp_primal(Y, J, None, tx_factor, network)
+    if network.optimization != None:
+        element.stamp_dual(Y, J, None, tx_factor, network)
+
+def record_element_stamps(element, network, tx_factor):
+    recorder = StampRecorder()
+    stamp_element(element, network, recorder, recorder.J, tx_factor)
+    return recorder
+
+#The change of the matrix between two recordings of the same element, as a sparse matrix.
+def build_stamp_delta(before: StampRecorder, after: StampRecorder, size):
+    rows = before.rows + after.rows
+    cols = before.cols + after.cols
+    values = [-value for value in before.vals] + after.vals
+
+    return csc_matrix((values, (rows, cols)), shape=(size, size), dtype=np.float64)
+
+def concatenate(arrays, dtype):
+    if len(arrays) == 0:
+        return np.zeros(0, dtype=dtype)
+
+    return np.concatenate(arrays).astype(dtype, copy=False)
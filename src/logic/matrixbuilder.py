@@ -1,7 +1,6 @@
 import math
 from scipy.sparse import csc_matrix
 import numpy as np
-from sympy import Matrix
 from logic.powerflowsettings import PowerFlowSettings
 
 class MatrixBuilder:
@@ -13,8 +12,19 @@ class MatrixBuilder:
         self._index = 0
         self._max_index = 0
 
+        #When reusing the sparsity pattern, zeros are stamped as well so that the sequence of
+        #(row, column) entries stays identical between NR iterations.
+        self._reuse_pattern = settings.reuse_matrix_pattern
+        self._pattern_valid = False
+        self._pattern_size = 0
+        self._pattern_slots = None
+        self._pattern_matrix = None
+
+        #Optional BatchStamper. When set, LagrangeStampers queue themselves instead of stamping directly.
+        self.batch = None
+
     def stamp(self, row, column, value):
-        if value == 0:
+        if value == 0 and not self._reuse_pattern:
             return
 
         if self.settings.debug:
@@ -31,13 +41,47 @@ class MatrixBuilder:
             self._val.append(value)
             self._index += 1
             self._max_index += 1
+            self._pattern_valid = False
             return
 
+        if self._row[self._index] != row or self._col[self._index] != column:
+            self._pattern_valid = False
+
         self._row[self._index] = row
         self._col[self._index] = column
         self._val[self._index] = value
         self._index += 1
         
+    def stamp_block(self, rows, columns, values):
+        if self.settings.debug and np.isnan(values).any():
+            raise Exception("Invalid value")
+
+        #Callers that stamp the same block repeatedly can pass plain lists to skip the conversion.
+        if isinstance(rows, np.ndarray):
+            rows = rows.tolist()
+        if isinstance(columns, np.ndarray):
+            columns = columns.tolist()
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+
+        start = self._index
+        end = start + len(rows)
+
+        if end > self._max_index:
+            padding = [0] * (end - self._max_index)
+            self._row += padding
+            self._col += padding
+            self._val += padding
+            self._max_index = end
+            self._pattern_valid = False
+        elif self._row[start:end] != rows or self._col[start:end] != columns:
+            self._pattern_valid = False
+
+        self._row[start:end] = rows
+        self._col[start:end] = columns
+        self._val[start:end] = values
+        self._index = end
+
     def clear(self, retain_idx = 0):
         self._index = retain_idx
 
@@ -45,7 +89,48 @@ class MatrixBuilder:
         if self.settings.debug and self._max_index != self._index:
             raise Exception("Solver was not fully utilized. Garbage data remains")
 
-        return csc_matrix((self._val, (self._row, self._col)), dtype=np.float64)
+        if not self._reuse_pattern:
+            return csc_matrix((self._val, (self._row, self._col)), dtype=np.float64)
+
+        if not self._pattern_valid or self._pattern_size != self._index:
+            self.__build_pattern()
+
+        values = self._val if self._index == self._max_index else self._val[:self._index]
+
+        #Duplicate entries are summed straight into the preallocated CSC data array.
+        matrix = self._pattern_matrix
+        matrix.data[:] = np.bincount(self._pattern_slots, weights=values, minlength=len(matrix.data))
+        return matrix
+
+    #Computes the COO->CSC mapping once. Every stamp is assigned the slot of the CSC data array it sums into.
+    def __build_pattern(self):
+        rows = np.asarray(self._row[:self._index], dtype=np.int64)
+        cols = np.asarray(self._col[:self._index], dtype=np.int64)
+
+        shape = (int(rows.max()) + 1, int(cols.max()) + 1)
+
+        #Sorting by (column, row) gives the canonical CSC ordering.
+        keys = cols * shape[0] + rows
+        unique_keys, slots = np.unique(keys, return_inverse=True)
+
+        indices = (unique_keys % shape[0]).astype(np.int32)
+        indptr = np.zeros(shape[1] + 1, dtype=np.int32)
+        np.cumsum(np.bincount(unique_keys // shape[0], minlength=shape[1]), out=indptr[1:])
+
+        data = np.zeros(len(unique_keys), dtype=np.float64)
+
+        self._pattern_matrix = csc_matrix((data, indices, indptr), shape=shape)
+        self._pattern_slots = slots
+        self._pattern_size = self._index
+        self._pattern_valid = True
+
+    #Returns Y @ x for the stamped entries, without assembling the matrix.
+    def multiply(self, x, size):
+        rows = np.asarray(self._row[:self._index], dtype=np.int64)
+        cols = np.asarray(self._col[:self._index], dtype=np.int64)
+        values = np.asarray(self._val[:self._index], dtype=np.float64)
+
+        return np.bincount(rows, weights=values * x[cols], minlength=size)
 
     def get_row(self, row_idx):
         for idx in range(self._index):
@@ -60,6 +145,8 @@ class MatrixBuilder:
                 yield (self._row[idx], self._val[idx])
 
     def to_symbolic_matrix(self):
+        from sympy import Matrix
+
         rows = []
         for _ in range(max(self._row) + 1):
             rows.append([0] * (max(self._col) + 1))
@@ -78,6 +165,7 @@ class MatrixBuilder:
             return
 
         matrix = csc_matrix((self._val, (self._row, self._col)))
+        matrix.eliminate_zeros()
 
         if not np.all(matrix.getnnz(1)>0):
             zero_rows = np.where(matrix.getnnz(1)==0)
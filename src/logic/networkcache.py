@@ -0,0 +1,126 @@
+import hashlib
+import os
+import pickle
+import zlib
+from ditto.readers.gridlabd.glm_parser import resolve_include
+from logic.cachedirectory import ensure_private_dir, get_default_cache_dir
+
+#Increment when the layout of the cache entries changes. Changes to the parsers and the network model classes
+#are picked up by the source digest of SOURCE_PATHS instead.
+NETWORK_CACHE_VERSION = 5
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#The modules that parse the input files or define the classes of the cached networks, relative to SRC_DIR.
+SOURCE_PATHS = [
+    "logic/networkloader.py",
+    "logic/networkmodel.py",
+    "logic/parsers",
+    "models",
+    "ditto/models",
+    "ditto/readers/gridlabd",
+    "ditto/store.py"
+]
+
+#Keeps the parsed networks of input files on disk, so loading the same file again skips parsing.
+#
+#Entries are keyed by a hash of the input file, every file it #includes, the parser used, the cache
+#version and the source of the parsers and model classes, so editing any of them misses the cache. The network is stored before node assignment: the
+#stampers created by assign_matrix hold lambdified functions, which can't be pickled, and are rebuilt from
+#the (cached) derivatives when the network is assigned.
+#
+#The cache directory defaults to a per-user one, see logic.cachedirectory, and is refused if other users
+#could write to it.
+class NetworkCache:
+    def __init__(self, cache_dir = None) -> None:
+        if cache_dir is None:
+            cache_dir = get_default_cache_dir("networks")
+
+        self.cache_dir = cache_dir
+        ensure_private_dir(self.cache_dir)
+
+    def get_key(self, network_file, parser_name):
+        sha256 = hashlib.sha256()
+        sha256.update(f"{NETWORK_CACHE_VERSION},{parser_name},{get_source_digest()}".encode('utf8'))
+
+        for path in get_input_files(network_file):
+            with open(path, "rb") as f:
+                sha256.update(f.read())
+
+        return sha256.hexdigest()
+
+    def load(self, key):
+        cache_file = self.__get_cache_file(key)
+        if not os.path.isfile(cache_file):
+            return None
+
+        try:
+            with open(cache_file, "rb") as f:
+                return pickle.loads(zlib.decompress(f.read()))
+        except Exception:
+            #A corrupt or incompatible entry is treated as a miss, and replaced by the next store.
+            return None
+
+    def store(self, key, network):
+        data = zlib.compress(pickle.dumps(network, protocol=pickle.HIGHEST_PROTOCOL))
+
+        #Write to a temporary file first, so concurrent loads never see a partially written entry.
+        cache_file = self.__get_cache_file(key)
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(temp_file, "wb") as f:
+            f.write(data)
+        os.replace(temp_file, cache_file)
+
+    def __get_cache_file(self, key):
+        return os.path.join(self.cache_dir, f"{key}.network")
+
+_source_digest = None
+
+#Hash of the source of SOURCE_PATHS, computed once per process.
+def get_source_digest():
+    global _source_digest
+    if _source_digest is None:
+        _source_digest = hash_sources(SRC_DIR, SOURCE_PATHS)
+    return _source_digest
+
+#Hash of the python files at paths (files or directories, relative to root), and of their names.
+def hash_sources(root, paths):
+    sha256 = hashlib.sha256()
+
+    for path in paths:
+        full_path = os.path.join(root, path)
+        if os.path.isdir(full_path):
+            files = []
+            for (dir_path, dir_names, file_names) in os.walk(full_path):
+                dir_names.sort()
+                files += [os.path.join(dir_path, name) for name in sorted(file_names) if name.endswith(".py")]
+        else:
+            files = [full_path]
+
+        for file_path in files:
+            sha256.update(os.path.relpath(file_path, root).encode('utf8'))
+            with open(file_path, "rb") as f:
+                sha256.update(f.read())
+
+    return sha256.hexdigest()
+
+#Returns the input file followed by the files it includes, recursively, in include order.
+def get_input_files(network_file, visited = None):
+    visited = [] if visited is None else visited
+
+    network_file = os.path.abspath(network_file)
+    if network_file in visited:
+        return visited
+    visited.append(network_file)
+
+    if not network_file.endswith(".glm"):
+        return visited
+
+    with open(network_file, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("#include"):
+                location = line[len("#include"):].strip().strip('";')
+                get_input_files(resolve_include(location, network_file), visited)
+
+    return visited
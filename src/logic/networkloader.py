@@ -1,12 +1,18 @@
+import logging
 import os
 from logic.networkmodel import NetworkModel, TxNetworkModel
 from logic.parsers.raw.parser import parse_raw
 from logic.powerflowsettings import PowerFlowSettings
+from logic.profiler import PHASE_PARSE
 from logic.parsers.threephase.threephaseparser import ThreePhaseParser
+from logic.parsers.threephase.directparser import DirectThreePhaseParser, GLM_PARSER_DIRECT
+from logic.networkcache import NetworkCache
 from models.optimization.L2infeasibility import L2InfeasibilityCurrent, L2InfeasibilityOptimization
 import urllib.request
 import tempfile
 
+logger = logging.getLogger(__name__)
+
 def pull_network_file(network_uri: str):
     #If it's a local file, we're all good.
     if os.path.isfile(network_uri):
@@ -39,22 +45,46 @@ class NetworkLoader:
         self.settings = settings
         
     def from_file(self, network_uri: str) -> NetworkModel:
-        print(f"Loading network file: {network_uri}")
+        logger.info("Loading network file: %s", network_uri)
         network_file = pull_network_file(network_uri)
 
+        with self.settings.profiler.section(PHASE_PARSE):
+            if self.settings.network_cache:
+                network = self.__load_cached_network(network_file)
+            else:
+                network = self.__parse_network(network_file)
+
+            network.optimization = self.__load_optimization(network)
+
+        return network
+
+    def __parse_network(self, network_file: str):
         if ".glm" in network_file:
-            network = self.__parse_glm_network(network_file)
+            return self.__parse_glm_network(network_file)
         elif ".RAW" in network_file:
-            network =  self.__parse_RAW_network(network_file)
+            return self.__parse_RAW_network(network_file)
         else:
             raise Exception("Unknown network file format")
 
-        network.optimization = self.__load_optimization(network)
+    def __load_cached_network(self, network_file: str):
+        cache = NetworkCache(self.settings.network_cache_dir)
+        key = cache.get_key(network_file, self.settings.glm_parser)
+
+        network = cache.load(key)
+        if network is not None:
+            logger.info("Loaded parsed network from cache")
+            return network
+
+        network = self.__parse_network(network_file)
+        cache.store(key, network)
 
         return network
 
     def __parse_glm_network(self, network_file: str):
-        parser = ThreePhaseParser(network_file, self.settings)
+        if self.settings.glm_parser == GLM_PARSER_DIRECT:
+            parser = DirectThreePhaseParser(network_file, self.settings)
+        else:
+            parser = ThreePhaseParser(network_file, self.settings)
 
         network = parser.parse()
 
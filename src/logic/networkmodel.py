@@ -6,6 +6,7 @@ import numpy as np
 from logic.powerflowsettings import PowerFlowSettings
 from models.singlephase.generator import Generator
 from models.singlephase.bus import Bus
+from models.singlephase.fuse import FuseStatus
 from models.singlephase.load import Load
 from models.singlephase.slack import Slack
 from models.singlephase.transformer import Transformer
@@ -42,6 +43,11 @@ class NetworkModel():
 
         self.size_Y = None
         self.matrix_version = -1
+        self.result_indices = None
+        self._matrix_map = None
+
+        #Connected components of the bus graph, see graphanalyzer.get_network_islands.
+        self.islands = None
 
     def display(self):
         nodeset = set()
@@ -56,6 +62,10 @@ class NetworkModel():
         print(f"Lines: {len(self.lines)}")
         print(f"Loads: {len(loadset)} ({len(self.loads)} phase loads)")
 
+    #Changes whenever an element connecting two buses is switched in or out.
+    def get_topology_key(self):
+        return (len(self.buses),) + tuple(switch.status == SwitchStatus.CLOSED for switch in self.switches)
+
     def assign_matrix(self, optimization_enabled):
         node_index = count(0)
 
@@ -67,39 +77,57 @@ class NetworkModel():
 
         self.size_Y = next(node_index)
 
-        self.matrix_map = {}
+        self._matrix_map = None
+        self.matrix_version += 1
+
+    #Labels of the matrix indices, as {index: label}, for dumps and diagnostics. Built on first use, as most
+    #solves never need it.
+    @property
+    def matrix_map(self):
+        if self._matrix_map is None:
+            self._matrix_map = dict(self.iterate_matrix_labels())
+
+        return self._matrix_map
+
+    #The label of a single index, or None. Doesn't build the full matrix_map.
+    def get_matrix_label(self, index):
+        for (label_index, label) in self.iterate_matrix_labels():
+            if label_index == index:
+                return label
+
+        return None
+
+    def iterate_matrix_labels(self):
         for bus in self.buses:
-            self.matrix_map[bus.node_Vr] = f"bus:{bus.NodeName}:{bus.NodePhase}:Vr"
-            self.matrix_map[bus.node_Vi] = f"bus:{bus.NodeName}:{bus.NodePhase}:Vi"
+            yield (bus.node_Vr, f"bus:{bus.NodeName}:{bus.NodePhase}:Vr")
+            yield (bus.node_Vi, f"bus:{bus.NodeName}:{bus.NodePhase}:Vi")
 
         for slack in self.slack:
-            self.matrix_map[slack.slack_Ir] = f"slack:{slack.bus.NodeName}:{slack.bus.NodePhase}:Ir"
-            self.matrix_map[slack.slack_Ii] = f"slack:{slack.bus.NodeName}:{slack.bus.NodePhase}:Ii"
+            yield (slack.slack_Ir, f"slack:{slack.bus.NodeName}:{slack.bus.NodePhase}:Ir")
+            yield (slack.slack_Ii, f"slack:{slack.bus.NodeName}:{slack.bus.NodePhase}:Ii")
 
         for xfmr in self.transformers:
             if isinstance(xfmr, CenterTapTransformer):
-                self.matrix_map[xfmr.node_L1_Ir] = f"xfmr-ct:{xfmr.coils[0].from_node.NodeName}:{xfmr.coils[0].from_node.NodePhase}:L1_Ir"
-                self.matrix_map[xfmr.node_L1_Ii] = f"xfmr-ct:{xfmr.coils[0].from_node.NodeName}:{xfmr.coils[0].from_node.NodePhase}:L1-Ii"
-                self.matrix_map[xfmr.node_L2_Ir] = f"xfmr-ct:{xfmr.coils[0].from_node.NodeName}:{xfmr.coils[0].from_node.NodePhase}:L2-Ir"
-                self.matrix_map[xfmr.node_L2_Ii] = f"xfmr-ct:{xfmr.coils[0].from_node.NodeName}:{xfmr.coils[0].from_node.NodePhase}:L2-Ii"
+                yield (xfmr.node_L1_Ir, f"xfmr-ct:{xfmr.coils[0].from_node.NodeName}:{xfmr.coils[0].from_node.NodePhase}:L1_Ir")
+                yield (xfmr.node_L1_Ii, f"xfmr-ct:{xfmr.coils[0].from_node.NodeName}:{xfmr.coils[0].from_node.NodePhase}:L1-Ii")
+                yield (xfmr.node_L2_Ir, f"xfmr-ct:{xfmr.coils[0].from_node.NodeName}:{xfmr.coils[0].from_node.NodePhase}:L2-Ir")
+                yield (xfmr.node_L2_Ii, f"xfmr-ct:{xfmr.coils[0].from_node.NodeName}:{xfmr.coils[0].from_node.NodePhase}:L2-Ii")
             else:
-                self.matrix_map[xfmr.node_primary_Ir] = f"xfmr:{xfmr.from_bus_pos.NodeName}:{xfmr.from_bus_pos.NodePhase}:Ir-pri"
-                self.matrix_map[xfmr.node_primary_Ii] = f"xfmr:{xfmr.from_bus_pos.NodeName}:{xfmr.from_bus_pos.NodePhase}:Ii-pri"
-                self.matrix_map[xfmr.node_secondary_Vr] = f"xfmr:{xfmr.from_bus_pos.NodeName}:{xfmr.from_bus_pos.NodePhase}:Vr-sec"
-                self.matrix_map[xfmr.node_secondary_Vi] = f"xfmr:{xfmr.from_bus_pos.NodeName}:{xfmr.from_bus_pos.NodePhase}:Vi-sec"
+                yield (xfmr.node_primary_Ir, f"xfmr:{xfmr.from_bus_pos.NodeName}:{xfmr.from_bus_pos.NodePhase}:Ir-pri")
+                yield (xfmr.node_primary_Ii, f"xfmr:{xfmr.from_bus_pos.NodeName}:{xfmr.from_bus_pos.NodePhase}:Ii-pri")
+                yield (xfmr.node_secondary_Vr, f"xfmr:{xfmr.from_bus_pos.NodeName}:{xfmr.from_bus_pos.NodePhase}:Vr-sec")
+                yield (xfmr.node_secondary_Vi, f"xfmr:{xfmr.from_bus_pos.NodeName}:{xfmr.from_bus_pos.NodePhase}:Vi-sec")
 
         for switch in self.switches:
             if switch.status == SwitchStatus.OPEN:
                 continue
 
-            self.matrix_map[switch.vs.Ir_index] = f"switch:{switch.from_node.NodeName}:{switch.to_node.NodePhase}:Ir"
-            self.matrix_map[switch.vs.Ii_index] = f"switch:{switch.from_node.NodeName}:{switch.to_node.NodePhase}:Ii"
+            yield (switch.vs.Ir_index, f"switch:{switch.from_node.NodeName}:{switch.to_node.NodePhase}:Ir")
+            yield (switch.vs.Ii_index, f"switch:{switch.from_node.NodeName}:{switch.to_node.NodePhase}:Ii")
 
         for load in self.loads:
-            self.matrix_map[load.node_Ir] = f"load:{load.from_bus.NodeName}:{load.from_bus.NodePhase}:Ir"
-            self.matrix_map[load.node_Ii] = f"load:{load.from_bus.NodeName}:{load.from_bus.NodePhase}:Ii"
-
-        self.matrix_version += 1
+            yield (load.node_Ir, f"load:{load.from_bus.NodeName}:{load.from_bus.NodePhase}:Ir")
+            yield (load.node_Ii, f"load:{load.from_bus.NodeName}:{load.from_bus.NodePhase}:Ii")
 
 
 class TxNetworkModel(NetworkModel):
@@ -125,6 +153,10 @@ class TxNetworkModel(NetworkModel):
         self.shunts = shunts
         self.voltage_sources = voltage_sources
 
+    def get_topology_key(self):
+        statuses = [bool(line.status) for line in self.lines] + [bool(transformer.status) for transformer in self.transformers]
+        return NetworkModel.get_topology_key(self) + tuple(statuses)
+
     def get_NR_invariant_elements(self):
         return self.lines + self.shunts + self.transformers + self.slack + self.switches + self.voltage_sources
 
@@ -193,6 +225,9 @@ class DxNetworkModel(NetworkModel):
         self.reference_r = None
         self.reference_i = None
     
+    def get_topology_key(self):
+        return NetworkModel.get_topology_key(self) + tuple(fuse.status == FuseStatus.GOOD for fuse in self.fuses)
+
     def get_NR_invariant_elements(self):
         return self.slack + self.lines + self.transformers + self.regulators + self.switches + self.fuses + self.capacitors
 
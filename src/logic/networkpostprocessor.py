@@ -1,12 +1,18 @@
 import math
+import multiprocessing
 import os
 import typing
+from concurrent.futures import ProcessPoolExecutor
+from logic.devicecontroller import get_device_states, set_device_states
+from logic.networkloader import NetworkLoader
 from logic.networkmodel import DxNetworkModel
 from pandas import read_csv
 
 from logic.postprocessingsettings import PostProcessingSettings
 from logic.powerflow import PowerFlow
 from logic.powerflowresults import PowerFlowResults, QuasiTimeSeriesResults
+from logic.powerflowsettings import PowerFlowSettings
+from logic.resultstore import ResultStoreWriter
 
 
 
@@ -72,24 +78,84 @@ class NetworkPostProcessor:
 
     # Run for multiple snapshots of load values
     def execute_quasi_time_series(self) -> QuasiTimeSeriesResults:
+        quasi_time_series_results = QuasiTimeSeriesResults()
+        for hour, snapshot_results in self.iterate_quasi_time_series():
+            quasi_time_series_results.add_powerflow_snapshot_results(hour, snapshot_results)
+
+        return quasi_time_series_results
+
+    # Streams every snapshot into a columnar result store, without keeping the results in memory
+    def write_quasi_time_series(self, storepath):
+        with ResultStoreWriter(storepath) as writer:
+            for hour, snapshot_results in self.iterate_quasi_time_series():
+                writer.append(hour, snapshot_results)
+
+    # Yields (hour, results) in hour order, as soon as each snapshot is available
+    def iterate_quasi_time_series(self) -> typing.Iterator[typing.Tuple[int, PowerFlowResults]]:
         if not os.path.isfile(self.settings.loadfile_name):
             raise Exception("Load file does not exist.")
-        
-        quasi_time_series_results = QuasiTimeSeriesResults()
+
+        hours = range(self.settings.loadfile_start, self.settings.loadfile_end)
+        if self.settings.workers > 1:
+            yield from self.iterate_quasi_time_series_parallel(hours)
+            return
+
         self.set_load_names(self.powerflow.network)
-        for hour in range(self.settings.loadfile_start, self.settings.loadfile_end):
+        v_init = None
+        snapshot_results = None
+        for hour in hours:
+            if snapshot_results is not None:
+                snapshot_results.detach(self.settings.calculate_residuals)
+
             self.set_load_values(self.powerflow.network, hour)
-            snapshot_results = self.execute_powerflow()
-            quasi_time_series_results.add_powerflow_snapshot_results(hour, snapshot_results)
+            snapshot_results = self.execute_powerflow(v_init)
+            # Consecutive hours are close, so each snapshot starts from the previous solution
+            v_init = snapshot_results.v_final if snapshot_results.is_success else None
+            yield (hour, snapshot_results)
 
-        return quasi_time_series_results
+    # The hours are split into contiguous chunks that are solved by a pool of worker processes. Each worker
+    # loads and assigns its own copy of the network once, and keeps its solver between chunks. Each chunk is
+    # seeded by solving the hour before it again, see QuasiTimeSeriesWorker.run.
+    def iterate_quasi_time_series_parallel(self, hours):
+        if self.settings.network_file is None:
+            raise Exception("Parallel quasi time series requires the network file (PostProcessingSettings.network_file)")
+
+        network = self.powerflow.network
+        settings = self.powerflow.settings
+        if network.size_Y is None:
+            network.assign_matrix(settings.infeasibility_analysis)
+
+        #The workers start from the device states of this network, which a serial run would continue on.
+        device_states = get_device_states(network)
+
+        chunk_size = self.settings.chunk_hours
+        chunks = [list(hours[idx:idx + chunk_size]) for idx in range(0, len(hours), chunk_size)]
+
+        #Forking avoids re-importing the calling script in every worker where it is available.
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+
+        with ProcessPoolExecutor(
+            max_workers=self.settings.workers, 
+            mp_context=context, 
+            initializer=initialize_quasi_time_series_worker, 
+            initargs=(self.settings, settings, device_states)
+            ) as executor:
+            for snapshots in executor.map(run_quasi_time_series_chunk, chunks):
+                for snapshot in snapshots:
+                    snapshot_results = snapshot.to_results(network, settings)
+                    if snapshot.residuals is None:
+                        snapshot_results.detach()
+                    yield (snapshot.hour, snapshot_results)
 
     # Wrapper for the PowerFlow.execute() method, with additional functionality for generator adjustment
-    def execute_powerflow(self) -> PowerFlowResults:
-        snapshot_results = self.powerflow.execute()
+    def execute_powerflow(self, v_init = None) -> PowerFlowResults:
+        snapshot_results = self.powerflow.execute(v_init)
         # If requested, adjust a specific negative load until the specified swing bus is within a threshold of zero power in/out
         while self.adjust_generator_output(self.powerflow.network, snapshot_results):
-            snapshot_results = self.powerflow.execute()
+            snapshot_results = self.powerflow.execute(snapshot_results.v_final if snapshot_results.is_success else None)
         return snapshot_results
 
     # Execute all applicable post-processing steps
@@ -101,4 +167,78 @@ class NetworkPostProcessor:
         else:
             return None
 
-    
\ No newline at end of file
+#The part of a snapshot's results that is sent back from a worker process. The network objects stay in the worker,
+#the parent rebuilds PowerFlowResults against its own (identically assigned) copy of the network.
+class QuasiTimeSeriesSnapshot:
+    def __init__(self, hour, results: PowerFlowResults, calculate_residuals):
+        self.hour = hour
+        self.is_success = results.is_success
+        self.iterations = results.iterations
+        self.tx_percent = results.tx_percent
+        self.duration_sec = results.duration_sec
+        self.v_final = results.v_final
+        self.residuals = results.residuals if calculate_residuals else None
+        self.deenergized_bus_count = results.deenergized_bus_count
+        self.load_powers = [(load.P, load.Q) for load in results.network.loads]
+
+    def to_results(self, network: DxNetworkModel, settings: PowerFlowSettings) -> PowerFlowResults:
+        for (load, (P, Q)) in zip(network.loads, self.load_powers):
+            load.P = P
+            load.Q = Q
+
+        return PowerFlowResults(
+            self.is_success, 
+            self.iterations, 
+            self.tx_percent, 
+            self.duration_sec, 
+            network, 
+            self.v_final, 
+            settings, 
+            self.residuals,
+            self.deenergized_bus_count
+            )
+
+class QuasiTimeSeriesWorker:
+    def __init__(self, postprocessing_settings: PostProcessingSettings, settings: PowerFlowSettings, device_states):
+        network = NetworkLoader(settings).from_file(postprocessing_settings.network_file)
+        self.postprocessor = NetworkPostProcessor(postprocessing_settings, PowerFlow(network, settings))
+        self.postprocessor.set_load_names(network)
+        #The device states (capacitor switches, fuses, regulator taps) of the parent's network.
+        self.device_states = device_states
+
+    # A chunk must not depend on which chunks the same worker solved before it. It starts from the device
+    # states of the parent's network and from the solution of the hour before it, which is solved again first.
+    # This seeding is approximate: a serial run reaches that hour through all the hours before it, and devices
+    # with hysteresis (e.g. regulator bands, capacitor deadbands) may settle in different states than when the
+    # hour is solved on its own.
+    def run(self, hours):
+        powerflow = self.postprocessor.powerflow
+        network = powerflow.network
+
+        nrsolver = None if powerflow.device_controller is None else powerflow.device_controller.homotopy.nrsolver
+        set_device_states(network, self.device_states, nrsolver)
+
+        v_init = None
+        if hours[0] > self.postprocessor.settings.loadfile_start:
+            self.postprocessor.set_load_values(network, hours[0] - 1)
+            results = self.postprocessor.execute_powerflow()
+            v_init = results.v_final if results.is_success else None
+
+        snapshots = []
+        for hour in hours:
+            self.postprocessor.set_load_values(network, hour)
+            results = self.postprocessor.execute_powerflow(v_init)
+            v_init = results.v_final if results.is_success else None
+            snapshots.append(QuasiTimeSeriesSnapshot(hour, results, self.postprocessor.settings.calculate_residuals))
+
+        return snapshots
+
+#One worker per process, created by the pool initializer.
+_worker: QuasiTimeSeriesWorker = None
+
+def initialize_quasi_time_series_worker(postprocessing_settings: PostProcessingSettings, settings: PowerFlowSettings, device_states):
+    global _worker
+    _worker = QuasiTimeSeriesWorker(postprocessing_settings, settings, device_states)
+
+def run_quasi_time_series_chunk(hours):
+    return _worker.run(hours)
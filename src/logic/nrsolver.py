@@ -1,14 +1,57 @@
+import logging
 import os
 import numpy as np
-from scipy.sparse.linalg import spsolve
+from logic.batchstamper import STAMPING_BACKEND_NUMBA, STAMPING_BACKEND_NUMPY, STAMPING_BACKEND_PYTHON, BatchStamper
+from logic.graphanalyzer import get_network_islands
+from logic.jitkernels import is_jit_available
+from logic.linearsolver import IslandLinearSolver, create_linear_solver
+from logic.linearstampcache import LinearStampCache, build_stamp_delta, record_element_stamps
 from logic.matrixbuilder import MatrixBuilder
 from logic.networkmodel import NetworkModel
 from logic.powerflowsettings import PowerFlowSettings
+from logic.profiler import PHASE_CONVERGENCE_CHECK, PHASE_LINEAR_SOLVE, PHASE_LINEAR_STAMP, PHASE_NONLINEAR_STAMP, PHASE_NR_SOLVE, PHASE_TO_MATRIX
 from pathlib import Path
-from colorama import init
-from termcolor import colored
-# use Colorama to make Termcolor work on Windows too
-init()
+
+logger = logging.getLogger(__name__)
+
+#Line search: a step is accepted when it reduces the residual norm by at least LINE_SEARCH_DECREASE times
+#its length (the Armijo condition), and halved otherwise, down to LINE_SEARCH_MIN_STEP.
+LINE_SEARCH_DECREASE = 1e-4
+LINE_SEARCH_MIN_STEP = 1.0 / 64
+
+#The convergence data of one NR iteration, handed to the convergence monitor, settings.iteration_callback
+#and the debug log. The error is the largest change of a bus voltage or load current in the iteration.
+#
+#The label of the node with the largest error and the norm of the whole step are only computed when read.
+#The residual norm is computed by the solver: the matrix it needs is refilled in place every iteration, so
+#an iteration kept by a callback could not compute it later.
+class NRIteration:
+    def __init__(self, network: NetworkModel, iteration_num, tx_factor, err_max, err_index, diff, step_size = 1.0, residual_norm = None) -> None:
+        self.network = network
+        self.iteration_num = iteration_num
+        self.tx_factor = tx_factor
+        self.err_max = err_max
+        #Matrix index of the unknown with the largest error.
+        self.err_index = err_index
+        self.diff = diff
+        #The fraction of the previous NR step that was taken to reach v (below 1 after a line search).
+        self.step_size = step_size
+        #Euclidean norm of the residual Y(v) v - J(v) at the start of the iteration. None unless there is
+        #a callback, the monitor sets needs_residual_norm, or the line search computed it anyway.
+        self.residual_norm = residual_norm
+
+    @property
+    def err_label(self):
+        label = self.network.get_matrix_label(self.err_index)
+        return "other" if label == None else label
+
+    #Euclidean length of the NR step over all unknowns.
+    @property
+    def step_length(self):
+        return np.linalg.norm(self.diff)
+
+    def __str__(self) -> str:
+        return f'The maximum error for iteration {self.iteration_num} is {self.err_max:g} at {self.err_label}'
 
 class NRSolver:
 
@@ -16,24 +59,59 @@ class NRSolver:
         self.settings = settings
         self.network = network
         self.v_limiting = v_limiting
-        self.diff_mask = None
-
-    def get_or_create_diff_mask(self):
-        if self.diff_mask != None:
-            return self.diff_mask
-
-        self.diff_mask = [False] * self.network.size_Y
+        self.diff_indices = None
+        #Why the last solve was stopped by the convergence monitor, if it was.
+        self.stop_reason = None
+
+        islands = get_network_islands(network)
+        if islands.count > 1:
+            self.linear_solver = IslandLinearSolver(settings, network)
+        else:
+            self.linear_solver = create_linear_solver(settings)
+
+        if settings.cache_linear_stamps:
+            self.linear_stamp_cache = LinearStampCache(network)
+        else:
+            self.linear_stamp_cache = None
+
+    #Indices of the unknowns the convergence error is measured on (bus voltages and load currents).
+    def get_or_create_diff_indices(self):
+        if self.diff_indices is not None:
+            return self.diff_indices
+
+        diff_mask = np.zeros(self.network.size_Y, dtype=bool)
         for bus in self.network.buses:
-           self.diff_mask[bus.node_Vr] = True
-           self.diff_mask[bus.node_Vi] = True
+           diff_mask[bus.node_Vr] = True
+           diff_mask[bus.node_Vi] = True
 
         for load in self.network.loads:
-            self.diff_mask[load.node_Ir] = True
-            self.diff_mask[load.node_Ii] = True
-        
-        return self.diff_mask
+            diff_mask[load.node_Ir] = True
+            diff_mask[load.node_Ii] = True
+
+        self.diff_indices = np.flatnonzero(diff_mask)
+        return self.diff_indices
+
+    #Snapshot of an element's linear stamps, taken before a device adjustment (see invalidate_element).
+    def record_element(self, element):
+        return record_element_stamps(element, self.network, 0)
+
+    #Must be called whenever the linear stamps of an element change (device adjustments, etc).
+    #If the stamps from before the change are given, the change is also folded into the current factors.
+    def invalidate_element(self, element, previous_stamps = None):
+        if self.linear_stamp_cache != None:
+            self.linear_stamp_cache.invalidate(element)
+
+        if previous_stamps != None:
+            delta = build_stamp_delta(previous_stamps, self.record_element(element), self.network.size_Y)
+            self.linear_solver.update_factors(delta)
 
     def stamp_linear(self, Y: MatrixBuilder, J, tx_factor):
+        if self.linear_stamp_cache != None:
+            self.linear_stamp_cache.stamp(Y, J, tx_factor)
+            if Y.batch != None:
+                Y.batch.flush(Y, J)
+            return
+
         for element in self.network.get_NR_invariant_elements():
             element.stamp_primal(Y, J, None, tx_factor, self.network)
 
@@ -44,6 +122,9 @@ class NRSolver:
             if self.network.optimization != None and self.network.optimization.is_linear:
                 self.network.optimization.stamp(Y, J, None, tx_factor, self.network)
 
+        if Y.batch != None:
+            Y.batch.flush(Y, J)
+
     def stamp_nonlinear(self, Y: MatrixBuilder, J, v_previous, tx_factor):
         for element in self.network.get_NR_variable_elements():
             element.stamp_primal(Y, J, v_previous, tx_factor, self.network)
@@ -55,75 +136,146 @@ class NRSolver:
             if self.network.optimization != None and not self.network.optimization.is_linear:
                 self.network.optimization.stamp(Y, J, v_previous, tx_factor, self.network)
 
-    def run_powerflow(self, v_init, tx_factor):
+        if Y.batch != None:
+            Y.batch.flush(Y, J)
+
+    def create_matrix_builder(self):
+        Y = MatrixBuilder(self.settings)
+
+        if self.settings.stamping_backend == STAMPING_BACKEND_NUMPY:
+            Y.batch = BatchStamper()
+        elif self.settings.stamping_backend == STAMPING_BACKEND_NUMBA:
+            Y.batch = BatchStamper(use_jit=is_jit_available())
+        elif self.settings.stamping_backend != STAMPING_BACKEND_PYTHON:
+            raise Exception(f"Unknown stamping backend {self.settings.stamping_backend}")
+
+        return Y
+
+    #is_warm_start tells the convergence monitor that v_init is (close to) a solution already.
+    def run_powerflow(self, v_init, tx_factor, is_warm_start = False):
+        profiler = self.settings.profiler
+        with profiler.section(PHASE_NR_SOLVE):
+            return self.__run_powerflow(v_init, tx_factor, is_warm_start, profiler)
+
+    def __run_powerflow(self, v_init, tx_factor, is_warm_start, profiler):
         if self.settings.dump_matrix:
             dump_matrix_map(self.network.matrix_map)
 
         v_previous = np.copy(v_init)
 
-        Y = MatrixBuilder(self.settings)
-        J_linear = [0] * len(v_init)
+        self.linear_solver.reset()
+
+        Y = self.create_matrix_builder()
+        J_linear = np.zeros(len(v_init))
 
-        self.stamp_linear(Y, J_linear, tx_factor)
+        with profiler.section(PHASE_LINEAR_STAMP):
+            self.stamp_linear(Y, J_linear, tx_factor)
 
         linear_index = Y.get_usage()
 
-        max_error_history = []
+        self.stop_reason = None
+        monitor = self.settings.convergence_monitor
+        monitor.reset(is_warm_start, self.settings.tolerance)
+        needs_residual_norm = self.settings.iteration_callback != None or monitor.needs_residual_norm
+
+        #Line search state: the point the last full step was taken from, its residual norm, and the step.
+        v_base = None
+        residual_base = None
+        step = None
+        step_size = 1.0
+        residual_norm = None
 
         for iteration_num in range(self.settings.max_iters):
+            profiler.count("nr_iterations")
+
             J = J_linear.copy()
 
-            self.stamp_nonlinear(Y, J, v_previous, tx_factor)
+            with profiler.section(PHASE_NONLINEAR_STAMP):
+                self.stamp_nonlinear(Y, J, v_previous, tx_factor)
 
             Y.assert_valid(check_zeros=True)
 
-            Y_matrix = Y.to_matrix()
+            with profiler.section(PHASE_TO_MATRIX):
+                Y_matrix = Y.to_matrix()
 
             if self.settings.dump_matrix:
                 dump_Y(Y_matrix, iteration_num)
                 dump_J(J, iteration_num)
 
-            v_next = spsolve(Y_matrix, np.asarray(J, dtype=np.float64))
+            if self.settings.line_search:
+                residual_norm = np.linalg.norm(Y_matrix @ v_previous - J)
+                if step is not None and residual_norm > (1 - LINE_SEARCH_DECREASE * step_size) * residual_base and step_size > LINE_SEARCH_MIN_STEP:
+                    #The step did not reduce the residual enough, retry with half of it.
+                    profiler.count("line_search_backtracks")
+                    step_size /= 2
+                    v_previous = v_base + step_size * step
+                    Y.clear(retain_idx=linear_index)
+                    continue
+
+                v_base = v_previous
+                residual_base = residual_norm
+
+            with profiler.section(PHASE_LINEAR_SOLVE):
+                v_next = self.linear_solver.solve(Y_matrix, J, v_previous)
+
+            if profiler.is_enabled:
+                self.__record_matrix_metrics(profiler, Y_matrix)
 
             if np.isnan(v_next).any():
                 raise Exception("Error solving linear system")
 
-            diff = v_next - v_previous
+            with profiler.section(PHASE_CONVERGENCE_CHECK):
+                diff = v_next - v_previous
+
+                diff_indices = self.get_or_create_diff_indices()
 
-            diff_mask = self.get_or_create_diff_mask()
+                err = abs(diff[diff_indices])
 
-            err = abs(diff[diff_mask])
+                err_arg_max = np.argmax(err)
+                err_max = err[err_arg_max]
 
-            err_max = err.max()
-            err_arg_max = np.argmax(err)
+                if residual_norm is None and needs_residual_norm:
+                    residual_norm = np.linalg.norm(Y_matrix @ v_previous - J)
 
-            if err_arg_max in self.network.matrix_map:
-                err_max_attr = self.network.matrix_map[err_arg_max]
-            else:
-                err_max_attr = "other"
+                iteration = NRIteration(self.network, iteration_num, tx_factor, err_max, diff_indices[err_arg_max], diff, step_size, residual_norm)
+                logger.debug("%s", iteration)
 
-            print(colored("The maximum error for this iteration is %f at %s"%(err_max, err_max_attr), 'green')) 
-            max_error_history.append(err_max)
+                iteration_callback = self.settings.iteration_callback
+                if iteration_callback != None:
+                    iteration_callback(iteration)
 
-            if len(max_error_history) % 50 == 0:
-                #We check regularly if the solver is making progress and bail if not.
-                x = np.array(range(len(max_error_history)))
-                A = np.vstack([x, np.ones(len(x))]).T
-                y = np.array(max_error_history)
-                m, _ = np.linalg.lstsq(A, y, rcond=None)[0]
-                if m > 0:
+                self.linear_solver.report_error(err_max)
+
+                if err_max < self.settings.tolerance:
+                    return (True, v_next, iteration_num)
+
+                self.stop_reason = monitor.check(iteration)
+                if self.stop_reason != None:
+                    logger.info("Stopped NR at iteration %d: %s", iteration_num, self.stop_reason)
                     return (False, v_next, iteration_num)
-            
-            if err_max < self.settings.tolerance:
-                return (True, v_next, iteration_num)
-            elif self.v_limiting != None and err_max > self.settings.tolerance:
+
+            if self.v_limiting != None:
                 v_next = self.v_limiting.apply_limiting(v_next, v_previous, diff)
 
+            step = v_next - v_previous
+            step_size = 1.0
+            residual_norm = None
+
             v_previous = v_next
             Y.clear(retain_idx=linear_index)
 
         return (False, v_next, iteration_num)
 
+    def __record_matrix_metrics(self, profiler, Y_matrix):
+        profiler.record("matrix_size", Y_matrix.shape[0])
+        profiler.record("matrix_nnz", Y_matrix.nnz)
+        profiler.record("factorizations", self.linear_solver.factorization_count)
+
+        factor_nnz = self.linear_solver.get_factor_nnz()
+        if factor_nnz is not None:
+            profiler.record("factor_nnz", factor_nnz)
+            profiler.record("fill_in", factor_nnz / Y_matrix.nnz)
+
 def dump_matrix_map(map):
     Path("./dumps").mkdir(parents=True, exist_ok=True)
 
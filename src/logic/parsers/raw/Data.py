@@ -141,6 +141,65 @@ def remove_end_of_line_comment(token, end_of_line_str):
     if index > -1:
         token_new = token_new[0:index]
     return token_new
+
+#one field of a data type, read for a whole section at once (see read_records). Like parse_token, the
+#token in a column of the line-th row of each record is converted to val_type, and empty tokens take
+#the default (None for required fields). With min_length, only rows longer than that have the field.
+class Field:
+
+    def __init__(self, attribute, column, val_type, default=None, line=0, min_length=None, isIntFloat=False):
+
+        self.attribute = attribute
+        self.column = column
+        self.val_type = val_type
+        self.default = default
+        self.line = line
+        self.min_length = min_length
+        self.isIntFloat = isIntFloat
+
+#converts a column of tokens at once, with the same results as parse_token on each of them
+def parse_column(tokens, val_type, default=None, isIntFloat=False):
+    if isIntFloat:
+        return [parse_token(token, val_type, default, isIntFloat) for token in tokens]
+
+    if '' in tokens:
+        empty_value = parse_token('', val_type, default)
+        return [val_type(token) if len(token) > 0 else empty_value for token in tokens]
+
+    return list(map(val_type, tokens))
+
+#creates one object per record (a list of rows) and sets its fields a column at a time, instead of
+#parsing every token of every row on its own
+def read_records(create_record, records, fields):
+    records = list(records)
+    objects = [create_record() for record in records]
+    if len(records) == 0:
+        return objects
+
+    #transpose the rows of each line once, padding short rows with empty tokens
+    columns = []
+    for line in range(max([field.line for field in fields]) + 1):
+        width = max([field.column + 1 for field in fields if field.line == line] + [0])
+        rows = [record[line] if len(record[line]) >= width else record[line] + [''] * (width - len(record[line])) for record in records]
+        columns.append(list(zip(*rows)))
+
+    #fields that every record has are set together, the others only on the records that have them
+    common_fields = [field for field in fields if field.min_length is None and field.column >= 0]
+    names = [field.attribute for field in common_fields]
+    values = [parse_column(columns[field.line][field.column], field.val_type, field.default, field.isIntFloat) for field in common_fields]
+    for (record_object, record_values) in zip(objects, zip(*values)):
+        record_object.__dict__.update(zip(names, record_values))
+
+    for field in fields:
+        if field in common_fields:
+            continue
+
+        selected = [idx for idx in range(len(records)) if field.min_length is None or len(records[idx][field.line]) > field.min_length]
+        tokens = [records[idx][field.line][field.column] for idx in selected]
+        for (idx, value) in zip(selected, parse_column(tokens, field.val_type, field.default, field.isIntFloat)):
+            setattr(objects[idx], field.attribute, value)
+
+    return objects
     
 #data class 
 
@@ -308,7 +367,9 @@ class Raw:
             delimiter=delimiter_str,
             quotechar=quote_str,
             skipinitialspace=skip_initial_space)
-        rows = [[t.strip() for t in r] for r in rows]
+        #key rows (starting with @) hold no data
+        rows = [list(map(str.strip, r)) for r in rows]
+        rows = [r for r in rows if len(r) == 0 or r[0][:1] != '@']
         self.read_from_rows(rows, file_name)
         #self.set_areas_from_buses()
      
@@ -332,6 +393,18 @@ class Raw:
             is_section_end = True
         return is_section_end
         
+    #finds the row ending the section that starts at start, so the section can be read at once.
+    #returns (rows of the section, index of the row ending it, whether that row ends the file)
+    def read_section(self, rows, start):
+        row_num = start
+        while True:
+            row = rows[row_num]
+            if self.row_is_file_end(row):
+                return (rows[start:row_num], row_num, True)
+            if row[0][:1] == '0' and self.row_is_section_end(row):
+                return (rows[start:row_num], row_num, False)
+            row_num += 1
+
     def row_is_key(self, row):
         if row[0][0] == '@':
             return True
@@ -364,104 +437,45 @@ class Raw:
                     return
                 if self.row_is_section_end(row):
                     break
-        while True: #bus data
-            
-            row_num += 1
-            row = rows[row_num]
-            while True:
-                
-                
-                if rows[row_num][0][0] == '@':
-                    
-                    row_num += 1
-                else:
-                    
-                    break
-            row = rows[row_num]
-            if self.row_is_file_end(row):
-                return
-            if self.row_is_section_end(row):
-                break
-            row = rows[row_num]
-            bus = Bus(version)
-            bus.read_from_row(row, version)
+        #bus data
+        (section, row_num, is_file_end) = self.read_section(rows, row_num + 1)
+        for bus in read_buses(section, version):
             self.buses[bus.i] = bus
             if bus.ide == 3:
-                #print(bus.i)
                 self.slack_buses.append(bus.i)
-        s_r = row_num
-        while True: #load data
-            row_num += 1
-            row = rows[row_num]
-            while True:
-                if rows[row_num][0][0] == '@':
-                    row_num += 1
-                else:
-                    break
-            row = rows[row_num]
-            if self.row_is_file_end(row):
-                return
-            if self.row_is_section_end(row):
-                break
-            row = rows[row_num]
-            load = Load(version)
-            load.read_from_row(row, version)
+        if is_file_end:
+            return
+
+        #load data
+        (section, row_num, is_file_end) = self.read_section(rows, row_num + 1)
+        for load in read_records(lambda: Load(version), [[row] for row in section], Load.get_fields(version)):
             self.loads[(load.i, load.id)] = load
+        if is_file_end:
+            return
+
         if version != 30: #version 30 does not have fixed bus shunt data
-            while True: #fixed bus shunt data
-                row_num += 1
-                row = rows[row_num]
-                while True:
-                    if rows[row_num][0][0] == '@':
-                        row_num += 1
-                    else:
-                        break
-                row = rows[row_num]
-                if self.row_is_file_end(row):
-                    return
-                if self.row_is_section_end(row):
-                    break
-                row = rows[row_num]
-                fixed_shunt = FixedShunt()
-                fixed_shunt.read_from_row(row, version)
+            (section, row_num, is_file_end) = self.read_section(rows, row_num + 1)
+            for fixed_shunt in read_records(FixedShunt, [[row] for row in section], FixedShunt.get_fields(version)):
                 self.fixed_shunts[(fixed_shunt.i, fixed_shunt.id)] = fixed_shunt
-        while True: #generator data
-            row_num += 1
-            row = rows[row_num]
-            while True:
-                if rows[row_num][0][0] == '@':
-                    row_num += 1
-                else:
-                    break
-            row = rows[row_num]
-            if self.row_is_file_end(row):
+            if is_file_end:
                 return
-            if self.row_is_section_end(row):
-                break
-            row = rows[row_num]
-            generator = Generator()
-            generator.read_from_row(row, version)
+
+        #generator data
+        (section, row_num, is_file_end) = self.read_section(rows, row_num + 1)
+        for generator in read_generators(section, version):
             self.generators[(generator.i, generator.id)] = generator
-        while True: #branch data
-            row_num += 1
-            row = rows[row_num]
-            while True:
-                if rows[row_num][0][0] == '@':
-                    row_num += 1
-                else:
-                    break
-            row = rows[row_num]
-            if self.row_is_file_end(row):
-                return
-            if self.row_is_section_end(row):
-                break
-            row = rows[row_num]
-            nontransformer_branch = NontransformerBranch()
-            nontransformer_branch.read_from_row(row, version)
+        if is_file_end:
+            return
+
+        #branch data
+        (section, row_num, is_file_end) = self.read_section(rows, row_num + 1)
+        for nontransformer_branch in read_records(lambda: NontransformerBranch(version), [[row] for row in section], NontransformerBranch.get_fields(version)):
             self.nontransformer_branches[(
                 nontransformer_branch.i,
                 nontransformer_branch.j,
                 nontransformer_branch.ckt)] = nontransformer_branch
+        if is_file_end:
+            return
                 
         if version == 34:
             while True: #system switching device data
@@ -479,39 +493,30 @@ class Raw:
                 if self.row_is_section_end(row):
                     break
                     
-        while True: #transformer data
+        #transformer data, with 4 rows per two winding and 5 rows per three winding transformer
+        two_xfmr_records = []
+        three_xfmr_records = []
+        while True:
             row_num += 1
             row = rows[row_num]
-            
-            while True:
-                if rows[row_num][0][0] == '@':
-                    row_num += 1
-                else:
-                    break
-            row = rows[row_num]
             if self.row_is_file_end(row):
-                return
+                break
             if self.row_is_section_end(row):
                 break
-            
-            
+
             if row[2] == '0': #two winding transformer
-                two_xfmr = Two_xfmr(version)
-                row2 = rows[row_num+1]
-                row3 = rows[row_num+2]
-                row4 = rows[row_num+3]
-                two_xfmr.read_from_row(row,row2, row3, row4, version)
-                self.two_wind_xfmrs[two_xfmr.i, two_xfmr.j, two_xfmr.ckt] = two_xfmr
+                two_xfmr_records.append(rows[row_num:(row_num + 4)])
                 row_num += 3
             else: #three winding transformer
-                three_xfmr = Three_xfmr()
-                row2 = rows[row_num+1]
-                row3 = rows[row_num+2]
-                row4 = rows[row_num+3]
-                row5 = rows[row_num+4]
-                three_xfmr.read_from_row(row, row2, row3, row4, row5, version)
-                self.three_wind_xfmrs[three_xfmr.i, three_xfmr.j, three_xfmr.k, three_xfmr.ckt] = three_xfmr
+                three_xfmr_records.append(rows[row_num:(row_num + 5)])
                 row_num += 4
+
+        for two_xfmr in read_records(lambda: Two_xfmr(version), two_xfmr_records, Two_xfmr.get_fields(version)):
+            self.two_wind_xfmrs[two_xfmr.i, two_xfmr.j, two_xfmr.ckt] = two_xfmr
+        for three_xfmr in read_records(lambda: Three_xfmr(version), three_xfmr_records, Three_xfmr.get_fields(version)):
+            self.three_wind_xfmrs[three_xfmr.i, three_xfmr.j, three_xfmr.k, three_xfmr.ckt] = three_xfmr
+        if self.row_is_file_end(rows[row_num]):
+            return
                 
         while True: # areas 
 
@@ -851,44 +856,41 @@ class Bus:
 
         self.name = ''
 
-    def read_from_row(self, row, rev):
-        goal_rows = 9
-        if rev == 32:
-            goal_rows = 9
-        elif rev == 34 or rev==33:
-            goal_rows = 13
-        elif rev == 30:
-            goal_rows = 11
-       
-        row = pad_row(row, goal_rows)
+    @staticmethod
+    def get_fields(rev):
         if rev == 30:
-            self.i = parse_token(row[0], int, default=None)
-            self.name = parse_token(row[1], str, 12*' ')
-            self.baskv = parse_token(row[2], float, 0.0)
-            self.ide = parse_token(row[3], int, 1)
-            self.gl = parse_token(row[4], float, default=0.0)
-            self.bl = parse_token(row[5], float, default=0.0)
-            self.area = parse_token(row[6], int, default=1)
-            self.zone = parse_token(row[7], int, 1)
-            self.vm = parse_token(row[8], float, default=1.0)
-            self.va = parse_token(row[9], float, default=0.0)
-            self.owner = parse_token(row[10], int, 1)
-        else:
-            self.i = parse_token(row[0], int, default=None)
-            self.area = parse_token(row[4], int, default=1)
-            self.vm = parse_token(row[7], float, default=1.0)
-            self.va = parse_token(row[8], float, default=0.0)
-            if id in (33, 34):
-                self.nvhi = parse_token(row[9], float, default=1.1)
-                self.nvlo = parse_token(row[10], float, default=0.9)
-                self.evhi = parse_token(row[11], float, default=1.1)
-                self.evlo = parse_token(row[12], float, default=0.9)
-        
-            self.name = parse_token(row[1], str, 12*' ')
-            self.baskv = parse_token(row[2], float, 0.0)
-            self.ide = parse_token(row[3], int, 1)
-            self.zone = parse_token(row[5], int, 1)
-            self.owner = parse_token(row[6], int, 1)
+            return [
+                Field('i', 0, int),
+                Field('name', 1, str, 12*' '),
+                Field('baskv', 2, float, 0.0),
+                Field('ide', 3, int, 1),
+                Field('gl', 4, float, 0.0),
+                Field('bl', 5, float, 0.0),
+                Field('area', 6, int, 1),
+                Field('zone', 7, int, 1),
+                Field('vm', 8, float, 1.0),
+                Field('va', 9, float, 0.0),
+                Field('owner', 10, int, 1)]
+
+        return [
+            Field('i', 0, int),
+            Field('area', 4, int, 1),
+            Field('vm', 7, float, 1.0),
+            Field('va', 8, float, 0.0),
+            Field('name', 1, str, 12*' '),
+            Field('baskv', 2, float, 0.0),
+            Field('ide', 3, int, 1),
+            Field('zone', 5, int, 1),
+            Field('owner', 6, int, 1)]
+
+    @staticmethod
+    def get_row_length(rev):
+        if rev == 34 or rev == 33:
+            return 13
+        elif rev == 30:
+            return 11
+        return 9
+
         
     
 class Load:
@@ -926,33 +928,25 @@ class Load:
 
         self.rev = clean_short_str(self.id)
 
-    def read_from_row(self, row, rev):
-
-        #row = pad_row(row, 13)
-        self.i = parse_token(row[0], int, default=None)
-        self.id = parse_token(row[1], str, default='1').strip()
-        self.status = parse_token(row[2], int, default=1)
-        self.pl = parse_token(row[5], float, default=0.0)
-        self.ql = parse_token(row[6], float, default=0.0)
-    
-        self.area = parse_token(row[3], int, 1)
-        self.zone = parse_token(row[4], int, 1)
-        self.ip = parse_token(row[7], float, 0.0)
-        self.iq = parse_token(row[8], float, 0.0)
-        self.yp = parse_token(row[9], float, 0.0)
-        self.yq = parse_token(row[10], float, 0.0)
-        self.owner = parse_token(row[11], int, 1)
+    @staticmethod
+    def get_fields(rev):
+        fields = [
+            Field('i', 0, int),
+            Field('id', 1, str, '1'),
+            Field('status', 2, int, 1),
+            Field('pl', 5, float, 0.0),
+            Field('ql', 6, float, 0.0),
+            Field('area', 3, int, 1),
+            Field('zone', 4, int, 1),
+            Field('ip', 7, float, 0.0),
+            Field('iq', 8, float, 0.0),
+            Field('yp', 9, float, 0.0),
+            Field('yq', 10, float, 0.0),
+            Field('owner', 11, int, 1)]
         if rev != 30:
-            self.scale = parse_token(row[12], int, 1)
-        if rev == 33:
-            if len(row) == 12:
-                self.intrp  =  parse_token(row[13], int, 0)
-        if rev==34:
-            pass
-            '''#self.intrpt = parse_token(row[13], int, 0)
-            self.dgenp = parse_token(row[14], float, 0.0)
-            self.dgenq = parse_token(row[15], float, 0.0)
-            self.dgenm = parse_token(row[15], float, 0) '''
+            fields.append(Field('scale', 12, int, 1))
+        return fields
+
         
 
 class FixedShunt:
@@ -977,14 +971,15 @@ class FixedShunt:
                      'i': self.i,
                      'id': self.id}})
 
-    def read_from_row(self, row, id):
+    @staticmethod
+    def get_fields(rev):
+        return [
+            Field('i', 0, int),
+            Field('id', 1, str, '1'),
+            Field('status', 2, int, 1),
+            Field('gl', 3, float, 0.0),
+            Field('bl', 4, float, 0.0)]
 
-        #row = pad_row(row, 5)
-        self.i = parse_token(row[0], int, default=None)
-        self.id = parse_token(row[1], str, default='1').strip()
-        self.status = parse_token(row[2], int, default=1)
-        self.gl = parse_token(row[3], float, default=0.0)
-        self.bl = parse_token(row[4], float, default=0.0)
         
 
 class Generator:
@@ -1021,44 +1016,43 @@ class Generator:
 
 
 
-    def read_from_row(self, row, rev):
-        if len(row) < 16:
-            print('error: data missing from generator')
-        else:
-            if rev != 30 and len(row)>26:
-                self.wmod = parse_token(row[-2], int, 0, True)
-                self.wpf = parse_token(row[-1], float, 0)
-            if len(row)<28:
-                diff = 28-len(row)
-                row += ['']*diff
-            #row = pad_row(row, 28)
-            self.i = parse_token(row[0], int, default=None)
-            self.id = parse_token(row[1], str, default='1').strip()
-            self.pg = parse_token(row[2], float, default=0.0)
-            self.qg = parse_token(row[3], float, default=0.0)
-            self.qt = parse_token(row[4], float, default=9999.0)
-            self.qb = parse_token(row[5], float, default=-9999.0)
-            self.stat = parse_token(row[14], int, default=1)
-            self.pt = parse_token(row[16], float, default=9999.0)
-            self.pb = parse_token(row[17], float, default=-9999.0)
-        
-            self.vs = parse_token(row[6], float, 1.0)
-            self.ireg = parse_token(row[7], int, 0)
-            self.mbase = parse_token(row[8], float, 100.0)
-            self.zr = parse_token(row[9], float, 0.0)
-            self.zx = parse_token(row[10], float, 1.0)
-            self.rt = parse_token(row[11], float, 0.0)
-            self.xt = parse_token(row[12], float, 0.0)
-            self.gtap = parse_token(row[13], float, 1.0)
-            self.rmpct = parse_token(row[15], float, 100.0)
-            self.o1 = parse_token(row[18], int, 1)
-            self.f1 = parse_token(row[19], float, 1.0, True)
-            self.o2 = parse_token(row[20], int, 0)
-            self.f2 = parse_token(row[21], float, 1.0, True)
-            self.o3 = parse_token(row[22], int, 0)
-            self.f3 = parse_token(row[23], float, 1.0, True)
-            self.o4 = parse_token(row[24], int, 0)
-            self.f4 = parse_token(row[25], float, 1.0, True)
+    @staticmethod
+    def get_fields(rev):
+        fields = []
+        if rev != 30:
+            #the wind machine fields are the last two of the row
+            fields += [
+                Field('wmod', -2, int, 0, min_length=26, isIntFloat=True),
+                Field('wpf', -1, float, 0, min_length=26)]
+        fields += [
+            Field('i', 0, int),
+            Field('id', 1, str, '1'),
+            Field('pg', 2, float, 0.0),
+            Field('qg', 3, float, 0.0),
+            Field('qt', 4, float, 9999.0),
+            Field('qb', 5, float, -9999.0),
+            Field('stat', 14, int, 1),
+            Field('pt', 16, float, 9999.0),
+            Field('pb', 17, float, -9999.0),
+            Field('vs', 6, float, 1.0),
+            Field('ireg', 7, int, 0),
+            Field('mbase', 8, float, 100.0),
+            Field('zr', 9, float, 0.0),
+            Field('zx', 10, float, 1.0),
+            Field('rt', 11, float, 0.0),
+            Field('xt', 12, float, 0.0),
+            Field('gtap', 13, float, 1.0),
+            Field('rmpct', 15, float, 100.0),
+            Field('o1', 18, int, 1),
+            Field('f1', 19, float, 1.0, isIntFloat=True),
+            Field('o2', 20, int, 0),
+            Field('f2', 21, float, 1.0, isIntFloat=True),
+            Field('o3', 22, int, 0),
+            Field('f3', 23, float, 1.0, isIntFloat=True),
+            Field('o4', 24, int, 0),
+            Field('f4', 25, float, 1.0, isIntFloat=True)]
+        return fields
+
 
 class NontransformerBranch:
 
@@ -1092,74 +1086,62 @@ class NontransformerBranch:
             self.name = ' '*12
    
 
-    def read_from_row(self, row, rev):
+    @staticmethod
+    def get_fields(rev):
         if rev == 34:
-            if len(row)< 34:
-                diff = 34-len(row)
-                row += ['']*diff
-            self.i = parse_token(row[0], int, default=None)
-            self.j = parse_token(row[1], int, default=None)
-            self.ckt = parse_token(row[2], str, default='1').strip()
-            self.r = parse_token(row[3], float, default=None)
-            self.x = parse_token(row[4], float, default=None)
-            self.b = parse_token(row[5], float, default=0.0)
-            self.name = parse_token(row[6], str, ' '*12)
-            self.ratea = parse_token(row[7], float, default=0.0)
-            self.rateb = parse_token(row[8], float, 0.0)
-            self.ratec = parse_token(row[9], float, default=0.0)
-            self.st = parse_token(row[23], int, default=None)
-        
-            
-            self.gi = parse_token(row[19], float, 0.0)
-            self.bi = parse_token(row[20], float, 0.0)
-            self.gj = parse_token(row[21], float, 0.0)
-            self.bj = parse_token(row[22], float, 0.0)
-            self.met = parse_token(row[24], int, 1)
-            self.len = parse_token(row[25], float, 0.0)
-            self.o1 = parse_token(row[26], float, 1)
-            self.f1 = parse_token(row[27], float, 1.0)
-            self.o2 = parse_token(row[28], float, 0)
-            self.f2 = parse_token(row[29], float, 1.0)
-            self.o3 = parse_token(row[30], float, 0)
-            self.f3 = parse_token(row[31], float, 1.0)
-            self.o4 = parse_token(row[32], float, 0)
-            self.f4 = parse_token(row[33], float, 1.0)
-        else:
-            if len(row)< 24:
-                diff = 24-len(row)
-                row += ['']*diff
-            #row = pad_row(row, 24)
-            self.i = parse_token(row[0], int, default=None)
-            self.j = parse_token(row[1], int, default=None)
-            self.ckt = parse_token(row[2], str, default='1').strip()
-            self.r = parse_token(row[3], float, default=None)
-            self.x = parse_token(row[4], float, default=None)
-            self.b = parse_token(row[5], float, default=0.0)
-            self.ratea = parse_token(row[6], float, default=0.0)
-            self.rateb = parse_token(row[7], float, 0.0)
-            self.ratec = parse_token(row[8], float, default=0.0)
-            self.st = parse_token(row[13], int, default=None)
-        
-            
-            self.gi = parse_token(row[9], float, 0.0)
-            self.bi = parse_token(row[10], float, 0.0)
-            self.gj = parse_token(row[11], float, 0.0)
-            self.bj = parse_token(row[12], float, 0.0)
-            self.met = parse_token(row[14], int, 1)
-            self.len = parse_token(row[15], float, 0.0)
-            self.o1 = parse_token(row[16], float, 1)
-            self.f1 = parse_token(row[17], float, 1.0)
-            self.o2 = parse_token(row[18], float, 0)
-            self.f2 = parse_token(row[19], float, 1.0)
-            self.o3 = parse_token(row[20], float, 0)
-            self.f3 = parse_token(row[21], float, 1.0)
-            self.o4 = parse_token(row[22], float, 0)
-            self.f4 = parse_token(row[23], float, 1.0)
-        
-        
+            return [
+                Field('i', 0, int),
+                Field('j', 1, int),
+                Field('ckt', 2, str, '1'),
+                Field('r', 3, float),
+                Field('x', 4, float),
+                Field('b', 5, float, 0.0),
+                Field('name', 6, str, ' '*12),
+                Field('ratea', 7, float, 0.0),
+                Field('rateb', 8, float, 0.0),
+                Field('ratec', 9, float, 0.0),
+                Field('st', 23, int),
+                Field('gi', 19, float, 0.0),
+                Field('bi', 20, float, 0.0),
+                Field('gj', 21, float, 0.0),
+                Field('bj', 22, float, 0.0),
+                Field('met', 24, int, 1),
+                Field('len', 25, float, 0.0),
+                Field('o1', 26, float, 1),
+                Field('f1', 27, float, 1.0),
+                Field('o2', 28, float, 0),
+                Field('f2', 29, float, 1.0),
+                Field('o3', 30, float, 0),
+                Field('f3', 31, float, 1.0),
+                Field('o4', 32, float, 0),
+                Field('f4', 33, float, 1.0)]
+
+        return [
+            Field('i', 0, int),
+            Field('j', 1, int),
+            Field('ckt', 2, str, '1'),
+            Field('r', 3, float),
+            Field('x', 4, float),
+            Field('b', 5, float, 0.0),
+            Field('ratea', 6, float, 0.0),
+            Field('rateb', 7, float, 0.0),
+            Field('ratec', 8, float, 0.0),
+            Field('st', 13, int),
+            Field('gi', 9, float, 0.0),
+            Field('bi', 10, float, 0.0),
+            Field('gj', 11, float, 0.0),
+            Field('bj', 12, float, 0.0),
+            Field('met', 14, int, 1),
+            Field('len', 15, float, 0.0),
+            Field('o1', 16, float, 1),
+            Field('f1', 17, float, 1.0),
+            Field('o2', 18, float, 0),
+            Field('f2', 19, float, 1.0),
+            Field('o3', 20, float, 0),
+            Field('f3', 21, float, 1.0),
+            Field('o4', 22, float, 0),
+            Field('f4', 23, float, 1.0)]
 
-
-#two winding transformer
 class Two_xfmr:
     
     def __init__(self, version):
@@ -1211,64 +1193,23 @@ class Two_xfmr:
             self.vecgrp = ' '*12
             self.cnxa1 = 0.0
     
-    def read_from_row(self, row, row2, row3, row4, version):
-        #two winding xfmrs have 4 rows of data 
-        #row 1
-        
-        self.i = parse_token(row[0], str)
-        self.j = parse_token(row[1], str)
-        self.k = 0
-        self.ckt = parse_token(row[3], str)
-        self.cw = parse_token(row[4], int, 1)
-        self.cz = parse_token(row[5], int, 1)
-        self.cm = parse_token(row[6], int, 1)
-        self.mag1 = parse_token(row[7], float, 0.0)
-        self.mag2 = parse_token(row[8], float, 0.0)
-        self.nmetr = parse_token(row[9], int, 2)
-        self.name = parse_token(row[10], str, 12*' ')
-        self.stat = parse_token(row[11], int, 1)
-        self.o1 = parse_token(row[12], int, 1)
-        self.f1 = parse_token(row[13], float, 1.0)
-        if (len(row) > 15):
-            self.o2 = parse_token(row[14], int, 0)
-            self.f2 = parse_token(row[15], float, 1.0)
-        if (len(row) > 17):
-            self.o3 = parse_token(row[16], int, 0)
-            self.f3 = parse_token(row[17], float, 1.0)
-        if (len(row) > 19):
-            self.o4 = parse_token(row[18], int, 0)
-            self.f4 = parse_token(row[19], float, 1.0)
-        if version in (33, 34):
-            self.vecgrp = parse_token(row[20], str, ' '*12)
-        
+    @staticmethod
+    def get_fields(version):
+        #two winding xfmrs have 4 rows of data
+        fields = get_xfmr_record_1_fields(version, str, None, None, 1)
         #row2
-        self.r1_2 = parse_token(row2[0], float, 0.0)
-        self.x1_2 = parse_token(row2[1], float )
-        self.sbase1_2 = parse_token(row2[2], float, 100.0)
-        
-        #row3 
-        self.windv1 = parse_token(row3[0], float, 1.0)
-        self.nomv1 = parse_token(row3[1], float, 0.0)
-        self.ang1 = parse_token(row3[2], float, 0.0)
-        self.rata1 = parse_token(row3[3], float, 0.0)
-        self.ratb1 = parse_token(row3[4], float, 0.0)
-        self.ratc1 = parse_token(row3[5], float, 0.0)
-        self.cod1 = parse_token(row3[6], float, 0)
-        self.cont1 = parse_token(row3[7], float, 0)
-        self.rma1 = parse_token(row3[8], float, 1.1)
-        self.rmi1 = parse_token(row3[9], float, 0.9)
-        self.vma1 = parse_token(row3[10], float, 1.1)
-        self.vmi1 = parse_token(row3[11], float, 0.9)
-        self.ntp1 = parse_token(row3[12], float, 33 )
-        self.tab1 = parse_token(row3[13], float, 0)
-        self.cr1 = parse_token(row3[14], float, 0.0)
-        self.cx1 = parse_token(row3[15], float, 0.0)
-        if version in (33, 34):
-            self.cnxa1 = parse_token(row3[16], float, 0.0)
-        
+        fields += [
+            Field('r1_2', 0, float, 0.0, line=1),
+            Field('x1_2', 1, float, line=1),
+            Field('sbase1_2', 2, float, 100.0, line=1)]
+        #row3
+        fields += get_xfmr_winding_fields(1, version, line=2)
         #row4
-        self.windv2 = parse_token(row4[0], float, 1.0)
-        self.nomv2 = parse_token(row4[1], float, 0.0)
+        fields += [
+            Field('windv2', 0, float, 1.0, line=3),
+            Field('nomv2', 1, float, 0.0, line=3)]
+        return fields
+
 
 
 
@@ -1358,111 +1299,103 @@ class Three_xfmr:
             self.cnxa2 = 0.0
             self.cnxa3 = 0.0
         
-    def read_from_row(self, row, row2, row3, row4, row5, version):
+    @staticmethod
+    def get_fields(version):
         #row 1
-        self.i = parse_token(row[0], int, '')
-        self.j = parse_token(row[1], int, '')
-        self.k = parse_token(row[2], int, 0)
-        self.ckt = parse_token(row[3], str, '1')
-        self.cw = parse_token(row[4], int, 1)
-        self.cz = parse_token(row[5], int, 1)
-        self.cm = parse_token(row[6], int, 1)
-        self.mag1 = parse_token(row[7], float, 0.0)
-        self.mag2 = parse_token(row[8], float, 0.0)
-        self.nmetr = parse_token(row[9], int, 2)
-        self.name = parse_token(row[10], str, 12*' ')
-        self.stat = parse_token(row[11], int, 1)
-        self.o1 = parse_token(row[12], int, 0)
-        self.f1 = parse_token(row[13], float, 1.0)
-        if (len(row) > 15):
-            self.o2 = parse_token(row[14], int, 0)
-            self.f2 = parse_token(row[15], float, 1.0)
-        if (len(row) > 17):
-            self.o3 = parse_token(row[16], int, 0)
-            self.f3 = parse_token(row[17], float, 1.0)
-        if (len(row) > 19):
-            self.o4 = parse_token(row[18], int, 0)
-            self.f4 = parse_token(row[19], float, 1.0)
-        if version in (33, 34):
-            self.vecgrp = parse_token(row[20], str, ' '*12)
-        
+        fields = get_xfmr_record_1_fields(version, int, '', '1', 0)
+        fields.append(Field('k', 2, int, 0))
         #row2
-        self.r1_2 = parse_token(row2[0], float, 0.0)
-        self.x1_2 = parse_token(row2[1], float, 0.0)
-        self.sbase1_2 = parse_token(row2[2], float, 0.0)
-        self.r2_3 = parse_token(row2[3], float, 0.0)
-        self.x2_3 = parse_token(row2[4], float, 0.0)
-        self.sbase2_3 = parse_token(row2[5], float, 0.0)
-        self.r3_1 = parse_token(row2[6], float, 0.0)
-        self.x3_1 = parse_token(row2[7], float, 0.0)
-        self.sbase3_1 = parse_token(row2[8], float, 0.0)
-        self.vmstar = parse_token(row2[9], float, 1.0)
-        self.anstar = parse_token(row2[10], float, 0.0)
-        
-        #row 3
-        self.windv1 = parse_token(row3[0], float, 1.0)
-        self.nomv1 = parse_token(row3[1], float, 0.0)
-        self.ang1 = parse_token(row3[2], float, 0.0)
-        self.rata1 = parse_token(row3[3], float, 0.0)
-        self.ratb1 = parse_token(row3[4], float, 0.0)
-        self.ratc1 = parse_token(row3[5], float, 0.0)
-        self.cod1 = parse_token(row3[6], float, 0)
-        self.cont1 = parse_token(row3[7], float, 0)
-        self.rma1 = parse_token(row3[8], float, 1.1)
-        self.rmi1 = parse_token(row3[9], float, 0.9)
-        self.vma1 = parse_token(row3[10], float, 1.1)
-        self.vmi1 = parse_token(row3[11], float, 0.9)
-        self.ntp1 = parse_token(row3[12], float, 33)
-        self.tab1 = parse_token(row3[13], float, 0)
-        self.cr1 = parse_token(row3[14], float, 0.0)
-        self.cx1 = parse_token(row3[15], float, 0.0)
-        if version in (33, 34):
-            self.cnxa1 = parse_token(row3[16], float, 0.0)
-        
-        #row 4
-        self.windv2 = parse_token(row4[0], float, 1.0)
-        self.nomv2 = parse_token(row4[1], float, 0.0)
-        self.ang2 = parse_token(row4[2], float, 0.0)
-        self.rata2 = parse_token(row4[3], float, 0.0)
-        self.ratb2 = parse_token(row4[4], float, 0.0)
-        self.ratc2 = parse_token(row4[5], float, 0.0)
-        self.cod2 = parse_token(row4[6], float, 0)
-        self.cont2 = parse_token(row4[7], float, 0)
-        self.rma2 = parse_token(row4[8], float, 1.1)
-        self.rmi2 = parse_token(row4[9], float, 0.9)
-        self.vma2 = parse_token(row4[10], float, 1.1)
-        self.vmi2 = parse_token(row4[11], float, 0.9)
-        self.ntp2 = parse_token(row4[12], float, 33)
-        self.tab2 = parse_token(row4[13], float, 0)
-        self.cr2 = parse_token(row4[14], float, 0.0)
-        self.cx2 = parse_token(row4[15], float, 0.0)
-        if version in (33, 34):
-            self.cnxa2 = parse_token(row4[16], float, 0.0)
-        
-        #row 5
-        self.windv3 = parse_token(row5[0], float, 1.0)
-        self.nomv3 = parse_token(row5[1], float, 0.0)
-        self.ang3 = parse_token(row5[2], float, 0.0)
-        self.rata3 = parse_token(row5[3], float, 0.0)
-        self.ratb3 = parse_token(row5[4], float, 0.0)
-        self.ratc3 = parse_token(row5[5], float, 0.0)
-        self.cod3 = parse_token(row5[6], float, 0)
-        self.cont3 = parse_token(row5[7], float, 0)
-        self.rma3 = parse_token(row5[8], float, 1.1)
-        self.rmi3 = parse_token(row5[9], float, 0.9)
-        self.vma3 = parse_token(row5[10], float, 1.1)
-        self.vmi3 = parse_token(row5[11], float, 0.9)
-        self.ntp3 = parse_token(row5[12], float, 33)
-        self.tab3 = parse_token(row5[13], float, 0)
-        if len(row) > 14:
-            self.cr3 = parse_token(row[14], float, 0.0)
-        if len(row) > 15:
-            self.cx3 = parse_token(row[15], float, 0.0)
-        if version in (33, 34):
-            self.cnxa3 = parse_token(row5[16], float, 0.0)
+        fields += [
+            Field('r1_2', 0, float, 0.0, line=1),
+            Field('x1_2', 1, float, 0.0, line=1),
+            Field('sbase1_2', 2, float, 0.0, line=1),
+            Field('r2_3', 3, float, 0.0, line=1),
+            Field('x2_3', 4, float, 0.0, line=1),
+            Field('sbase2_3', 5, float, 0.0, line=1),
+            Field('r3_1', 6, float, 0.0, line=1),
+            Field('x3_1', 7, float, 0.0, line=1),
+            Field('sbase3_1', 8, float, 0.0, line=1),
+            Field('vmstar', 9, float, 1.0, line=1),
+            Field('anstar', 10, float, 0.0, line=1)]
+        #rows 3 to 5
+        fields += get_xfmr_winding_fields(1, version, line=2)
+        fields += get_xfmr_winding_fields(2, version, line=3)
+        fields += get_xfmr_winding_fields(3, version, line=4)
+        return fields
+
 
     
 
+#the first row of a transformer record, which two and three winding transformers share
+def get_xfmr_record_1_fields(version, bus_type, bus_default, ckt_default, o1_default):
+    fields = [
+        Field('i', 0, bus_type, bus_default),
+        Field('j', 1, bus_type, bus_default),
+        Field('ckt', 3, str, ckt_default),
+        Field('cw', 4, int, 1),
+        Field('cz', 5, int, 1),
+        Field('cm', 6, int, 1),
+        Field('mag1', 7, float, 0.0),
+        Field('mag2', 8, float, 0.0),
+        Field('nmetr', 9, int, 2),
+        Field('name', 10, str, 12*' '),
+        Field('stat', 11, int, 1),
+        Field('o1', 12, int, o1_default),
+        Field('f1', 13, float, 1.0),
+        Field('o2', 14, int, 0, min_length=15),
+        Field('f2', 15, float, 1.0, min_length=15),
+        Field('o3', 16, int, 0, min_length=17),
+        Field('f3', 17, float, 1.0, min_length=17),
+        Field('o4', 18, int, 0, min_length=19),
+        Field('f4', 19, float, 1.0, min_length=19)]
+    if version in (33, 34):
+        fields.append(Field('vecgrp', 20, str, ' '*12))
+    return fields
+
+#the row of one winding of a transformer record
+def get_xfmr_winding_fields(winding, version, line):
+    fields = [
+        Field('windv%d' % winding, 0, float, 1.0, line=line),
+        Field('nomv%d' % winding, 1, float, 0.0, line=line),
+        Field('ang%d' % winding, 2, float, 0.0, line=line),
+        Field('rata%d' % winding, 3, float, 0.0, line=line),
+        Field('ratb%d' % winding, 4, float, 0.0, line=line),
+        Field('ratc%d' % winding, 5, float, 0.0, line=line),
+        Field('cod%d' % winding, 6, float, 0, line=line),
+        Field('cont%d' % winding, 7, float, 0, line=line),
+        Field('rma%d' % winding, 8, float, 1.1, line=line),
+        Field('rmi%d' % winding, 9, float, 0.9, line=line),
+        Field('vma%d' % winding, 10, float, 1.1, line=line),
+        Field('vmi%d' % winding, 11, float, 0.9, line=line),
+        Field('ntp%d' % winding, 12, float, 33, line=line),
+        Field('tab%d' % winding, 13, float, 0, line=line),
+        Field('cr%d' % winding, 14, float, 0.0, line=line),
+        Field('cx%d' % winding, 15, float, 0.0, line=line)]
+    if version in (33, 34):
+        fields.append(Field('cnxa%d' % winding, 16, float, 0.0, line=line))
+    return fields
+
+#bus rows may end with a comment, and must have all fields
+def read_buses(rows, rev):
+    row_length = Bus.get_row_length(rev)
+    records = []
+    for row in rows:
+        if len(row) < row_length or '/' in ''.join(row):
+            row = pad_row(row, row_length)
+        records.append([row])
+
+    return read_records(lambda: Bus(rev), records, Bus.get_fields(rev))
+
+def read_generators(rows, rev):
+    records = []
+    for row in rows:
+        if len(row) < 16:
+            print('error: data missing from generator')
+        else:
+            records.append([row])
+
+    return read_records(Generator, records, Generator.get_fields(rev))
+
 class Area:
 
     def __init__(self):
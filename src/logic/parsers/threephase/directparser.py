@@ -0,0 +1,691 @@
+import cmath
+from itertools import count
+import math
+import numpy as np
+from logic.networkmodel import DxNetworkModel
+from logic.parsers.threephase.threephaseparser import ThreePhaseParser
+from logic.parsers.threephase.transformerparser import TransformerParser
+from ditto.readers.gridlabd.read import read_gld_objects_and_schedules, parse_line_length, convert_Z_matrix_per_mile_to_per_meter, remove_nonnum, shared_config_objects
+from ditto.readers.gridlabd.helpers import parse_phases
+from ditto.readers.gridlabd.line_impedance import compute_overhead_capacitance, compute_overhead_impedance, compute_underground_impedance, compute_triplex_impedance, compute_overhead_spacing, compute_underground_spacing, try_load_direct_line_impedance, try_load_direct_line_capacitance, compute_underground_capacitance
+from models.singlephase.bus import GROUND
+from models.singlephase.capacitor import Capacitor, CapacitorMode, CapSwitchState
+from models.singlephase.fuse import Fuse, FuseStatus
+from models.singlephase.load import Load
+from models.singlephase.regulator import RegControl, RegType, Regulator
+from models.singlephase.slack import Slack
+from models.singlephase.switch import Switch, SwitchStatus
+from models.threephase.unbalanced_line import UnbalancedLine
+
+GLM_PARSER_DITTO = "ditto"
+GLM_PARSER_DIRECT = "direct"
+
+#Connections a load can specify properties for, in the order they are read.
+LOAD_CONNECTIONS = ["A", "B", "C", "AB", "BC", "CA", "1", "2", "12"]
+DELTA_LOAD_CONNECTIONS = {"A": "AB", "B": "BC", "C": "CA"}
+
+#A conductor of a line, with the properties the line impedance calculations read.
+#Defaults match the DiTTo Wire model.
+class LineWire:
+    def __init__(self, phase) -> None:
+        self.phase = phase
+        self.X = None
+        self.Y = None
+        self.diameter = None
+        self.gmr = None
+        self.resistance = None
+        self.insulation_thickness = 0.0
+        self.is_open = None
+        self.concentric_neutral_gmr = None
+        self.concentric_neutral_resistance = None
+        self.concentric_neutral_diameter = None
+        self.concentric_neutral_nstrand = None
+
+#Plain stand-ins for the DiTTo transformer models, with only what TransformerParser reads.
+class TransformerWinding:
+    def __init__(self, phases) -> None:
+        self.connection_type = None
+        self.nominal_voltage = None
+        self.voltage_limit = None
+        self.resistance = None
+        self.rated_power = None
+        self.phase_windings = [TransformerPhaseWinding(phase) for phase in phases]
+
+class TransformerPhaseWinding:
+    def __init__(self, phase) -> None:
+        self.phase = phase
+
+class TransformerModel:
+    def __init__(self, name, obj, phases) -> None:
+        self.name = name
+        self.from_element = obj.get("from")
+        self.to_element = obj.get("to")
+        self.phases = phases
+        self.is_center_tap = False
+        self.phase_shift = None
+        self.reactances = []
+        self.windings = []
+
+#Builds a DxNetworkModel straight from the GridLAB-D objects of a glm file.
+#
+#ThreePhaseParser goes through the DiTTo reader, which turns every object into traitlets models in a Store
+#before they are converted. The traitlets models are by far the largest part of the loading time on large
+#feeders. This parser reads the same properties, with the same defaults, from the parsed glm records and
+#creates the network elements directly. It produces the same network as ThreePhaseParser.
+class DirectThreePhaseParser(ThreePhaseParser):
+    def parse(self):
+        self._bus_index = count(0)
+
+        self.all_gld_objects, self.all_schedules = read_gld_objects_and_schedules(self.input_file_path)
+
+        simulation_state = DxNetworkModel()
+        self.transformerhandler = TransformerParser(self)
+        self.line_parameters = {}
+
+        elements = []
+        for (name, obj) in self.all_gld_objects.items():
+            obj_type = obj.obj_class
+
+            if obj_type in shared_config_objects:
+                continue
+
+            # Kept as ditto's reader evaluates it, for parity between the parsers: any object with power_1 or
+            # power_2 (not only triplex meters) becomes a triplex load, and so does every triplex node. This is a
+            # known misclassification, asserted for both parsers by test_object_with_power_1_is_a_triplex_load;
+            # fix it in both parsers together.
+            if (obj_type == "triplex_node") or (obj_type == "triplex_meter" and "power_12" in obj) or ("power_1" in obj) or ("power_2" in obj):
+                # Actually a triplex load.
+                obj_type = "triplex_load"
+
+            phases, is_delta, is_triplex = parse_phases(obj["phases"], name)
+
+            elements.append((obj_type, name, obj, phases))
+
+        self.create_buses(simulation_state, elements)
+
+        for (obj_type, name, obj, phases) in elements:
+            if obj_type == "transformer":
+                self.create_transformer(name, obj, phases, simulation_state)
+            elif obj_type == "load" or obj_type == "triplex_load":
+                self.create_load(name, obj, simulation_state)
+            elif obj_type == "fuse":
+                self.create_fuse(obj, phases, simulation_state)
+            elif obj_type == "switch" or obj_type == "recloser":
+                self.create_switch(obj, phases, simulation_state)
+            elif obj_type == "overhead_line" or obj_type == "triplex_line" or obj_type == "underground_line":
+                self.create_line(obj_type, name, obj, simulation_state)
+            elif obj_type == "capacitor":
+                self.create_capacitor(obj, phases, simulation_state)
+            elif obj_type == "regulator":
+                self.create_regulator(obj, phases, simulation_state)
+            elif not obj_type in ["node", "meter", "triplex_node", "triplex_meter"]:
+                raise Exception(f"Unhandled object type {obj_type}!")
+
+        return simulation_state
+
+    def create_buses(self, simulation_state: DxNetworkModel, elements):
+        v_mag = None
+        v_ang = None
+
+        for (obj_type, name, obj, phases) in elements:
+            is_slack = False
+            voltages = {}
+
+            if obj_type == "node" or obj_type == "meter":
+                is_slack = obj.get("bustype") == "SWING"
+                if "S" in obj["phases"]:
+                    raise Exception(f"Triplex is indicated on a non-triplex node. {name}")
+                for phase in ["A", "B", "C"]:
+                    if "voltage_" + phase in obj:
+                        voltages[phase] = complex(obj["voltage_" + phase])
+                parent = obj.get("parent")
+            elif obj_type == "triplex_meter":
+                if not "S" in obj["phases"]:
+                    raise Exception(f"Triplex is not indicated in phase information on a triplex node or meter. (obj:{name})")
+                phases = ["1", "2"]
+                parent = obj.get("parent")
+            elif obj_type == "load" or obj_type == "triplex_load":
+                #Loads without a parent are buses of their own.
+                if "parent" in obj:
+                    continue
+                phases = self.get_load_phases(obj)[0]
+                parent = None
+            else:
+                continue
+
+            nominal_voltage = float(obj["nominal_voltage"]) if "nominal_voltage" in obj else None
+
+            for phase in phases:
+                if not phase in self._phase_to_angle:
+                    continue
+
+                if parent is not None:
+                    #For now, just map any child nodes back to their parent.
+                    bus = simulation_state.bus_name_map[parent + "_" + phase]
+                    simulation_state.bus_name_map[name + "_" + phase] = bus
+                else:
+                    v_mag = nominal_voltage
+                    v_ang = self._phase_to_angle[phase]
+
+                    #For L1 and L2 on triplex, we always use the nominal magnitude and phase for v_init.
+                    if phase in voltages:
+                        v_mag = abs(voltages[phase])
+                        v_ang = cmath.phase(voltages[phase])
+
+                    bus = self.create_bus(simulation_state, v_mag, v_ang, name, phase, False)
+
+                    if phase == "1":
+                        bus.Vr_init = -60.0
+                        bus.Vi_init = 103.92
+                    elif phase == "2":
+                        bus.Vr_init = 60.0
+                        bus.Vi_init = -103.92
+
+                if is_slack:
+                    slack = Slack(bus, v_mag, v_ang, 0, 0)
+                    simulation_state.slack.append(slack)
+
+    #Returns the (phases, is_delta, triplex_phase) of a load.
+    def get_load_phases(self, obj):
+        phase_str = obj["phases"].strip('"').strip('|')
+        is_delta = False
+        triplex_phase = None
+
+        if "S" in phase_str:
+            #S means that it's split phase/triplex
+            triplex_phase = phase_str[0]
+            phase_str = "12"
+        elif "D" in phase_str:
+            is_delta = True
+
+        phases = [phase for phase in phase_str if phase in ["A", "B", "C", "1", "2"]]
+
+        return (phases, is_delta, triplex_phase)
+
+    def create_load(self, name, obj, simulation_state: DxNetworkModel):
+        _, is_delta, triplex_phase = self.get_load_phases(obj)
+
+        connecting_element = obj["parent"] if "parent" in obj else name
+        load_num = name.split("_")[-1]
+
+        for connection in LOAD_CONNECTIONS:
+            for (phase, p, q, z, model) in self.parse_phase_loads(obj, connection, is_delta):
+                from_bus = simulation_state.bus_name_map[connecting_element + "_" + phase[0]]
+
+                if len(phase) == 1:
+                    to_bus = GROUND
+                else:
+                    to_bus = simulation_state.bus_name_map[connecting_element + "_" + phase[1]]
+
+                if model == 1 and p == 0 and q == 0:
+                    continue
+                elif model == 2 and z == 0:
+                    continue
+
+                pq_load = Load(from_bus, to_bus, p, q, z, 0, 0, 0, 0, load_num, phase, triplex_phase)
+                simulation_state.loads.append(pq_load)
+
+    #Yields (phase, p, q, z, model) for each load specified on one connection, model being the OpenDSS load
+    #model number. Unless ZIP is specified, only one of constant power, current and impedance is expected.
+    def parse_phase_loads(self, obj, connection, is_delta):
+        phase = DELTA_LOAD_CONNECTIONS.get(connection) if is_delta else connection
+
+        #The spec says `constant_power_X`...but a bunch of files don't conform.
+        for prefix in ["power_", "constant_power_"]:
+            if prefix + connection in obj:
+                complex_power = complex(obj[prefix + connection])
+                if complex_power.real != 0:
+                    yield (phase, complex_power.real, complex_power.imag, complex(0, 0), 1)
+
+        for prefix in ["impedance_", "constant_impedance_"]:
+            if prefix + connection in obj:
+                yield (phase, 0, 0, complex(obj[prefix + connection]), 2)
+
+        if "constant_current_" + connection in obj and "voltage_" + connection in obj:
+            complex_current = complex(obj["constant_current_" + connection])
+            complex_voltage = complex(obj["voltage_" + connection])
+            power = complex_voltage * complex_current.conjugate()
+            if complex_current.real != 0:
+                yield (phase, power.real, power.imag, complex(0, 0), 5)
+
+        if "base_power_" + connection in obj:
+            p = 0
+            try:
+                p = float(obj["base_power_" + connection])
+            except ValueError:
+                #A scheduled load, e.g. "residential*1.25"
+                data = obj["base_power_" + connection].split("*")
+                if data[0] in self.all_schedules:
+                    p = float(self.all_schedules[data[0]]) * float(data[1])
+                if data[1] in self.all_schedules:
+                    p = float(self.all_schedules[data[1]]) * float(data[0])
+
+            # Require all six elements to compute the ZIP load model
+            zip_properties = ["current_fraction_", "current_pf_", "power_fraction_", "power_pf_", "impedance_fraction_", "impedance_pf_"]
+            if all(zip_property + connection in obj for zip_property in zip_properties):
+                # Validation only: Load has no ZIP model, so base_power is solved as constant power and the
+                # fractions are dropped (ditto's reader computes them, but nothing reads them). A value that
+                # is not a number fails with a ValueError, as it does in ditto's reader.
+                for zip_property in zip_properties:
+                    float(obj[zip_property + connection])
+                yield (phase, p, 0, complex(0, 0), 1)
+
+    def create_transformer(self, name, obj, phases, simulation_state: DxNetworkModel):
+        model = TransformerModel(name, obj, phases)
+
+        winding1 = TransformerWinding(phases)
+        winding2 = TransformerWinding(phases)
+        winding3 = TransformerWinding([])
+        num_windings = 2
+
+        config = self.all_gld_objects.get(obj["configuration"]) if "configuration" in obj else None
+        if config is not None:
+            # Even though the transformer may be ABCN, (ie there's a neutral on the wire) we assume a delta primary doesn't connect the the neutral wire.
+            if "connect_type" in config:
+                conn = str(config["connect_type"])
+                if conn == '1' or conn == "WYE_WYE":
+                    winding1.connection_type = "Y"
+                    winding2.connection_type = "Y"
+                if conn == '2' or conn == "DELTA_DELTA":
+                    winding1.connection_type = "D"
+                    winding2.connection_type = "D"
+                if conn == '3' or conn == "DELTA_GWYE":
+                    winding1.connection_type = "D"
+                    winding2.connection_type = "Y"
+                if conn == '5' or conn == "SINGLE_PHASE_CENTER_TAPPED":
+                    model.is_center_tap = True
+                    num_windings = 3
+                    winding2.phase_windings[0].phase = "1"
+                    winding3.phase_windings.append(TransformerPhaseWinding("2"))
+
+            if "shunt_impedance" in config:
+                model.shunt_impedance = complex(config["shunt_impedance"])
+
+            if "primary_voltage" in config:
+                winding1.nominal_voltage = parse_voltage(config["primary_voltage"])
+
+            if "secondary_voltage" in config:
+                winding2.nominal_voltage = parse_voltage(config["secondary_voltage"])
+                if num_windings == 3:
+                    # To indicate the 180 degree phase shift
+                    winding3.nominal_voltage = -float(remove_nonnum.sub('', config["secondary_voltage"]))
+
+            if "resistance" in config:
+                resistance = float(config["resistance"])
+                winding1.resistance = resistance / 2.0
+                if num_windings == 2:
+                    winding2.resistance = resistance / 2.0
+                else:
+                    # Using power flow approximation from "Electric Power Distribution Handbook" by Short page 188
+                    winding2.resistance = resistance
+                    winding3.resistance = resistance
+
+            model.reactances = self.get_transformer_reactances(config, num_windings, winding1, winding2, winding3)
+
+            self.set_transformer_power_rating(config, num_windings, winding1, winding2, winding3)
+
+        model.windings = [winding1, winding2]
+        if num_windings == 3:
+            model.windings.append(winding3)
+
+        self.transformerhandler.create_transformer(model, simulation_state)
+
+    def get_transformer_reactances(self, config, num_windings, winding1, winding2, winding3):
+        reactances = []
+
+        if "reactance" in config:
+            reactance = float(config["reactance"])
+            reactances.append(reactance)
+            if num_windings == 3:
+                if "impedance1" in config:
+                    reactances.append(complex(config["impedance1"]).imag)
+                if "impedance1" in config and "impedance2" in config:
+                    reactances.append(complex(config["impedance2"]).imag)
+                else:
+                    # Using power flow approximation from "Electric Power Distribution Handbook" by Short page 188
+                    reactances[0] = 0.8 * reactance
+                    reactances.append(0.4 * reactance)
+                    reactances.append(0.4 * reactance)
+        elif "impedance" in config:
+            impedance = complex(config["impedance"])
+            winding1.resistance = impedance.real / 2.0
+            if num_windings == 2:
+                winding2.resistance = impedance.real / 2.0
+                reactances.append(impedance.imag)
+            else:
+                winding2.resistance = impedance.real
+                winding3.resistance = impedance.real
+                reactances.append(0.8 * impedance.imag)
+                reactances.append(0.4 * impedance.imag)
+                reactances.append(0.4 * impedance.imag)
+
+        return reactances
+
+    def set_transformer_power_rating(self, config, num_windings, winding1, winding2, winding3):
+        if "power_rating" in config:
+            ratings = [float(remove_nonnum.sub('', config["power_rating"])) * 1e3]
+        else:
+            #Todo: why do we add up all the powers for A, B, and C?
+            ratings = []
+            for phase in ["A", "B", "C"]:
+                rating_name = f"power{phase}_rating"
+                if rating_name in config:
+                    rating = config[rating_name]
+                    if rating.find('kVA') != -1:
+                        rating = remove_nonnum.sub('', rating)
+                    ratings.append(float(rating) * 1000)
+
+        power_rating = 0
+        for rating in ratings:
+            power_rating += rating
+            winding1.rated_power = power_rating
+            if num_windings == 3:
+                winding2.rated_power = power_rating / 2.0
+                winding3.rated_power = power_rating / 2.0
+            else:
+                winding2.rated_power = power_rating
+
+    def create_fuse(self, obj, phases, simulation_state: DxNetworkModel):
+        current_limit = float(remove_nonnum.sub('', obj["current_limit"]))
+
+        for (phase, _) in self.get_switched_phases(obj, phases, "_status", ["BLOWN", "OPEN"]):
+            from_bus = simulation_state.bus_name_map[obj["from"] + "_" + phase]
+            to_bus = simulation_state.bus_name_map[obj["to"] + "_" + phase]
+
+            fuse_bus = self.create_bus(simulation_state, 0.1, 0.1, f"{from_bus.NodeName}-Fuse", phase, True)
+
+            fuse = Fuse(from_bus, to_bus, fuse_bus, current_limit, FuseStatus.GOOD, phase)
+
+            simulation_state.fuses.append(fuse)
+
+    def create_switch(self, obj, phases, simulation_state: DxNetworkModel):
+        #todo: implement recloser operations.
+        for (phase, is_open) in self.get_switched_phases(obj, phases, "_state", ["OPEN"]):
+            if not phase in phases:
+                continue
+
+            from_bus = simulation_state.bus_name_map[obj["from"] + "_" + phase]
+            to_bus = simulation_state.bus_name_map[obj["to"] + "_" + phase]
+
+            switch = Switch(from_bus, to_bus, SwitchStatus.OPEN if is_open else SwitchStatus.CLOSED, phase)
+
+            simulation_state.switches.append(switch)
+
+    #Returns (phase, is_open) for each phase of a fuse or switch: the phases with a phase_X_status (or
+    #phase_X_state) property, otherwise the object's phases with its status. Like the DiTTo reader, only
+    #the first phase is kept (closed) when the object has no status either.
+    def get_switched_phases(self, obj, phases, status_suffix, open_states):
+        switched_phases = []
+        for phase in ["A", "B", "C"]:
+            status_name = f"phase_{phase}{status_suffix}"
+            if status_name in obj:
+                switched_phases.append((phase, obj[status_name] in open_states))
+
+        if len(switched_phases) > 0:
+            return switched_phases
+
+        if "status" in obj:
+            return [(phase, obj["status"] == "OPEN") for phase in phases]
+
+        return [(phase, False) for phase in phases[:1]]
+
+    def get_overhead_line_parameters(self, name, config):
+
+        conductors = {}
+        for phase in ["A", "B", "C", "N"]:
+            if "conductor_" + phase in config:
+                wire = LineWire(phase)
+                conductor = self.all_gld_objects[config["conductor_" + phase]]
+
+                wire.diameter = float(conductor["diameter"]) if "diameter" in conductor else 0.5
+
+                if "geometric_mean_radius" in conductor:
+                    gmr = conductor["geometric_mean_radius"]
+                    if gmr.find('cm') != -1:
+                        wire.gmr = float(remove_nonnum.sub('', gmr)) / 30.48 # convert cm to feet
+                    else:
+                        wire.gmr = float(gmr)
+
+                if "resistance" in conductor:
+                    wire.resistance = parse_resistance(conductor["resistance"])
+
+                conductors[wire] = config["conductor_" + phase]
+
+        distances = compute_overhead_spacing(self.get_spacing(name, config), conductors) # sets conductor.X and Y values in meters for 4 wire setups
+
+        wire_list = list(conductors.keys())
+
+        impedance_matrix = try_load_direct_line_impedance(config)
+        if impedance_matrix == None:
+            striped_distances = distances[:,~np.all(distances, axis=0, where=[-1])][~np.all(distances, axis=1, where=[-1]),:]
+            impedance_matrix = compute_overhead_impedance(wire_list, striped_distances)
+
+        capacitance_matrix = try_load_direct_line_capacitance(config)
+        if capacitance_matrix == None:
+            capacitance_matrix = compute_overhead_capacitance(wire_list, distances)
+
+        return (impedance_matrix, capacitance_matrix, wire_list)
+
+    def get_triplex_line_parameters(self, name, config):
+
+        conductors = {}
+        wire = None
+        for phase in ["1", "2", "N"]:
+            if "conductor_" + phase in config:
+                wire = LineWire(phase)
+                conductors[wire] = config["conductor_" + phase]
+
+        # The DiTTo reader sets these on the last conductor of the configuration only.
+        if wire is not None:
+            if "insulation_thickness" in config:
+                wire.insulation_thickness = float(config["insulation_thickness"])
+            if "diameter" in config:
+                wire.diameter = float(config["diameter"])
+
+        for (wire, conductor_name) in conductors.items():
+            conductor = self.all_gld_objects[conductor_name]
+            if "geometric_mean_radius" in conductor:
+                wire.gmr = float(conductor["geometric_mean_radius"])
+            if "resistance" in conductor:
+                wire.resistance = float(conductor["resistance"])
+
+        wire_list = list(conductors.keys())
+
+        impedance_matrix = try_load_direct_line_impedance(config)
+        if impedance_matrix == None:
+            impedance_matrix = compute_triplex_impedance(wire_list)
+
+        return (impedance_matrix, None, wire_list)
+
+    def get_underground_line_parameters(self, name, config):
+
+        conductors = {}
+        for phase in ["A", "B", "C", "N"]:
+            if "conductor_" + phase in config:
+                wire = LineWire(phase)
+                conductor = self.all_gld_objects[config["conductor_" + phase]]
+
+                # Neutral may be concentric for underground cables or may be a separate wire
+                if "outer_diameter" in conductor:
+                    wire.outer_diameter = float(conductor["outer_diameter"]) # inches
+                if "neutral_diameter" in conductor:
+                    wire.concentric_neutral_diameter = float(conductor["neutral_diameter"]) # inches
+                if "neutral_strands" in conductor:
+                    wire.concentric_neutral_nstrand = int(float(conductor["neutral_strands"]))
+                if "conductor_diameter" in conductor:
+                    wire.conductor_diameter = float(conductor["conductor_diameter"]) # inches
+                if "conductor_gmr" in conductor:
+                    wire.gmr = float(conductor["conductor_gmr"])
+                if "conductor_resistance" in conductor:
+                    wire.resistance = parse_resistance(conductor["conductor_resistance"])
+                if "neutral_gmr" in conductor:
+                    wire.concentric_neutral_gmr = float(conductor["neutral_gmr"])
+                if "neutral_resistance" in conductor:
+                    wire.concentric_neutral_resistance = float(conductor["neutral_resistance"])
+
+                conductors[wire] = config["conductor_" + phase]
+
+        spacing = self.get_spacing(name, config)
+        distances = compute_underground_spacing([wire.outer_diameter for wire in conductors], spacing, conductors)
+
+        wire_list = list(conductors.keys())
+
+        impedance_matrix = try_load_direct_line_impedance(config)
+        if impedance_matrix == None:
+            striped_distances = distances[:,~np.all(distances, axis=0, where=[-1])][~np.all(distances, axis=1, where=[-1]),:]
+            impedance_matrix = compute_underground_impedance(wire_list, striped_distances)
+
+        capacitance_matrix = try_load_direct_line_capacitance(config)
+        if capacitance_matrix == None:
+            capacitance_matrix = compute_underground_capacitance(wire_list)
+
+        return (impedance_matrix, capacitance_matrix, wire_list)
+
+    def get_spacing(self, name, config):
+        if not "spacing" in config:
+            raise Exception(f"Line {name} does not have a line spacing")
+
+        return self.all_gld_objects[config["spacing"]]
+
+    def create_line(self, obj_type, name, obj, simulation_state: DxNetworkModel):
+        length = parse_line_length(obj, name)
+        config_name = obj["configuration"]
+
+        #Lines sharing a configuration have the same per meter impedances.
+        if not (obj_type, config_name) in self.line_parameters:
+            config = self.all_gld_objects[config_name]
+            if obj_type == "overhead_line":
+                parameters = self.get_overhead_line_parameters(name, config)
+            elif obj_type == "triplex_line":
+                parameters = self.get_triplex_line_parameters(name, config)
+            else:
+                parameters = self.get_underground_line_parameters(name, config)
+            self.line_parameters[(obj_type, config_name)] = self.convert_line_parameters(*parameters)
+
+        impedances, shunt_admittances, phases = self.line_parameters[(obj_type, config_name)]
+
+        transmission_line = UnbalancedLine(simulation_state, impedances, shunt_admittances, obj.get("from"), obj.get("to"), length, phases)
+        simulation_state.lines.append(transmission_line)
+
+    def convert_line_parameters(self, impedance_matrix, capacitance_matrix, wire_list):
+        impedances = np.array(to_complex_matrix(convert_Z_matrix_per_mile_to_per_meter(impedance_matrix)))
+
+        if capacitance_matrix == None:
+            shunt_admittances = []
+        else:
+            shunt_admittances = to_complex_matrix(convert_Z_matrix_per_mile_to_per_meter(capacitance_matrix))
+
+        phases = [wire.phase for wire in wire_list if wire.phase != 'N']
+
+        return (impedances, shunt_admittances, phases)
+
+    def create_capacitor(self, obj, phases, simulation_state: DxNetworkModel):
+        if "phases_connected" in obj:
+            connected_phases = parse_phases(str(obj["phases_connected"]), obj["name"])[0]
+        else:
+            connected_phases = phases
+
+        # If both volt and Var limits are set use the Volt ones.
+        high = None
+        low = None
+        for (high_name, low_name) in [("VAr_set_high", "VAr_set_low"), ("voltage_set_high", "voltage_set_low")]:
+            if high_name in obj:
+                high = float(obj[high_name])
+                if low_name in obj:
+                    low = float(obj[low_name])
+
+        for phase in ["A", "B", "C"]:
+            if not "capacitor_" + phase in obj or not phase in connected_phases:
+                continue
+
+            var = float(obj["capacitor_" + phase])
+
+            mode = CapacitorMode[obj["control"]]
+            if mode == CapacitorMode.VOLT and (high == None or low == None):
+                #https://github.com/gridlab-d/gridlab-d/blob/9f0a09853280bb3515f8236b8af3192304759650/powerflow/capacitor.cpp#L320-L325
+                mode = CapacitorMode.MANUAL
+
+            parent_bus = simulation_state.bus_name_map[obj["parent"] + '_' + phase]
+            nominal_voltage = float(obj["cap_nominal_voltage"])
+            voltage_angle = self._phase_to_angle[phase]
+            parent_bus.Vr_init = abs(nominal_voltage) * math.cos(voltage_angle)
+            parent_bus.Vi_init = abs(nominal_voltage) * math.sin(voltage_angle)
+
+            capacitor = Capacitor(parent_bus, GROUND, var, nominal_voltage, mode, high, low)
+            if mode == CapacitorMode.MANUAL:
+                #Gridlabd defaults to open.
+                capacitor.switch = CapSwitchState[obj["switch" + phase]] if "switch" + phase in obj else CapSwitchState.OPEN
+
+            simulation_state.capacitors.append(capacitor)
+
+    def create_regulator(self, obj, phases, simulation_state: DxNetworkModel):
+        reg_config = self.all_gld_objects[obj["configuration"]]
+
+        #Phases with tap or compensator settings are regulated even if the regulator doesn't list them.
+        regulated_phases = list(phases)
+        for setting in ["tap_pos_", "compensator_r_setting_", "compensator_x_setting_"]:
+            for phase in ["A", "B", "C"]:
+                if setting + phase in reg_config and not phase in regulated_phases:
+                    regulated_phases.append(phase)
+
+        if len(regulated_phases) != 3:
+            raise Exception("Only 3-phase currently supported")
+        if not "connect_type" in reg_config:
+            # gridlabD only supports a Wye-Wye connected regulator as of Jan 20 2022, so do we
+            raise Exception("Only wye-wye currently supported")
+        if not str(reg_config["connect_type"]) in ["1", "WYE_WYE"]:
+            raise Exception
+
+        raise_taps = int(reg_config["raise_taps"])
+        lower_taps = int(reg_config["lower_taps"])
+
+        ar_step = (float(reg_config["regulation"]) * 2) / (raise_taps + lower_taps)
+        reg_type = RegType[reg_config["Type"] if "Type" in reg_config else "B"]
+        reg_control = RegControl[reg_config["Control"]]
+
+        #https://github.com/gridlab-d/gridlab-d/blob/9f0a09853280bb3515f8236b8af3192304759650/powerflow/regulator.cpp#L251
+        band_center = float(reg_config["band_center"])
+        band_width = float(reg_config["band_width"])
+
+        vlow = band_center - band_width / 2.0
+        vhigh = band_center + band_width / 2.0
+
+        for phase in regulated_phases:
+            from_bus = simulation_state.bus_name_map[obj["from"] + '_' + phase]
+            to_bus = simulation_state.bus_name_map[obj["to"] + '_' + phase]
+
+            tap_position = int(reg_config["tap_pos_" + phase])
+
+            current_bus = self.create_bus(simulation_state, 0.1, 0.1, f"{from_bus.NodeName}-Reg", phase, True)
+
+            regulator = Regulator(
+                from_bus,
+                to_bus,
+                current_bus,
+                tap_position,
+                ar_step,
+                reg_type,
+                reg_control,
+                vlow,
+                vhigh,
+                raise_taps,
+                lower_taps
+                )
+
+            simulation_state.regulators.append(regulator)
+
+def parse_voltage(voltage):
+    if voltage.find('kV') != -1:
+        return float(remove_nonnum.sub('', voltage)) * 1e3
+
+    return float(remove_nonnum.sub('', voltage))
+
+#Resistances are in Ohm/mile, unless given in Ohm/km.
+def parse_resistance(resistance):
+    if resistance.find('Ohm/km') != -1:
+        return float(remove_nonnum.sub('', resistance)) * 1.609344
+
+    return float(resistance)
+
+def to_complex_matrix(matrix):
+    return [[complex(value) for value in row] for row in matrix]
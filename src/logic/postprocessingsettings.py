@@ -6,11 +6,22 @@ class PostProcessingSettings:
         loadfile_end = None,
         artificialswingbus = None,
         negativeload = None,
-        loadfactor = None
+        loadfactor = None,
+        network_file = None,
+        workers = 1,
+        chunk_hours = 24,
+        calculate_residuals = False
         ) -> None:
         self.loadfile_name = loadfile_name
         self.loadfile_start = int(loadfile_start or 0)
         self.loadfile_end = int(loadfile_end or 0)
         self.artificialswingbus = artificialswingbus
         self.negativeload = negativeload
-        self.loadfactor = loadfactor
\ No newline at end of file
+        self.loadfactor = loadfactor
+        #Quasi time series snapshots are spread over this many worker processes, in chunks of chunk_hours.
+        #Each worker loads its own copy of the network from network_file.
+        self.network_file = network_file
+        self.workers = int(workers or 1)
+        self.chunk_hours = int(chunk_hours or 24)
+        #Residuals of each snapshot are only kept when requested, as they need another pass over all elements.
+        self.calculate_residuals = calculate_residuals
\ No newline at end of file
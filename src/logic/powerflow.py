@@ -1,7 +1,9 @@
+import logging
 import math
 import time
+import numpy as np
 from logic.devicecontroller import DeviceController
-from logic.graphanalyzer import GraphAnalyzer
+from logic.graphanalyzer import get_network_islands
 from logic.homotopycontroller import HomotopyController
 from logic.networkloader import NetworkLoader
 from logic.networkmodel import NetworkModel
@@ -9,24 +11,78 @@ from logic.loadfactorpostprocessor import LoadFactorPostProcessor
 from logic.nrsolver import NRSolver
 from logic.powerflowsettings import PowerFlowSettings
 from logic.powerflowresults import PowerFlowResults
+from logic.profiler import PHASE_POWERFLOW, PHASE_RESULTS
 from logic.v_limiting import PositiveSeqVoltageLimiting
 
+logger = logging.getLogger(__name__)
+
 class PowerFlow:
     def __init__(self, network: NetworkModel, settings: PowerFlowSettings = PowerFlowSettings()) -> None:
         self.network = network
         self.settings = settings
 
-    def execute(self) -> PowerFlowResults:
+        #The solver (and the orderings and caches it holds) is kept between executions on the same network.
+        self.device_controller = None
+
+    #v_init optionally warm-starts the solve, e.g. from the solution of a neighbouring load snapshot.
+    def execute(self, v_init = None) -> PowerFlowResults:
+        with self.settings.profiler.section(PHASE_POWERFLOW):
+            return self.__execute(v_init)
+
+    def __execute(self, v_init):
         start_time = time.perf_counter_ns()
 
-        ga = GraphAnalyzer(self.network)
-        island_count = ga.get_island_count() 
-        if island_count != 1:
-            raise Exception(f"Detected multiple network islands. (Count: {island_count})")
+        #Islands are solved independently, but at least one must be connected to a slack bus.
+        islands = get_network_islands(self.network)
+        if islands.energized_count == 0:
+            raise Exception(f"No energized network island. (Count: {islands.count})")
 
         load_factor_post_processor = LoadFactorPostProcessor(self.settings, self.network)
         load_factor_post_processor.set_load_factor()
 
+        if self.device_controller == None:
+            self.device_controller = self.create_device_controller()
+
+        is_success, v_final, iteration_num, tx_percent = self.device_controller.run_powerflow(v_init)
+
+        with self.settings.profiler.section(PHASE_RESULTS):
+            #Device control may have changed the islands (a blown fuse), so they are fetched again.
+            v_final, deenergized_buses = self.__zero_deenergized_buses(v_final)
+
+            end_time = time.perf_counter_ns()
+
+            duration_seconds = (end_time * 1.0 - start_time * 1.0) / math.pow(10, 9)
+
+            return PowerFlowResults(
+                is_success, 
+                iteration_num, 
+                tx_percent,
+                duration_seconds,
+                self.network, 
+                v_final, 
+                self.settings,
+                deenergized_bus_count=len(deenergized_buses)
+                )
+
+    #Buses of islands without a slack bus are not solved, and get a voltage of 0. A solve still succeeds
+    #with de-energized buses, so they are reported, in case the network was disconnected by mistake.
+    def __zero_deenergized_buses(self, v_final):
+        deenergized_indices = get_network_islands(self.network).deenergized_indices
+        if deenergized_indices is None or len(deenergized_indices) == 0:
+            return (v_final, [])
+
+        v_final = np.copy(v_final)
+        v_final[deenergized_indices] = 0
+
+        deenergized = set(deenergized_indices.tolist())
+        deenergized_buses = [bus for bus in self.network.buses if bus.node_Vr in deenergized]
+        if len(deenergized_buses) > 0:
+            node_names = list(dict.fromkeys([bus.NodeName for bus in deenergized_buses]))
+            logger.warning("%d buses are not connected to a slack bus and are de-energized (0 V): %s", len(deenergized_buses), ", ".join([str(name) for name in node_names]))
+
+        return (v_final, deenergized_buses)
+
+    def create_device_controller(self):
         v_limiting = None
         if not self.network.is_three_phase and self.settings.voltage_limiting:
             v_limiting = PositiveSeqVoltageLimiting(self.network)
@@ -35,23 +91,7 @@ class PowerFlow:
 
         homotopy_controller = HomotopyController(self.settings, nrsolver)
 
-        device_controller = DeviceController(self.settings, homotopy_controller)
-
-        is_success, v_final, iteration_num, tx_percent = device_controller.run_powerflow()
-
-        end_time = time.perf_counter_ns()
-
-        duration_seconds = (end_time * 1.0 - start_time * 1.0) / math.pow(10, 9)
-
-        return PowerFlowResults(
-            is_success, 
-            iteration_num, 
-            tx_percent,
-            duration_seconds,
-            self.network, 
-            v_final, 
-            self.settings
-            )
+        return DeviceController(self.settings, homotopy_controller)
 
     
     
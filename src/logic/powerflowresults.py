@@ -6,9 +6,19 @@ import numpy as np
 import pandas as pd
 from logic.networkmodel import NetworkModel
 from logic.powerflowsettings import PowerFlowSettings
+from logic.residualcalculator import calculate_residuals as calculate_network_residuals
+from logic.resultstore import ResultStoreWriter
 from models.optimization.L2infeasibility import L2InfeasibilityOptimization
 from models.singlephase.bus import Bus
 
+OUTPUT_FORMAT_CSV = "csv"
+#A single compressed columnar store (see logic.resultstore) instead of CSV files.
+OUTPUT_FORMAT_STORE = "store"
+
+#The store of a quasi time series has a path of its own, so it does not replace the base case's store.
+def get_quasi_time_series_store_path(outputfilepath):
+    return f"{outputfilepath}_qsts_store"
+
 class GENTYPE:
     PV = "PV"
     Slack = "Slack"
@@ -83,6 +93,48 @@ class LoadResult:
         name = self.type_str
         return f'{self.load.from_bus.Bus},{name},{"{:.2f}".format(self.P)},{"{:.2f}".format(self.Q)}\n'
 
+#Matrix indices needed to read results out of v_final, gathered once per matrix assignment.
+class ResultIndices:
+    def __init__(self, network: NetworkModel):
+        self.matrix_version = network.matrix_version
+
+        self.bus_Vr = np.array([bus.node_Vr for bus in network.buses], dtype=np.int64)
+        self.bus_Vi = np.array([bus.node_Vi for bus in network.buses], dtype=np.int64)
+
+        self.generator_Q = np.array([generator.bus.node_Q for generator in network.generators], dtype=np.int64)
+
+        self.slack_Vr = np.array([slack.bus.node_Vr for slack in network.slack], dtype=np.int64)
+        self.slack_Vi = np.array([slack.bus.node_Vi for slack in network.slack], dtype=np.int64)
+        self.slack_Ir = np.array([slack.slack_Ir for slack in network.slack], dtype=np.int64)
+        self.slack_Ii = np.array([slack.slack_Ii for slack in network.slack], dtype=np.int64)
+
+        self.infeasibility_currents = []
+        if network.optimization != None and isinstance(network.optimization, L2InfeasibilityOptimization):
+            self.infeasibility_currents = network.optimization.infeasibility_currents
+        self.infeasibility_Vr = np.array([current.bus.node_Vr for current in self.infeasibility_currents], dtype=np.int64)
+        self.infeasibility_Vi = np.array([current.bus.node_Vi for current in self.infeasibility_currents], dtype=np.int64)
+        self.infeasibility_Ir = np.array([current.node_Ir_inf for current in self.infeasibility_currents], dtype=np.int64)
+        self.infeasibility_Ii = np.array([current.node_Ii_inf for current in self.infeasibility_currents], dtype=np.int64)
+
+        self.bus_lambda_r = None
+        self.bus_lambda_i = None
+
+    def get_lambda_indices(self, network: NetworkModel):
+        if self.bus_lambda_r is None:
+            self.bus_lambda_r = np.array([bus.node_lambda_Vr for bus in network.buses], dtype=np.int64)
+            self.bus_lambda_i = np.array([bus.node_lambda_Vi for bus in network.buses], dtype=np.int64)
+
+        return (self.bus_lambda_r, self.bus_lambda_i)
+
+def get_result_indices(network: NetworkModel) -> ResultIndices:
+    if network.result_indices is None or network.result_indices.matrix_version != network.matrix_version:
+        network.result_indices = ResultIndices(network)
+
+    return network.result_indices
+
+#Results are stored column-wise in NumPy arrays (one entry per phase bus, load or generator). The
+#BusResult/LoadResult/GeneratorResult objects are only created when the corresponding list is accessed.
+#Residuals are evaluated on first access, against the network as it is at that time.
 class PowerFlowResults:
     def __init__(
         self, 
@@ -92,7 +144,9 @@ class PowerFlowResults:
         duration_sec, 
         network: NetworkModel,
          v_final, 
-         settings: PowerFlowSettings
+         settings: PowerFlowSettings,
+         residuals = None,
+         deenergized_bus_count = 0
          ):
         self.is_success = is_success
         self.iterations = iterations
@@ -101,72 +155,121 @@ class PowerFlowResults:
         self.network = network
         self.v_final = v_final
         self.settings = settings
+        #Buses in islands without a slack bus, which are not solved and have a voltage of 0.
+        self.deenergized_bus_count = deenergized_bus_count
+
+        indices = get_result_indices(network)
+
+        self.bus_V_r = v_final[indices.bus_Vr]
+        self.bus_V_i = v_final[indices.bus_Vi]
+        self.bus_V_mag = np.hypot(self.bus_V_r, self.bus_V_i)
+        self.bus_V_deg = np.where(self.bus_V_mag < 1e-8, 0, np.degrees(np.arctan2(self.bus_V_i, self.bus_V_r)))
+
+        if settings.infeasibility_analysis:
+            lambda_r, lambda_i = indices.get_lambda_indices(network)
+            self.bus_lambda_r = v_final[lambda_r]
+            self.bus_lambda_i = v_final[lambda_i]
+        else:
+            self.bus_lambda_r = None
+            self.bus_lambda_i = None
+
+        #Load values change between quasi time series snapshots, so they are copied.
+        self.load_P = np.array([load.P for load in network.loads], dtype=np.float64)
+        self.load_Q = np.array([load.Q for load in network.loads], dtype=np.float64)
 
-        self.bus_results: List[BusResult]
-        self.bus_results = []
-
-        self.generator_results: List[GeneratorResult]
-        self.generator_results = []
-
-        self.load_results: List[LoadResult]
-        self.load_results = []
-
-        for bus in network.buses:
-            V_r = v_final[bus.node_Vr]
-            V_i = v_final[bus.node_Vi]
-
-            if settings.infeasibility_analysis:
-                lambda_r = v_final[bus.node_lambda_Vr]
-                lambda_i = v_final[bus.node_lambda_Vi]
-            else:
-                lambda_r = None
-                lambda_i = None
-            
-            self.bus_results.append(BusResult(bus, V_r, V_i, lambda_r, lambda_i))
-
-        for generator in self.network.generators:
-            Q = v_final[generator.bus.node_Q]
-            P = generator.P
-
-            self.generator_results.append(GeneratorResult(generator, P, Q, GENTYPE.PV))
-
-        for load in self.network.loads:
-            P = load.P
-            Q = load.Q
-            
-            self.load_results.append(LoadResult(load, P, Q, GENTYPE.PQ))
-
-        for slack in self.network.slack:
-            Vr = v_final[slack.bus.node_Vr]
-            Vi = v_final[slack.bus.node_Vi]
-            slack_Ir = v_final[slack.slack_Ir]
-            slack_Ii = v_final[slack.slack_Ii]
-            P = Vr * slack_Ir
-            Q = Vi * slack_Ii
-            self.generator_results.append(GeneratorResult(slack, P, Q, GENTYPE.Slack))
+        self.generator_P = np.array([generator.P for generator in network.generators], dtype=np.float64)
+        self.generator_Q = v_final[indices.generator_Q]
 
+        self.slack_P = v_final[indices.slack_Vr] * v_final[indices.slack_Ir]
+        self.slack_Q = v_final[indices.slack_Vi] * v_final[indices.slack_Ii]
+
+        self.infeasibility_currents = indices.infeasibility_currents
         if self.network.optimization != None and isinstance(self.network.optimization, L2InfeasibilityOptimization):
-            total_P = 0
-            total_Q = 0
-            for infeasibility_current in self.network.optimization.infeasibility_currents:
-                Vr = v_final[infeasibility_current.bus.node_Vr]
-                Vi = v_final[infeasibility_current.bus.node_Vi]
-                inf_Ir = v_final[infeasibility_current.node_Ir_inf]
-                inf_Ii = v_final[infeasibility_current.node_Ii_inf]
-                P = Vr * inf_Ir
-                if P < 1e-5:
-                    P = 0
-                Q = Vi * inf_Ii
-                if Q < 1e-5:
-                    Q = 0
-
-                total_P += P
-                total_Q += Q
-                self.generator_results.append(GeneratorResult(infeasibility_current, P, Q, GENTYPE.Inf))
-
-            self.infeasibility_totals = (total_P, total_Q)    
-
-        self.max_residual, self.max_residual_index, self.residuals = self.calculate_residuals()        
+            inf_P = v_final[indices.infeasibility_Vr] * v_final[indices.infeasibility_Ir]
+            inf_Q = v_final[indices.infeasibility_Vi] * v_final[indices.infeasibility_Ii]
+            self.infeasibility_P = np.where(inf_P < 1e-5, 0, inf_P)
+            self.infeasibility_Q = np.where(inf_Q < 1e-5, 0, inf_Q)
+            self.infeasibility_totals = (self.infeasibility_P.sum(), self.infeasibility_Q.sum())
+
+        self._bus_results = None
+        self._generator_results = None
+        self._load_results = None
+
+        self._residuals = None
+        self._is_detached = False
+        if residuals is not None:
+            self.__set_residuals(residuals)
+
+    @property
+    def bus_results(self) -> List[BusResult]:
+        if self._bus_results is None:
+            self._bus_results = []
+            for (idx, bus) in enumerate(self.network.buses):
+                lambda_r = None if self.bus_lambda_r is None else self.bus_lambda_r[idx]
+                lambda_i = None if self.bus_lambda_i is None else self.bus_lambda_i[idx]
+                self._bus_results.append(BusResult(bus, self.bus_V_r[idx], self.bus_V_i[idx], lambda_r, lambda_i))
+
+        return self._bus_results
+
+    @property
+    def generator_results(self) -> List[GeneratorResult]:
+        if self._generator_results is None:
+            self._generator_results = []
+            for (idx, generator) in enumerate(self.network.generators):
+                self._generator_results.append(GeneratorResult(generator, self.generator_P[idx], self.generator_Q[idx], GENTYPE.PV))
+
+            for (idx, slack) in enumerate(self.network.slack):
+                self._generator_results.append(GeneratorResult(slack, self.slack_P[idx], self.slack_Q[idx], GENTYPE.Slack))
+
+            for (idx, infeasibility_current) in enumerate(self.infeasibility_currents):
+                self._generator_results.append(GeneratorResult(infeasibility_current, self.infeasibility_P[idx], self.infeasibility_Q[idx], GENTYPE.Inf))
+
+        return self._generator_results
+
+    @property
+    def load_results(self) -> List[LoadResult]:
+        if self._load_results is None:
+            self._load_results = []
+            for (idx, load) in enumerate(self.network.loads):
+                self._load_results.append(LoadResult(load, self.load_P[idx], self.load_Q[idx], GENTYPE.PQ))
+
+        return self._load_results
+
+    @property
+    def residuals(self):
+        return self.__get_residuals()[2]
+
+    @property
+    def max_residual(self):
+        return self.__get_residuals()[0]
+
+    @property
+    def max_residual_index(self):
+        return self.__get_residuals()[1]
+
+    @property
+    def has_residuals(self):
+        return self._residuals is not None or not self._is_detached
+
+    #Called when the network is about to change (the next quasi time series snapshot, for instance).
+    #Residuals are evaluated now if requested, otherwise they become unavailable for this result.
+    def detach(self, keep_residuals = False):
+        if keep_residuals:
+            self.__get_residuals()
+        self._is_detached = True
+
+    def __get_residuals(self):
+        if self._residuals is None:
+            if self._is_detached:
+                raise Exception("Residuals were not calculated before the network changed")
+            self.__set_residuals(self.calculate_residuals()[2])
+
+        return self._residuals
+
+    def __set_residuals(self, residuals):
+        max_residual = np.amax(np.abs(residuals))
+        max_residual_idx = int(np.argmax(np.abs(residuals)))
+        self._residuals = (max_residual, max_residual_idx, residuals)
 
     def display(self, verbose=False):
         print("=====================")
@@ -177,9 +280,15 @@ class PowerFlowResults:
         print(f'Iterations: {self.iterations}')
         print(f'Duration: {"{:.3f}".format(self.duration_sec)}(s)')
 
-        print(f'Max Residual: {self.max_residual:.3g} [Index: {self.max_residual_index}]')
+        if self.deenergized_bus_count > 0:
+            print(f'De-energized buses: {self.deenergized_bus_count}')
 
-        if verbose:
+        if self.has_residuals:
+            print(f'Max Residual: {self.max_residual:.3g} [Index: {self.max_residual_index}]')
+        else:
+            print('Max Residual: not calculated')
+
+        if verbose and self.has_residuals:
             for idx in range(len(self.residuals)):
                 print(f'Residual {idx}: {self.residuals[idx]:.3g}')
 
@@ -212,28 +321,22 @@ class PowerFlowResults:
             print(load)
 
     def calculate_residuals(self):
-        all_elements = self.network.get_NR_invariant_elements() + self.network.get_NR_variable_elements()
-
-        residual_contributions = []
-        for element in all_elements:
-            element_residuals = element.calculate_residuals(self.network, self.v_final)
-            for (index, value) in element_residuals.items():
-                residual_contributions.append((element, index, value))
-
-        if self.network.optimization != None:
-            element_residuals = self.network.optimization.calculate_residuals(self.network, self.v_final)
-            for (index, value) in element_residuals.items():
-                residual_contributions.append((self.network.optimization, index, value))
-
-        residuals = np.zeros(len(self.v_final))
-        for (element, index, value) in residual_contributions:
-            residuals[index] += value
+        residuals = calculate_network_residuals(self.network, self.settings, self.v_final)
 
         max_residual = np.amax(np.abs(residuals))
         max_residual_idx = int(np.argmax(np.abs(residuals)))
 
         return (max_residual, max_residual_idx, residuals)
 
+    #Returns {element class name: residual contributions of those elements}. The contributions sum to the residuals.
+    def calculate_residual_breakdown(self):
+        if self._is_detached:
+            raise Exception("Residuals can't be broken down after the network changed")
+
+        _, breakdown = calculate_network_residuals(self.network, self.settings, self.v_final, by_element_type=True)
+
+        return breakdown
+
     def report_infeasible(self):
         results = []
 
@@ -247,10 +350,17 @@ class PowerFlowResults:
 
         return results
 
-    def output(self, outputfilepath):
+    def output(self, outputfilepath, output_format = OUTPUT_FORMAT_CSV):
         if not outputfilepath:
             return
 
+        if output_format == OUTPUT_FORMAT_STORE:
+            with ResultStoreWriter(f"{outputfilepath}_store") as writer:
+                writer.append(0, self)
+            return
+        elif output_format != OUTPUT_FORMAT_CSV:
+            raise Exception(f"Unknown output format {output_format}")
+
         voltagefilepath=Path(f"{outputfilepath}_voltage.csv")
         powerfilepath=Path(f"{outputfilepath}_power.csv")
         
@@ -285,9 +395,15 @@ class QuasiTimeSeriesResults:
             pf_result.display(verbose)
             print("---------------------")
     
-    def output(self, outputfilepath):
+    def output(self, outputfilepath, output_format = OUTPUT_FORMAT_CSV):
         if not outputfilepath:
             return
 
+        if output_format == OUTPUT_FORMAT_STORE:
+            with ResultStoreWriter(get_quasi_time_series_store_path(outputfilepath)) as writer:
+                for hour, pf_result in self.powerflow_snapshot_results.items():
+                    writer.append(hour, pf_result)
+            return
+
         for hour, pf_result in self.powerflow_snapshot_results.items():
-            pf_result.output(f"{outputfilepath}_{hour}")
\ No newline at end of file
+            pf_result.output(f"{outputfilepath}_{hour}", output_format)
\ No newline at end of file
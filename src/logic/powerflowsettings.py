@@ -1,3 +1,6 @@
+from logic.convergencemonitor import ConvergenceMonitor
+from logic.profiler import NullProfiler, Profiler
+
 class PowerFlowSettings:
     def __init__(
         self, 
@@ -7,10 +10,24 @@ class PowerFlowSettings:
         debug = False, 
         flat_start = False, 
         tx_stepping = False, 
+        adaptive_tx_stepping = True,
         infeasibility_analysis = False,
         dump_matrix = False,
         device_control = True,
-        load_factor = None
+        load_factor = None,
+        reuse_matrix_pattern = True,
+        linear_solver = "splu",
+        factor_reuse_iterations = 0,
+        stamping_backend = "python",
+        cache_linear_stamps = True,
+        incremental_device_control = False,
+        glm_parser = "ditto",
+        network_cache = False,
+        network_cache_dir = None,
+        profile = False,
+        iteration_callback = None,
+        convergence_monitor = None,
+        line_search = False
         ) -> None:
         self.tolerance = tolerance
         self.max_iters = max_iters
@@ -18,7 +35,31 @@ class PowerFlowSettings:
         self.debug = debug
         self.flat_start = flat_start
         self.tx_stepping = tx_stepping
+        self.adaptive_tx_stepping = adaptive_tx_stepping
         self.infeasibility_analysis = infeasibility_analysis
         self.dump_matrix = dump_matrix
         self.device_control = device_control
-        self.load_factor = load_factor
\ No newline at end of file
+        self.load_factor = load_factor
+        self.reuse_matrix_pattern = reuse_matrix_pattern
+        self.linear_solver = linear_solver
+        self.factor_reuse_iterations = factor_reuse_iterations
+        self.stamping_backend = stamping_backend
+        self.cache_linear_stamps = cache_linear_stamps
+        self.incremental_device_control = incremental_device_control
+        self.glm_parser = glm_parser
+        self.network_cache = network_cache
+        #Where the network cache keeps its files, by default a per-user directory (see logic.networkcache).
+        self.network_cache_dir = network_cache_dir
+
+        #Phase timings and solver counters, see logic.profiler.
+        self.profiler = Profiler() if profile else NullProfiler()
+
+        #Called with the NRIteration (see logic.nrsolver) of every NR iteration.
+        self.iteration_callback = iteration_callback
+
+        #Stops hopeless NR solves early, see logic.convergencemonitor. A NullConvergenceMonitor runs every
+        #solve to max_iters.
+        self.convergence_monitor = ConvergenceMonitor() if convergence_monitor is None else convergence_monitor
+
+        #Damped Newton: steps that do not reduce the residual norm are halved until they do.
+        self.line_search = line_search
\ No newline at end of file
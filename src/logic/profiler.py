@@ -0,0 +1,167 @@
+import json
+import os
+import time
+from pathlib import Path
+
+#Phases of a solve, as recorded by the loader and the solver.
+PHASE_PARSE = "parse"
+PHASE_ASSIGN_MATRIX = "assign_matrix"
+PHASE_POWERFLOW = "powerflow"
+PHASE_NR_SOLVE = "nr_solve"
+PHASE_LINEAR_STAMP = "linear_stamp"
+PHASE_NONLINEAR_STAMP = "nonlinear_stamp"
+PHASE_TO_MATRIX = "to_matrix"
+PHASE_LINEAR_SOLVE = "linear_solve"
+PHASE_CONVERGENCE_CHECK = "convergence_check"
+PHASE_DEVICE_CONTROL = "device_control"
+PHASE_RESULTS = "results"
+
+TRACE_VERSION = 1
+
+#Records how long each phase of loading and solving a network takes, how often it runs, and a few counters
+#(NR iterations, factorizations) and metrics (matrix size, nonzeros, fill-in of the factors).
+#
+#Enabled with PowerFlowSettings(profile=True), which puts a Profiler on settings.profiler. Otherwise that is
+#a NullProfiler, whose sections do nothing, so the instrumented code paths cost no more than a method call.
+class Profiler:
+    def __init__(self) -> None:
+        self.start_ns = time.perf_counter_ns()
+
+        #(phase, start in ns since start_ns, duration in ns, nesting depth), in the order the phases ended.
+        self.events = []
+        self.depth = 0
+
+        self.counters = {}
+        #name: [(time in ns since start_ns, value), ...]
+        self.metrics = {}
+
+    @property
+    def is_enabled(self):
+        return True
+
+    #Times a phase, as in `with profiler.section(PHASE_LINEAR_SOLVE): ...`. Sections may be nested.
+    def section(self, phase):
+        return ProfilerSection(self, phase)
+
+    def count(self, counter, amount = 1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def record(self, metric, value):
+        if not metric in self.metrics:
+            self.metrics[metric] = []
+        self.metrics[metric].append((time.perf_counter_ns() - self.start_ns, value))
+
+    def reset(self):
+        self.__init__()
+
+    #Returns {"phases": {phase: {count, total, mean, max}}, "counters": {...}, "metrics": {metric: {last, max}}},
+    #with times in seconds. Phases are in order of their first occurrence.
+    def get_summary(self):
+        phases = {}
+        for (phase, _, duration_ns, _) in sorted(self.events, key=lambda event: event[1]):
+            if not phase in phases:
+                phases[phase] = {"count": 0, "total": 0.0, "max": 0.0}
+            seconds = duration_ns / 1e9
+            phases[phase]["count"] += 1
+            phases[phase]["total"] += seconds
+            phases[phase]["max"] = max(phases[phase]["max"], seconds)
+
+        for summary in phases.values():
+            summary["mean"] = summary["total"] / summary["count"]
+
+        metrics = {}
+        for (metric, values) in self.metrics.items():
+            metrics[metric] = {"last": values[-1][1], "max": max([value for (_, value) in values])}
+
+        return {"phases": phases, "counters": dict(self.counters), "metrics": metrics}
+
+    def display(self):
+        summary = self.get_summary()
+
+        print("=====================")
+        print("Profile:")
+        for (phase, phase_summary) in summary["phases"].items():
+            print(f'{phase}: {phase_summary["total"]:.4f}s ({phase_summary["count"]} times, mean {phase_summary["mean"] * 1000:.3f}ms)')
+
+        for (counter, value) in summary["counters"].items():
+            print(f'{counter}: {value}')
+
+        for (metric, metric_summary) in summary["metrics"].items():
+            print(f'{metric}: {metric_summary["last"]:.6g} (max {metric_summary["max"]:.6g})')
+
+    #The summary plus every recorded event, as JSON.
+    def output_json(self, filepath):
+        trace = {
+            "version": TRACE_VERSION,
+            "summary": self.get_summary(),
+            "events": [
+                {"phase": phase, "start": start_ns / 1e9, "duration": duration_ns / 1e9, "depth": depth}
+                for (phase, start_ns, duration_ns, depth) in sorted(self.events, key=lambda event: event[1])
+            ],
+            "metrics": dict([(metric, [[time_ns / 1e9, value] for (time_ns, value) in values]) for (metric, values) in self.metrics.items()])
+        }
+
+        write_json(filepath, trace)
+
+    #The events in the Chrome trace event format, which chrome://tracing, Perfetto and speedscope open.
+    def output_chrome_trace(self, filepath):
+        pid = os.getpid()
+
+        trace_events = []
+        for (phase, start_ns, duration_ns, _) in sorted(self.events, key=lambda event: event[1]):
+            trace_events.append({"name": phase, "ph": "X", "ts": start_ns / 1e3, "dur": duration_ns / 1e3, "pid": pid, "tid": 0})
+
+        for (metric, values) in self.metrics.items():
+            for (time_ns, value) in values:
+                trace_events.append({"name": metric, "ph": "C", "ts": time_ns / 1e3, "pid": pid, "args": {metric: value}})
+
+        write_json(filepath, {"traceEvents": trace_events, "displayTimeUnit": "ms"})
+
+class ProfilerSection:
+    def __init__(self, profiler: Profiler, phase) -> None:
+        self.profiler = profiler
+        self.phase = phase
+        self.start_ns = None
+
+    def __enter__(self):
+        self.profiler.depth += 1
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end_ns = time.perf_counter_ns()
+        self.profiler.depth -= 1
+        self.profiler.events.append((self.phase, self.start_ns - self.profiler.start_ns, end_ns - self.start_ns, self.profiler.depth))
+        return False
+
+#Stands in for a Profiler when profiling is off.
+class NullProfiler:
+    @property
+    def is_enabled(self):
+        return False
+
+    def section(self, phase):
+        return NULL_SECTION
+
+    def count(self, counter, amount = 1):
+        pass
+
+    def record(self, metric, value):
+        pass
+
+    def reset(self):
+        pass
+
+class NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+NULL_SECTION = NullSection()
+
+def write_json(filepath, contents):
+    Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, "w") as f:
+        json.dump(contents, f)
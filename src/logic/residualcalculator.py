@@ -0,0 +1,75 @@
+from collections import defaultdict
+import numpy as np
+from logic.batchstamper import STAMPING_BACKEND_NUMBA, BatchStamper
+from logic.jitkernels import is_jit_available
+from logic.matrixbuilder import MatrixBuilder
+from logic.networkmodel import NetworkModel
+from logic.powerflowsettings import PowerFlowSettings
+
+#Key of the optimization's contribution in a residual breakdown.
+OPTIMIZATION_KEY = "optimization"
+
+#Evaluates the residuals of the network equations at v in one vectorized pass.
+#
+#The stamps of an NR iteration at v linearize every equation around v: the J entries hold the equation
+#minus its derivatives times v, so the residuals are exactly Y(v) @ v - J(v). Y and J are stamped at v
+#with tx_factor 0, through the batched segment kernels.
+#
+#With by_element_type, also returns {element class name: residual contributions}, which sum to the residuals.
+#
+#The equations of de-energized islands are not evaluated (their loads are undefined at zero voltage), and
+#get zero residuals.
+def calculate_residuals(network: NetworkModel, settings: PowerFlowSettings, v, by_element_type = False):
+    elements = network.get_NR_invariant_elements() + network.get_NR_variable_elements()
+
+    deenergized_indices = None
+    if network.islands is not None and network.islands.deenergized_indices is not None:
+        deenergized_indices = network.islands.deenergized_indices
+        #The islands are independent, so any finite values will do for the other islands' residuals.
+        v = np.copy(v)
+        v[deenergized_indices] = 1
+
+    if not by_element_type:
+        return clear_residuals(stamp_residuals(network, settings, v, elements, True), deenergized_indices)
+
+    elements_by_type = defaultdict(list)
+    for element in elements:
+        elements_by_type[type(element).__name__].append(element)
+
+    breakdown = {}
+    for (element_type, type_elements) in elements_by_type.items():
+        breakdown[element_type] = clear_residuals(stamp_residuals(network, settings, v, type_elements, False), deenergized_indices)
+
+    if network.optimization != None:
+        breakdown[OPTIMIZATION_KEY] = clear_residuals(stamp_residuals(network, settings, v, [], True), deenergized_indices)
+
+    residuals = np.zeros(len(v))
+    for contribution in breakdown.values():
+        residuals += contribution
+
+    return (residuals, breakdown)
+
+def stamp_residuals(network: NetworkModel, settings: PowerFlowSettings, v, elements, include_optimization):
+    Y = MatrixBuilder(settings)
+    Y.batch = BatchStamper(use_jit=settings.stamping_backend == STAMPING_BACKEND_NUMBA and is_jit_available())
+    J = np.zeros(len(v))
+
+    for element in elements:
+        element.stamp_primal(Y, J, v, 0, network)
+
+    if network.optimization != None:
+        for element in elements:
+            element.stamp_dual(Y, J, v, 0, network)
+
+        if include_optimization:
+            network.optimization.stamp(Y, J, v, 0, network)
+
+    Y.batch.flush(Y, J)
+
+    return Y.multiply(v, len(v)) - J
+
+def clear_residuals(residuals, indices):
+    if indices is not None:
+        residuals[indices] = 0
+
+    return residuals
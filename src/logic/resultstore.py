@@ -0,0 +1,243 @@
+import json
+import os
+from pathlib import Path
+import numpy as np
+
+#Snapshots are buffered and written as one compressed file per chunk of this many snapshots.
+DEFAULT_CHUNK_SIZE = 24
+
+INDEX_FILE = "index.json"
+NAMES_FILE = "names.npz"
+
+STORE_VERSION = 1
+
+#Values written for every snapshot. Each is a 2D array in a chunk file, one row per snapshot.
+BUS_COLUMNS = ["V_mag", "V_deg"]
+LOAD_COLUMNS = ["P", "Q"]
+
+#Encodes a list of strings as (dictionary of distinct values, integer code per entry).
+def dictionary_encode(values):
+    dictionary, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+    return (dictionary, codes.astype(np.int32))
+
+#Appends power flow snapshots (one per hour of a quasi time series, usually) to a single columnar store.
+#The store is a directory with:
+# - names.npz: bus and load names, dictionary encoded, written once.
+# - chunk_NNNNN.npz: compressed column arrays for a contiguous range of snapshots.
+# - index.json: the chunks and the hours they cover, rewritten after each chunk.
+#Opening a writer on an existing store replaces it.
+class ResultStoreWriter:
+    def __init__(self, path, chunk_size = DEFAULT_CHUNK_SIZE) -> None:
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.__remove_store_files()
+
+        self.chunks = []
+        self.bus_count = None
+        self.load_count = None
+        self.__clear_buffer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, hour, results):
+        if self.bus_count is None:
+            self.__write_names(results)
+        elif len(results.bus_V_mag) != self.bus_count or len(results.load_P) != self.load_count:
+            raise Exception("All snapshots in a result store must come from the same network")
+
+        self.hours.append(hour)
+        self.is_success.append(results.is_success)
+        self.iterations.append(results.iterations)
+        self.max_residual.append(results.max_residual if results.has_residuals else np.nan)
+        self.bus_values["V_mag"].append(results.bus_V_mag)
+        self.bus_values["V_deg"].append(results.bus_V_deg)
+        self.load_values["P"].append(results.load_P)
+        self.load_values["Q"].append(results.load_Q)
+
+        if len(self.hours) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.hours) == 0:
+            return
+
+        file_name = f"chunk_{len(self.chunks):05d}.npz"
+
+        columns = {}
+        columns["hour"] = np.array(self.hours, dtype=np.int64)
+        columns["is_success"] = np.array(self.is_success, dtype=bool)
+        columns["iterations"] = np.array(self.iterations, dtype=np.int64)
+        columns["max_residual"] = np.array(self.max_residual, dtype=np.float64)
+        for column in BUS_COLUMNS:
+            columns[f"bus_{column}"] = np.vstack(self.bus_values[column])
+        for column in LOAD_COLUMNS:
+            columns[f"load_{column}"] = np.vstack(self.load_values[column])
+
+        np.savez_compressed(self.path / file_name, **columns)
+
+        self.chunks.append({
+            "file": file_name,
+            "first_hour": int(min(self.hours)),
+            "last_hour": int(max(self.hours)),
+            "count": len(self.hours)
+            })
+        self.__write_index()
+        self.__clear_buffer()
+
+    def close(self):
+        self.flush()
+
+    #Chunks of an earlier store would otherwise be left behind, or overwritten one by one. Only the files of
+    #the store are removed, the index first, so readers never see an index that refers to missing chunks.
+    def __remove_store_files(self):
+        (self.path / INDEX_FILE).unlink(missing_ok=True)
+        (self.path / NAMES_FILE).unlink(missing_ok=True)
+        for chunk_file in self.path.glob("chunk_*.npz"):
+            chunk_file.unlink()
+
+    def __clear_buffer(self):
+        self.hours = []
+        self.is_success = []
+        self.iterations = []
+        self.max_residual = []
+        self.bus_values = dict([(column, []) for column in BUS_COLUMNS])
+        self.load_values = dict([(column, []) for column in LOAD_COLUMNS])
+
+    def __write_names(self, results):
+        buses = results.network.buses
+        loads = results.network.loads
+
+        bus_name_dictionary, bus_name_codes = dictionary_encode([bus.NodeName for bus in buses])
+        bus_phase_dictionary, bus_phase_codes = dictionary_encode([bus.NodePhase for bus in buses])
+        load_name_dictionary, load_name_codes = dictionary_encode([load.from_bus.NodeName for load in loads])
+        load_phase_dictionary, load_phase_codes = dictionary_encode([load.from_bus.NodePhase for load in loads])
+
+        np.savez_compressed(
+            self.path / NAMES_FILE,
+            bus_name_dictionary=bus_name_dictionary,
+            bus_name_codes=bus_name_codes,
+            bus_phase_dictionary=bus_phase_dictionary,
+            bus_phase_codes=bus_phase_codes,
+            load_name_dictionary=load_name_dictionary,
+            load_name_codes=load_name_codes,
+            load_phase_dictionary=load_phase_dictionary,
+            load_phase_codes=load_phase_codes
+            )
+
+        self.bus_count = len(buses)
+        self.load_count = len(loads)
+
+    def __write_index(self):
+        index = {
+            "version": STORE_VERSION,
+            "bus_count": self.bus_count,
+            "load_count": self.load_count,
+            "chunks": self.chunks
+        }
+
+        #Replace the index atomically, so a reader never sees a half written file.
+        temp_path = self.path / f"{INDEX_FILE}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(temp_path, self.path / INDEX_FILE)
+
+#Reads a store written by ResultStoreWriter. Only the chunks overlapping the requested hours are opened,
+#and only the requested columns are decompressed.
+class ResultStoreReader:
+    def __init__(self, path) -> None:
+        self.path = Path(path)
+
+        with open(self.path / INDEX_FILE) as f:
+            index = json.load(f)
+
+        if index["version"] != STORE_VERSION:
+            raise Exception(f"Unsupported result store version {index['version']}")
+
+        self.chunks = index["chunks"]
+
+        with np.load(self.path / NAMES_FILE) as names:
+            self.bus_names = names["bus_name_dictionary"][names["bus_name_codes"]]
+            self.bus_phases = names["bus_phase_dictionary"][names["bus_phase_codes"]]
+            self.load_names = names["load_name_dictionary"][names["load_name_codes"]]
+            self.load_phases = names["load_phase_dictionary"][names["load_phase_codes"]]
+
+    def get_hours(self):
+        return self.__read_columns(["hour"], None, None)["hour"]
+
+    #Returns (hours, selected bus indices, {column: array[hour, bus]}). Buses are given as "name" (all phases)
+    #or "name:phase". Hours are inclusive, None meaning unbounded.
+    def read_buses(self, buses = None, start_hour = None, end_hour = None, columns = BUS_COLUMNS):
+        selection = self.__select(self.bus_names, self.bus_phases, buses)
+        values = self.__read_columns(["hour"] + [f"bus_{column}" for column in columns], start_hour, end_hour)
+
+        return (values["hour"], selection, self.__select_columns(values, "bus", columns, selection))
+
+    def read_loads(self, loads = None, start_hour = None, end_hour = None, columns = LOAD_COLUMNS):
+        selection = self.__select(self.load_names, self.load_phases, loads)
+        values = self.__read_columns(["hour"] + [f"load_{column}" for column in columns], start_hour, end_hour)
+
+        return (values["hour"], selection, self.__select_columns(values, "load", columns, selection))
+
+    def read_summary(self, start_hour = None, end_hour = None):
+        return self.__read_columns(["hour", "is_success", "iterations", "max_residual"], start_hour, end_hour)
+
+    def __select_columns(self, values, prefix, columns, selection):
+        selected = {}
+        for column in columns:
+            if len(values["hour"]) == 0:
+                selected[column] = np.zeros((0, len(selection)))
+            else:
+                selected[column] = values[f"{prefix}_{column}"][:, selection]
+
+        return selected
+
+    def __select(self, names, phases, requested):
+        if requested is None:
+            return np.arange(len(names))
+
+        mask = np.zeros(len(names), dtype=bool)
+        for name in requested:
+            if ":" in name:
+                node_name, phase = name.rsplit(":", 1)
+                mask |= (names == node_name) & (phases == phase)
+            else:
+                mask |= names == name
+
+        return np.flatnonzero(mask)
+
+    def __read_columns(self, columns, start_hour, end_hour):
+        parts = dict([(column, []) for column in columns])
+
+        for chunk in self.chunks:
+            if start_hour is not None and chunk["last_hour"] < start_hour:
+                continue
+            if end_hour is not None and chunk["first_hour"] > end_hour:
+                continue
+
+            with np.load(self.path / chunk["file"]) as data:
+                hours = data["hour"]
+                mask = np.ones(len(hours), dtype=bool)
+                if start_hour is not None:
+                    mask &= hours >= start_hour
+                if end_hour is not None:
+                    mask &= hours <= end_hour
+
+                for column in columns:
+                    parts[column].append(data[column][mask])
+
+        values = {}
+        for column in columns:
+            if len(parts[column]) == 0:
+                values[column] = np.zeros(0)
+            elif parts[column][0].ndim == 1:
+                values[column] = np.concatenate(parts[column])
+            else:
+                values[column] = np.vstack(parts[column])
+
+        return values
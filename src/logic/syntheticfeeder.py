@@ -0,0 +1,96 @@
+import os
+import re
+
+OBJECT_PATTERN = re.compile(r"object\s+(\w+)(?::(\d*))?\s*\{(.*?)\n\s*\}", re.DOTALL)
+#Names may contain spaces ("triplex_4/0 AA").
+NAME_PATTERN = re.compile(r"^\s*name\s+([^;]+?)\s*;", re.MULTILINE)
+PROPERTY_PATTERN = re.compile(r"^(\s*\S+\s+)([^;]+?)(\s*;.*)$")
+
+#Objects that only make sense once per file.
+SINGLETON_OBJECTS = ["voltdump", "currdump", "recorder", "group_recorder", "multi_recorder"]
+
+#Builds a larger feeder from a GridLAB-D feeder by replicating it: every copy gets its own objects (renamed
+#with a _copyN suffix), but the copies share the swing bus of the original, so the result is a single
+#network with several feeders supplied from one substation bus.
+#
+#The replicated feeders expose how the parser and solver scale with network size (see logic.benchmark).
+def replicate_glm_feeder(glm_text, copies):
+    if copies < 1:
+        raise Exception("A replicated feeder needs at least one copy")
+
+    objects = list(OBJECT_PATTERN.finditer(glm_text))
+    if len(objects) == 0:
+        raise Exception("No objects found in feeder")
+
+    #Everything before the first object (clock, modules, settings) is kept once.
+    header = glm_text[:objects[0].start()]
+
+    names = set()
+    swing_names = set()
+    max_id = 0
+    for match in objects:
+        body = match.group(3)
+        name_match = NAME_PATTERN.search(body)
+        if name_match:
+            names.add(name_match.group(1))
+            if re.search(r"^\s*bustype\s+SWING\s*;", body, re.MULTILINE):
+                swing_names.add(name_match.group(1))
+
+        if match.group(2):
+            max_id = max(max_id, int(match.group(2)))
+
+    if len(swing_names) == 0:
+        raise Exception("Replicated feeders need a swing bus")
+
+    #Copies keep referring to the original swing buses.
+    renamed = names - swing_names
+
+    blocks = [header]
+    for copy in range(copies):
+        for match in objects:
+            (obj_class, obj_id, body) = match.groups()
+
+            if copy > 0:
+                if obj_class in SINGLETON_OBJECTS:
+                    continue
+
+                name_match = NAME_PATTERN.search(body)
+                if name_match and name_match.group(1) in swing_names:
+                    continue
+
+                body = rename_references(body, renamed, f"_copy{copy}")
+                if obj_id:
+                    obj_id = str(int(obj_id) + copy * (max_id + 1))
+
+            blocks.append(format_object(obj_class, obj_id, body))
+
+    return "\n\n".join(blocks) + "\n"
+
+#Writes the replicated feeder to output_directory/node.glm, the layout of the test cases, and returns its path.
+def write_replicated_feeder(glm_path, copies, output_directory):
+    with open(glm_path) as f:
+        glm_text = f.read()
+
+    os.makedirs(output_directory, exist_ok=True)
+
+    output_path = os.path.join(output_directory, "node.glm")
+    with open(output_path, "w") as f:
+        f.write(replicate_glm_feeder(glm_text, copies))
+
+    return output_path
+
+def rename_references(body, names, suffix):
+    lines = []
+    for line in body.split("\n"):
+        match = PROPERTY_PATTERN.match(line)
+        if match and match.group(2) in names:
+            line = match.group(1) + match.group(2) + suffix + match.group(3)
+        lines.append(line)
+
+    return "\n".join(lines)
+
+def format_object(obj_class, obj_id, body):
+    if obj_id is not None:
+        return f"object {obj_class}:{obj_id} {{{body}\n}}"
+
+    return f"object {obj_class} {{{body}\n}}"
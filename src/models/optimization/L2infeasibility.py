@@ -1,6 +1,5 @@
 from typing import List
-from sympy import symbols
-from logic.lagrangesegment import LagrangeSegment
+from logic.lagrangesegment import LagrangeSegment, variable_names
 from logic.lagrangestamper import LagrangeStamper
 from logic.matrixbuilder import MatrixBuilder
 from models.helpers import merge_residuals
@@ -32,12 +31,16 @@ class L2InfeasibilityOptimization:
         return residuals
 
 constants = ()
-primals = [Iir, Iii] = symbols("Iir Iii")
-duals = [Lr, Li] = symbols("lambda_Vr lambda_Vi")
+primals = [Iir, Iii] = variable_names("Iir Iii")
+duals = [Lr, Li] = variable_names("lambda_Vr lambda_Vi")
 
-lagrange = Iir ** 2 + Iii ** 2 + Iir * Lr + Iii * Li
+def build_lagrange(constants, primals, duals):
+    Iir, Iii = primals
+    Lr, Li = duals
 
-lh = LagrangeSegment(lagrange, constants, primals, duals)
+    return Iir ** 2 + Iii ** 2 + Iir * Lr + Iii * Li
+
+lh = LagrangeSegment(build_lagrange, constants, primals, duals)
 
 class L2InfeasibilityCurrent:
     def __init__(self, bus: Bus) -> None:
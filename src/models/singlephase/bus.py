@@ -4,6 +4,13 @@ from logic.lagrangestamper import SKIP
 
 #Represents an interconnection point for other network element with a shared voltage. In the three-phase case, this is used for a single phase.
 class Bus:
+    #Networks have one bus per node phase, so buses keep no per-instance __dict__.
+    __slots__ = (
+        "Bus", "Type", "NodeName", "NodePhase", "IsVirtual",
+        "node_Vr", "node_Vi", "node_Q", "node_lambda_Vr", "node_lambda_Vi", "node_lambda_Q",
+        "Vr_init", "Vi_init"
+    )
+
     def __init__(self,
                  Bus,
                  Type,
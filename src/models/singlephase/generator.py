@@ -1,22 +1,26 @@
 from __future__ import division
 from itertools import count
-from sympy import symbols
-from logic.lagrangesegment import LagrangeSegment
+from logic.lagrangesegment import LagrangeSegment, variable_names
 from logic.lagrangestamper import LagrangeStamper
 from logic.matrixbuilder import MatrixBuilder
 from models.singlephase.bus import Bus
 
-constants = P, Vset = symbols('P V_set')
-primals = Vr, Vi, Q = symbols('V_r V_i Q')
-duals = Lr, Li, LQ = symbols('lambda_r lambda_i lambda_Q')
+constants = P, Vset = variable_names('P V_set')
+primals = Vr, Vi, Q = variable_names('V_r V_i Q')
+duals = Lr, Li, LQ = variable_names('lambda_r lambda_i lambda_Q')
 
-F_Vr = (P * Vr + Q * Vi) / (Vr ** 2 + Vi ** 2)
-F_Vi = (P * Vi - Q * Vr) / (Vr ** 2 + Vi ** 2)
-F_Q = Vset ** 2 - Vr ** 2 - Vi ** 2
+def build_lagrange(constants, primals, duals):
+    P, Vset = constants
+    Vr, Vi, Q = primals
+    Lr, Li, LQ = duals
 
-lagrange = Lr * F_Vr + Li * F_Vi + LQ * F_Q
+    F_Vr = (P * Vr + Q * Vi) / (Vr ** 2 + Vi ** 2)
+    F_Vi = (P * Vi - Q * Vr) / (Vr ** 2 + Vi ** 2)
+    F_Q = Vset ** 2 - Vr ** 2 - Vi ** 2
 
-lh = LagrangeSegment(lagrange, constants, primals, duals)
+    return Lr * F_Vr + Li * F_Vi + LQ * F_Q
+
+lh = LagrangeSegment(build_lagrange, constants, primals, duals)
 
 class Generator:
     _ids = count(0)
@@ -60,6 +64,9 @@ class Generator:
         self.Qmax = -Qmax
         self.Qmin = -Qmin
 
+        #Taken out of service by contingency analysis. The parser only creates in-service generators.
+        self.status = True
+
     def assign_nodes(self, node_index, optimization_enabled):
         index_map = {}
         index_map[Vr] = self.bus.node_Vr
@@ -74,11 +81,34 @@ class Generator:
     def get_connections(self):
         return []
 
+    #The Q (and lambda_Q) row belongs to the bus, and is shared by every generator on it. An out of service
+    #generator pins it to a reactive power of zero (the bus no longer controls its voltage), unless another
+    #generator on the bus is still in service and stamps it.
+    def is_pinning_bus(self, network):
+        for generator in network.generators:
+            if generator.bus is self.bus and generator.status:
+                return False
+
+        return True
+
     def stamp_primal(self, Y: MatrixBuilder, J, v_previous, tx_factor, network):
+        if not self.status:
+            if self.is_pinning_bus(network):
+                Y.stamp(self.bus.node_Q, self.bus.node_Q, 1)
+            return
+
         self.stamper.stamp_primal(Y, J, [self.P, self.Vset], v_previous)
 
     def stamp_dual(self, Y: MatrixBuilder, J, v_previous, tx_factor, network):
+        if not self.status:
+            if self.is_pinning_bus(network):
+                Y.stamp(self.bus.node_lambda_Q, self.bus.node_lambda_Q, 1)
+            return
+
         self.stamper.stamp_dual(Y, J, [self.P, self.Vset], v_previous)
 
     def calculate_residuals(self, network, v):
+        if not self.status:
+            return {}
+
         return self.stamper.calc_residuals([self.P, self.Vset], v)
\ No newline at end of file
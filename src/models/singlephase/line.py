@@ -1,8 +1,7 @@
 import numpy as np
-from sympy import symbols
 from collections import defaultdict
 from itertools import count
-from logic.lagrangesegment import LagrangeSegment
+from logic.lagrangesegment import LagrangeSegment, variable_names
 from logic.lagrangestamper import LagrangeStamper
 from models.singlephase.bus import Bus
 from logic.matrixbuilder import MatrixBuilder
@@ -10,23 +9,27 @@ from logic.matrixbuilder import MatrixBuilder
 TX_LARGE_G = 20
 TX_LARGE_B = 20
 
-constants = G_orig, B_orig, tx_factor = symbols('G B tx_factor')
-primals = [Vr_from, Vi_from, Vr_to, Vi_to] = symbols('V_from\,r V_from\,i V_to\,r V_to\,i')
-duals = [Lr_from, Li_from, Lr_to, Li_to] = symbols('lambda_from\,r lambda_from\,i lambda_to\,r lambda_to\,i')
+constants = G_orig, B_orig, tx_factor = variable_names('G B tx_factor')
+primals = [Vr_from, Vi_from, Vr_to, Vi_to] = variable_names('V_from\,r V_from\,i V_to\,r V_to\,i')
+duals = [Lr_from, Li_from, Lr_to, Li_to] = variable_names('lambda_from\,r lambda_from\,i lambda_to\,r lambda_to\,i')
 
-G = G_orig + TX_LARGE_G * G_orig * tx_factor
-B = B_orig + TX_LARGE_B * B_orig * tx_factor
+def build_line_lagrange(constants, primals, duals):
+    G_orig, B_orig, tx_factor = constants
+    Vr_from, Vi_from, Vr_to, Vi_to = primals
 
-eqns = [
-    G * Vr_from - G * Vr_to - B * Vi_from + B * Vi_to,
-    G * Vi_from - G * Vi_to + B * Vr_from - B * Vr_to,
-    G * Vr_to - G * Vr_from - B * Vi_to + B * Vi_from,
-    G * Vi_to - G * Vi_from + B * Vr_to - B * Vr_from   
-]
+    G = G_orig + TX_LARGE_G * G_orig * tx_factor
+    B = B_orig + TX_LARGE_B * B_orig * tx_factor
 
-lagrange = np.dot(duals, eqns)
+    eqns = [
+        G * Vr_from - G * Vr_to - B * Vi_from + B * Vi_to,
+        G * Vi_from - G * Vi_to + B * Vr_from - B * Vr_to,
+        G * Vr_to - G * Vr_from - B * Vi_to + B * Vi_from,
+        G * Vi_to - G * Vi_from + B * Vr_to - B * Vr_from   
+    ]
 
-line_lh = LagrangeSegment(lagrange, constants, primals, duals)
+    return np.dot(duals, eqns)
+
+line_lh = LagrangeSegment(build_line_lagrange, constants, primals, duals)
 
 def build_line_stamper_bus(from_bus: Bus, to_bus: Bus, optimization_enabled):
     return build_line_stamper(
@@ -54,22 +57,26 @@ def build_line_stamper(Vr_from_idx, Vi_from_idx, Vr_to_idx, Vi_to_idx, Lr_from_i
 
     return LagrangeStamper(line_lh, index_map, optimization_enabled)
 
-constants = B_shunt, tx_factor = symbols('B_sh tx_factor')
-primals = [Vr_from, Vi_from, Vr_to, Vi_to] = symbols('V_from\,r V_from\,i V_to\,r V_to\,i')
-duals = [Lr_from, Li_from, Lr_to, Li_to] = symbols('lambda_from\,r lambda_from\,i lambda_to\,r lambda_to\,i')
+constants = B_shunt, tx_factor = variable_names('B_sh tx_factor')
+primals = [Vr_from, Vi_from, Vr_to, Vi_to] = variable_names('V_from\,r V_from\,i V_to\,r V_to\,i')
+duals = [Lr_from, Li_from, Lr_to, Li_to] = variable_names('lambda_from\,r lambda_from\,i lambda_to\,r lambda_to\,i')
+
+def build_shunt_lagrange(constants, primals, duals):
+    B_shunt, tx_factor = constants
+    Vr_from, Vi_from, Vr_to, Vi_to = primals
 
-scaled_B_line = B_shunt * (1 - tx_factor)
+    scaled_B_line = B_shunt * (1 - tx_factor)
 
-shunt_eqns = [
-    -scaled_B_line * Vi_from,
-    scaled_B_line * Vr_from,
-    -scaled_B_line * Vi_to,
-    scaled_B_line * Vr_to,    
-]
+    shunt_eqns = [
+        -scaled_B_line * Vi_from,
+        scaled_B_line * Vr_from,
+        -scaled_B_line * Vi_to,
+        scaled_B_line * Vr_to,    
+    ]
 
-lagrange = np.dot(duals, shunt_eqns)
+    return np.dot(duals, shunt_eqns)
 
-shunt_lh = LagrangeSegment(lagrange, constants, primals, duals)
+shunt_lh = LagrangeSegment(build_shunt_lagrange, constants, primals, duals)
 
 class Line:
     _ids = count(0)
@@ -101,6 +108,11 @@ class Line:
 
         self.status = status
 
+        #Ratings in MVA, 0 when unlimited.
+        self.rateA = rateA
+        self.rateB = rateB
+        self.rateC = rateC
+
     def assign_nodes(self, node_index, optimization_enabled):
         self.line_stamper = build_line_stamper_bus(
             self.from_bus, 
@@ -121,6 +133,9 @@ class Line:
         self.shunt_stamper = LagrangeStamper(shunt_lh, index_map, optimization_enabled)
 
     def get_connections(self):
+        if not self.status:
+            return []
+
         return [(self.from_bus, self.to_bus)]
 
     def stamp_primal(self, Y: MatrixBuilder, J, v_previous, tx_factor, network):
@@ -1,41 +1,49 @@
 from __future__ import division
 from itertools import count
 import numpy as np
-from sympy import symbols
-from logic.lagrangesegment import LagrangeSegment
+from logic.lagrangesegment import LagrangeSegment, variable_names
 from logic.lagrangestamper import SKIP, LagrangeStamper
 from logic.matrixbuilder import MatrixBuilder
 from models.helpers import merge_residuals
 from models.singlephase.bus import Bus
 from models.singlephase.line import build_line_stamper_bus
 
-constants = P, Q = symbols('P Q')
-primals = Vr_from, Vi_from, Ir, Ii, Vr_to, Vi_to = symbols('Vr_from, Vi_from, Ir, Ii, Vr_to, Vi_to')
-duals = Lr_from, Li_from, Lir, Lii, Lr_to, Li_to = symbols('Lr_from, Li_from, Lir, Lii, Lr_to, Li_to')
+constants = P, Q = variable_names('P Q')
+primals = Vr_from, Vi_from, Ir, Ii, Vr_to, Vi_to = variable_names('Vr_from, Vi_from, Ir, Ii, Vr_to, Vi_to')
+duals = Lr_from, Li_from, Lir, Lii, Lr_to, Li_to = variable_names('Lr_from, Li_from, Lir, Lii, Lr_to, Li_to')
 
-Vr = Vr_from - Vr_to
-Vi = Vi_from - Vi_to
+def build_lagrange(constants, primals, duals):
+    P, Q = constants
+    Vr_from, Vi_from, Ir, Ii, Vr_to, Vi_to = primals
 
-Fir_pq = (P * Vr + Q * Vi) / (Vr ** 2 + Vi ** 2)
-Fii_pq = (P * Vi - Q * Vr) / (Vr ** 2 + Vi ** 2)
+    Vr = Vr_from - Vr_to
+    Vi = Vi_from - Vi_to
 
-eqns = [
-    Ir,
-    Ii,
-    Ir - Fir_pq,
-    Ii - Fii_pq,
-    -Ir,
-    -Ii
-]
+    Fir_pq = (P * Vr + Q * Vi) / (Vr ** 2 + Vi ** 2)
+    Fii_pq = (P * Vi - Q * Vr) / (Vr ** 2 + Vi ** 2)
 
-lagrange = np.dot(duals, eqns)
+    eqns = [
+        Ir,
+        Ii,
+        Ir - Fir_pq,
+        Ii - Fii_pq,
+        -Ir,
+        -Ii
+    ]
 
-lh = LagrangeSegment(lagrange, constants, primals, duals)
+    return np.dot(duals, eqns)
+
+lh = LagrangeSegment(build_lagrange, constants, primals, duals)
 
 #Represents a two-terminal load. Can be used for positive sequence or three phase.
 class Load:
     _ids = count(0)
 
+    __slots__ = (
+        "id", "load_num", "phase", "triplex_phase", "from_bus", "to_bus", "P", "Q", "Z", "G", "B",
+        "node_Ir", "node_Ii", "stamper", "resistive_stamper"
+    )
+
     def __init__(self,
                  from_bus: Bus,
                  to_bus: Bus,
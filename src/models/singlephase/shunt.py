@@ -1,8 +1,6 @@
 from __future__ import division
 from itertools import count
 import numpy as np
-from sympy import symbols
-from logic.lagrangesegment import LagrangeSegment
 from logic.lagrangestamper import LagrangeStamper
 from logic.matrixbuilder import MatrixBuilder
 from models.singlephase.bus import GROUND, Bus
@@ -1,28 +1,31 @@
 from __future__ import division
 import numpy as np
-from sympy import symbols
-from logic.lagrangesegment import LagrangeSegment
+from logic.lagrangesegment import LagrangeSegment, variable_names
 from logic.lagrangestamper import SKIP, LagrangeStamper
 from logic.matrixbuilder import MatrixBuilder
 import math
 from models.singlephase.bus import GROUND, Bus
 
-constants = [Vrset, Viset] = symbols("Vrset Viset")
+constants = [Vrset, Viset] = variable_names("Vrset Viset")
 
-primals = [Vr, Vi, Isr, Isi] = symbols("Vr Vi I_Sr I_Si")
+primals = [Vr, Vi, Isr, Isi] = variable_names("Vr Vi I_Sr I_Si")
 
-duals = [Lr, Li, Lsr, Lsi] = symbols("lambda_Vr lambda_Vi lambda_Sr lambda_Si")
+duals = [Lr, Li, Lsr, Lsi] = variable_names("lambda_Vr lambda_Vi lambda_Sr lambda_Si")
 
-eqns = [
-    Isr,
-    Isi,
-    Vr - Vrset,
-    Vi - Viset,
-]
+def build_lagrange(constants, primals, duals):
+    Vrset, Viset = constants
+    Vr, Vi, Isr, Isi = primals
 
-lagrange = np.dot(duals, eqns)
+    eqns = [
+        Isr,
+        Isi,
+        Vr - Vrset,
+        Vi - Viset,
+    ]
 
-lh = LagrangeSegment(lagrange, constants, primals, duals)
+    return np.dot(duals, eqns)
+
+lh = LagrangeSegment(build_lagrange, constants, primals, duals)
 
 class Slack:
 
@@ -2,51 +2,54 @@ from __future__ import division
 from collections import defaultdict
 from itertools import count
 import numpy as np
-from sympy import symbols
-from sympy import cos
-from sympy import sin
-from logic.lagrangesegment import LagrangeSegment
+from logic.lagrangesegment import LagrangeSegment, variable_names
 from logic.lagrangestamper import SKIP, LagrangeStamper
 from logic.matrixbuilder import MatrixBuilder
 import math
 from models.singlephase.line import build_line_stamper
 from models.singlephase.bus import Bus
 
-constants = tr, ang, tx_factor = symbols('tr ang tx_factor')
-primals = [Vr_pri_pos, Vi_pri_pos, Vr_pri_neg, Vi_pri_neg, Ir_prim, Ii_prim, Vr_sec_pos, Vi_sec_pos, Vr_sec_neg, Vi_sec_neg] = symbols('Vr_pri_pos Vi_pri_pos Vr_pri_neg Vi_pri_neg Ir_prim Ii_prim Vr_sec_pos Vi_sec_pos Vr_sec_neg Vi_sec_neg')
-duals = [Lr_pri_pos, Li_pri_pos, Lr_pri_neg, Li_pri_neg, Lir_prim, Lii_prim, Lr_sec_pos, Li_sec_pos, Lr_sec_neg, Li_sec_neg] = symbols('Lr_pri_pos Li_pri_pos Lr_pri_neg Li_pri_neg Lir_prim Lii_prim Lr_sec_pos Li_sec_pos Lr_sec_neg Li_sec_neg')
+constants = tr, ang, tx_factor = variable_names('tr ang tx_factor')
+primals = [Vr_pri_pos, Vi_pri_pos, Vr_pri_neg, Vi_pri_neg, Ir_prim, Ii_prim, Vr_sec_pos, Vi_sec_pos, Vr_sec_neg, Vi_sec_neg] = variable_names('Vr_pri_pos Vi_pri_pos Vr_pri_neg Vi_pri_neg Ir_prim Ii_prim Vr_sec_pos Vi_sec_pos Vr_sec_neg Vi_sec_neg')
+duals = [Lr_pri_pos, Li_pri_pos, Lr_pri_neg, Li_pri_neg, Lir_prim, Lii_prim, Lr_sec_pos, Li_sec_pos, Lr_sec_neg, Li_sec_neg] = variable_names('Lr_pri_pos Li_pri_pos Lr_pri_neg Li_pri_neg Lir_prim Lii_prim Lr_sec_pos Li_sec_pos Lr_sec_neg Li_sec_neg')
 
-scaled_tr = tr + (1 - tr) * tx_factor 
-scaled_angle = ang - ang * tx_factor
+def build_lagrange(constants, primals, duals):
+    from sympy import cos, sin
 
-scaled_trcos = scaled_tr * cos(scaled_angle)
-scaled_trsin = scaled_tr * sin(scaled_angle)
+    tr, ang, tx_factor = constants
+    Vr_pri_pos, Vi_pri_pos, Vr_pri_neg, Vi_pri_neg, Ir_prim, Ii_prim, Vr_sec_pos, Vi_sec_pos, Vr_sec_neg, Vi_sec_neg = primals
 
-secondary_current_r = -scaled_trcos * Ir_prim - scaled_trsin * Ii_prim
-secondary_current_i = -scaled_trcos * Ii_prim + scaled_trsin * Ir_prim
+    scaled_tr = tr + (1 - tr) * tx_factor 
+    scaled_angle = ang - ang * tx_factor
 
-Vr_pri = Vr_pri_pos - Vr_pri_neg
-Vi_pri = Vi_pri_pos - Vi_pri_neg
+    scaled_trcos = scaled_tr * cos(scaled_angle)
+    scaled_trsin = scaled_tr * sin(scaled_angle)
 
-Vr_sec = Vr_sec_pos - Vr_sec_neg
-Vi_sec = Vi_sec_pos - Vi_sec_neg
+    secondary_current_r = -scaled_trcos * Ir_prim - scaled_trsin * Ii_prim
+    secondary_current_i = -scaled_trcos * Ii_prim + scaled_trsin * Ir_prim
 
-eqns = [
-    Ir_prim,
-    Ii_prim,
-    -Ir_prim,
-    -Ii_prim,
-    Vr_pri - scaled_trcos * Vr_sec + scaled_trsin * Vi_sec,
-    Vi_pri - scaled_trcos * Vi_sec - scaled_trsin * Vr_sec,
-    secondary_current_r,
-    secondary_current_i,
-    -secondary_current_r,
-    -secondary_current_i
-]
+    Vr_pri = Vr_pri_pos - Vr_pri_neg
+    Vi_pri = Vi_pri_pos - Vi_pri_neg
 
-lagrange = np.dot(duals, eqns)
+    Vr_sec = Vr_sec_pos - Vr_sec_neg
+    Vi_sec = Vi_sec_pos - Vi_sec_neg
 
-xfrmr_lh = LagrangeSegment(lagrange, constants, primals, duals)
+    eqns = [
+        Ir_prim,
+        Ii_prim,
+        -Ir_prim,
+        -Ii_prim,
+        Vr_pri - scaled_trcos * Vr_sec + scaled_trsin * Vi_sec,
+        Vi_pri - scaled_trcos * Vi_sec - scaled_trsin * Vr_sec,
+        secondary_current_r,
+        secondary_current_i,
+        -secondary_current_r,
+        -secondary_current_i
+    ]
+
+    return np.dot(duals, eqns)
+
+xfrmr_lh = LagrangeSegment(build_lagrange, constants, primals, duals)
 
 class Transformer:
     _ids = count(0)
@@ -86,6 +89,9 @@ class Transformer:
 
         self.status = status
 
+        #Per unit of the system base, 0 when unlimited.
+        self.rating = rating
+
     def assign_nodes(self, node_index, optimization_enabled):
         self.node_primary_Ir = next(node_index)
         self.node_primary_Ii = next(node_index)
@@ -141,10 +147,16 @@ class Transformer:
             )
 
     def get_connections(self):
+        if not self.status:
+            return []
+
         return [(self.from_bus_pos, self.to_bus_pos), (self.from_bus_pos, self.from_bus_neg), (self.to_bus_pos, self.to_bus_neg)]
 
     def stamp_primal(self, Y: MatrixBuilder, J, v_previous, tx_factor, network):
         if not self.status:
+            #Out of service (in a contingency, say), the winding currents and secondary voltage are zero.
+            for node in [self.node_primary_Ir, self.node_primary_Ii, self.node_secondary_Vr, self.node_secondary_Vi]:
+                Y.stamp(node, node, 1)
             return
 
         self.xfrmr_stamper.stamp_primal(Y, J, [self.tr, self.ang_rad, tx_factor], v_previous)
@@ -159,6 +171,8 @@ class Transformer:
 
     def stamp_dual(self, Y: MatrixBuilder, J, v_previous, tx_factor, network):
         if not self.status:
+            for node in [self.node_primary_Lambda_Ir, self.node_primary_Lambda_Ii, self.node_secondary_Lambda_Vr, self.node_secondary_Lambda_Vi]:
+                Y.stamp(node, node, 1)
             return
 
         self.xfrmr_stamper.stamp_dual(Y, J, [self.tr, self.ang_rad, tx_factor], v_previous)
@@ -1,26 +1,29 @@
 import numpy as np
-from sympy import symbols
-from logic.lagrangesegment import LagrangeSegment
+from logic.lagrangesegment import LagrangeSegment, variable_names
 from logic.lagrangestamper import SKIP, LagrangeStamper
 from logic.matrixbuilder import MatrixBuilder
 from models.singlephase.bus import Bus
 
-constants = Vr_set, Vi_set = symbols("Vr_set Vi_set")
-primals = Vr_from, Vi_from, Vr_to, Vi_to, Ir, Ii = symbols('Vr_from Vi_from Vr_to Vi_to Ir Ii')
-duals = Lr_from, Li_from, Lr_to, Li_to, Lir, Lii = symbols('Lr_from Li_from Lr_to Li_to Lir Lii')
+constants = Vr_set, Vi_set = variable_names("Vr_set Vi_set")
+primals = Vr_from, Vi_from, Vr_to, Vi_to, Ir, Ii = variable_names('Vr_from Vi_from Vr_to Vi_to Ir Ii')
+duals = Lr_from, Li_from, Lr_to, Li_to, Lir, Lii = variable_names('Lr_from Li_from Lr_to Li_to Lir Lii')
 
-eqns = [
-    Ir,
-    Ii,
-    -Ir,
-    -Ii,
-    Vr_set - (Vr_from - Vr_to),
-    Vi_set - (Vi_from - Vi_to)
-]
+def build_lagrange(constants, primals, duals):
+    Vr_set, Vi_set = constants
+    Vr_from, Vi_from, Vr_to, Vi_to, Ir, Ii = primals
 
-lagrange = np.dot(duals, eqns)
+    eqns = [
+        Ir,
+        Ii,
+        -Ir,
+        -Ii,
+        Vr_set - (Vr_from - Vr_to),
+        Vi_set - (Vi_from - Vi_to)
+    ]
 
-lh = LagrangeSegment(lagrange, constants, primals, duals)
+    return np.dot(duals, eqns)
+
+lh = LagrangeSegment(build_lagrange, constants, primals, duals)
 
 class VoltageSource:
     def __init__(self, from_bus: Bus, to_bus: Bus, Vr_set, Vi_set) -> None:
@@ -1,42 +1,45 @@
 from collections import defaultdict
 from typing import List
 import numpy as np
-from sympy import symbols
-from logic.lagrangesegment import LagrangeSegment
+from logic.lagrangesegment import LagrangeSegment, variable_names
 from logic.lagrangestamper import SKIP, LagrangeStamper
 from models.singlephase.bus import GROUND
 from models.singlephase.line import build_line_stamper_bus
 from models.helpers import merge_residuals
 from models.threephase.center_tap_transformer_coil import CenterTapTransformerCoil
 
-constants = tr_orig, tx_factor = symbols('tr tx_factor')
-primals = [Vr_pri, Vi_pri, Ir_L1, Ii_L1, Vr_L1, Vi_L1, Ir_L2, Ii_L2, Vr_L2, Vi_L2] = symbols('Vr_pri, Vi_pri, Ir_L1, Ii_L1, Vr_L1, Vi_L1, Ir_L2, Ii_L2, Vr_L2, Vi_L2')
-duals = [Lr_pri, Li_pri, Lir_L1, Lii_L1, Lr_L1, Li_L1, Lir_L2, Lii_L2, Lr_L2, Li_L2] = symbols('Lr_pri, Li_pri, Lir_L1, Lii_L1, Lr_L1, Li_L1, Lir_L2, Lii_L2, Lr_L2, Li_L2')
-
-tr = tr_orig + (1 - tr_orig) * tx_factor 
-
-#Kersting:
-#E_0 = 1/tr * Vt_1
-#E_0 = -1/tr * Vt_2
-#I_0 = 1/tr * (I_1 - I_2)
-#I_0 => Leaving primary (positive), I_1, I_2 => Entering secondary (negative). 
-
-eqns = [
-    1 / tr * (-Ir_L1 + Ir_L2),
-    1 / tr * (-Ii_L1 + Ii_L2),
-    Vr_L1 - 1 / tr * Vr_pri,
-    Vi_L1 - 1 / tr * Vi_pri,
-    Ir_L1,
-    Ii_L1,
-    Vr_L2 + 1 / tr * Vr_pri,
-    Vi_L2 + 1 / tr * Vi_pri,
-    Ir_L2,
-    Ii_L2
-]
-
-lagrange = np.dot(duals, eqns)
-
-center_tap_xfmr_lh = LagrangeSegment(lagrange, constants, primals, duals)
+constants = tr_orig, tx_factor = variable_names('tr tx_factor')
+primals = [Vr_pri, Vi_pri, Ir_L1, Ii_L1, Vr_L1, Vi_L1, Ir_L2, Ii_L2, Vr_L2, Vi_L2] = variable_names('Vr_pri, Vi_pri, Ir_L1, Ii_L1, Vr_L1, Vi_L1, Ir_L2, Ii_L2, Vr_L2, Vi_L2')
+duals = [Lr_pri, Li_pri, Lir_L1, Lii_L1, Lr_L1, Li_L1, Lir_L2, Lii_L2, Lr_L2, Li_L2] = variable_names('Lr_pri, Li_pri, Lir_L1, Lii_L1, Lr_L1, Li_L1, Lir_L2, Lii_L2, Lr_L2, Li_L2')
+
+def build_lagrange(constants, primals, duals):
+    tr_orig, tx_factor = constants
+    Vr_pri, Vi_pri, Ir_L1, Ii_L1, Vr_L1, Vi_L1, Ir_L2, Ii_L2, Vr_L2, Vi_L2 = primals
+
+    tr = tr_orig + (1 - tr_orig) * tx_factor 
+
+    #Kersting:
+    #E_0 = 1/tr * Vt_1
+    #E_0 = -1/tr * Vt_2
+    #I_0 = 1/tr * (I_1 - I_2)
+    #I_0 => Leaving primary (positive), I_1, I_2 => Entering secondary (negative). 
+
+    eqns = [
+        1 / tr * (-Ir_L1 + Ir_L2),
+        1 / tr * (-Ii_L1 + Ii_L2),
+        Vr_L1 - 1 / tr * Vr_pri,
+        Vi_L1 - 1 / tr * Vi_pri,
+        Ir_L1,
+        Ii_L1,
+        Vr_L2 + 1 / tr * Vr_pri,
+        Vi_L2 + 1 / tr * Vi_pri,
+        Ir_L2,
+        Ii_L2
+    ]
+
+    return np.dot(duals, eqns)
+
+center_tap_xfmr_lh = LagrangeSegment(build_lagrange, constants, primals, duals)
 
 class CenterTapTransformer():
     def __init__(self
@@ -34,6 +34,7 @@ def calcInverse(Zmatrix):
     return Ymatrix
 
 class UnbalancedLinePhase():
+    __slots__ = ("from_element", "to_element", "phase")
 
     def __init__(self
                 , from_element
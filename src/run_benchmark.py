@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+import tempfile
+from logic.benchmark import BENCHMARK_CONFIGS, SYNTHETIC_COPIES, SYNTHETIC_FEEDER, BenchmarkRunner, append_history, find_regressions, get_scaling_exponents, get_synthetic_cases, get_test_cases, load_baseline, save_baseline
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "test", "data")
+
+parser = argparse.ArgumentParser()
+
+parser.add_argument("--cases", required=False, default="*")
+parser.add_argument("--configs", required=False, default=",".join(BENCHMARK_CONFIGS.keys()))
+parser.add_argument("--synthetic", required=False, default=",".join([str(copies) for copies in SYNTHETIC_COPIES]))
+parser.add_argument("--syntheticfeeder", required=False, default=SYNTHETIC_FEEDER)
+parser.add_argument("--history", required=False, default="./benchmarks/history.jsonl")
+parser.add_argument("--baseline", required=False)
+parser.add_argument("--savebaseline", required=False, action='store_true')
+parser.add_argument("--label", required=False)
+args = parser.parse_args()
+
+configs = dict([(config, BENCHMARK_CONFIGS[config]) for config in args.configs.split(",")])
+
+cases = get_test_cases(DATA_DIRECTORY, args.cases)
+if args.synthetic:
+    copies = [int(copy_count) for copy_count in args.synthetic.split(",")]
+    cases += get_synthetic_cases(DATA_DIRECTORY, os.path.join(tempfile.gettempdir(), "synthetic_feeders"), args.syntheticfeeder, copies)
+
+records = BenchmarkRunner(configs).run(cases)
+
+append_history(args.history, records, args.label)
+print(f"Appended {len(records)} records to {args.history}")
+
+for ((series, config), exponents) in get_scaling_exponents(records).items():
+    print(f"Scaling of {series} ({config}): " + ", ".join([f"{metric} ~ size^{exponent:.2f}" for (metric, exponent) in exponents.items() if exponent is not None]))
+
+if args.baseline:
+    if args.savebaseline or not os.path.isfile(args.baseline):
+        save_baseline(args.baseline, records)
+        print(f"Saved baseline to {args.baseline}")
+    else:
+        regressions = find_regressions(load_baseline(args.baseline), records)
+        print(f"Regressions against {args.baseline}: {len(regressions)}")
+        for regression in regressions:
+            print(f"    {regression}")
+
+        if len(regressions) > 0:
+            sys.exit(1)
@@ -1,16 +1,15 @@
+from logic.contingencyanalysis import ContingencyAnalysis
 from logic.networkpostprocessor import NetworkPostProcessor
 from logic.powerflowsettings import PowerFlowSettings
 from logic.powerflow import PowerFlow
+from logic.powerflowresults import OUTPUT_FORMAT_STORE, get_quasi_time_series_store_path
 from logic.networkloader import NetworkLoader
+from logic.profiler import PHASE_RESULTS
 import argparse
+import logging
 
 from logic.postprocessingsettings import PostProcessingSettings
 
-from colorama import init
-from termcolor import colored
-# use Colorama to make Termcolor work on Windows too
-init()
-
 
 parser = argparse.ArgumentParser()
 
@@ -21,10 +20,18 @@ parser.add_argument("--loadend", required=False)
 parser.add_argument("--negativeload", required=False)
 parser.add_argument("--artificialswingbus", required=False)
 parser.add_argument("--outputfile", required=False)
+parser.add_argument("--workers", required=False, default=1)
+parser.add_argument("--outputformat", required=False, default="csv", choices=["csv", "store"])
+parser.add_argument("--glmparser", required=False, default="ditto", choices=["ditto", "direct"])
+parser.add_argument("--networkcache", required=False, action='store_true')
+parser.add_argument("--networkcachedir", required=False)
+parser.add_argument("--contingencies", required=False, action='store_true')
+parser.add_argument("--profile", required=False, action='store_true')
 parser.add_argument("--debug", required=False, action='store_true')
 parser.add_argument("--verbose", required=False, action='store_true')
 parser.add_argument("--infeas", required=False, default='False')
 parser.add_argument("--load_factor", required=False, default=-1)
+parser.add_argument("--loglevel", required=False, default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
 args = parser.parse_args()
 
 case = args.case
@@ -34,12 +41,23 @@ loadend = args.loadend
 negativeload = args.negativeload
 artificialswingbus = args.artificialswingbus
 outputfile = args.outputfile
+workers = int(args.workers)
+outputformat = args.outputformat
+glm_parser = args.glmparser
+network_cache = args.networkcache or args.networkcachedir is not None
+network_cache_dir = args.networkcachedir
+contingencies = args.contingencies
+profile = args.profile
 debug = args.debug
 verbose = args.verbose
 infeas = args.infeas
 load_factor = float(args.load_factor)
-print(colored("Running power flow solver...",'red'))
-print(colored("Infeasibility option is %s" % infeas, 'green'))
+
+logging.basicConfig(level=args.loglevel, format="%(message)s")
+logger = logging.getLogger("run_solver")
+
+logger.info("Running power flow solver...")
+logger.info("Infeasibility option is %s", infeas)
 
 settings = PowerFlowSettings(
     debug=debug, 
@@ -49,7 +67,11 @@ settings = PowerFlowSettings(
     tx_stepping=False, 
     voltage_limiting=False,
     dump_matrix=False,
-    load_factor=load_factor
+    load_factor=load_factor,
+    glm_parser=glm_parser,
+    network_cache=network_cache,
+    network_cache_dir=network_cache_dir,
+    profile=profile
     )
 
 network = NetworkLoader(settings).from_file(case)
@@ -61,7 +83,19 @@ powerflow = PowerFlow(network, settings)
 results = powerflow.execute()
 
 results.display(verbose=verbose)
-results.output(outputfile)
+with settings.profiler.section(PHASE_RESULTS):
+    results.output(outputfile, outputformat)
+
+if profile:
+    settings.profiler.display()
+    if outputfile:
+        settings.profiler.output_json(f"{outputfile}_profile.json")
+        settings.profiler.output_chrome_trace(f"{outputfile}_trace.json")
+
+if contingencies:
+    report = ContingencyAnalysis(network, settings).execute()
+    report.display()
+    report.output(outputfile)
 
 try:
     postprocessingsettings = PostProcessingSettings(
@@ -69,14 +103,21 @@ try:
         loadfile_start = loadstart,
         loadfile_end = loadend,
         artificialswingbus = artificialswingbus,
-        negativeload = negativeload
+        negativeload = negativeload,
+        network_file = case,
+        workers = workers
     )
     postprocessor = NetworkPostProcessor(postprocessingsettings, powerflow)
-    results = postprocessor.execute()
 
-    if results is not None:
-        results.display(verbose=False)
-        results.output(outputfile)
+    if loadfile is not None and outputfile and outputformat == OUTPUT_FORMAT_STORE:
+        #Each snapshot goes to the store as soon as it is solved, instead of keeping the whole series in memory.
+        postprocessor.write_quasi_time_series(get_quasi_time_series_store_path(outputfile))
+    else:
+        results = postprocessor.execute()
+
+        if results is not None:
+            results.display(verbose=False)
+            results.output(outputfile, outputformat)
 except Exception as e:
     print(e)
     pass
@@ -0,0 +1,90 @@
+import os
+import numpy as np
+from logic.batchpowerflow import BatchPowerFlow, Scenario
+from logic.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+from models.singlephase.switch import SwitchStatus
+
+CURR_DIR = os.path.realpath(os.path.dirname(os.path.dirname(__file__)))
+
+def load_case(relative_path, settings):
+    return NetworkLoader(settings).from_file(os.path.join(CURR_DIR, "data", relative_path))
+
+def test_load_scaling_scenarios_match_single_solves():
+    settings = PowerFlowSettings()
+    network = load_case(os.path.join("three_phase", "ieee_four_bus_switch", "node.glm"), settings)
+
+    load_P = np.array([load.P for load in network.loads])
+    load_Q = np.array([load.Q for load in network.loads])
+    scales = [0.5, 1.0, 1.5]
+    scenarios = [Scenario(load_P=load_P * scale, load_Q=load_Q * scale) for scale in scales]
+    scenarios.append(Scenario(switch_closed=[False] * len(network.switches)))
+
+    results = BatchPowerFlow(network, settings, workers=2).solve(scenarios)
+
+    assert results.is_success.all()
+    assert results.bus_V_mag.shape == (len(scenarios), len(network.buses))
+
+    #The base network is left unchanged.
+    assert np.array_equal([load.P for load in network.loads], load_P)
+    assert all(switch.status == SwitchStatus.CLOSED for switch in network.switches)
+
+    for (idx, scale) in enumerate(scales):
+        for load in network.loads:
+            load.P *= scale
+            load.Q *= scale
+
+        expected = PowerFlow(network, settings).execute()
+        assert np.allclose(results.bus_V_r[idx], expected.bus_V_r)
+        assert np.allclose(results.bus_V_i[idx], expected.bus_V_i)
+
+        for (load, P, Q) in zip(network.loads, load_P, load_Q):
+            load.P = P
+            load.Q = Q
+
+    #Opening the switch de-energizes the load bus only.
+    is_load_bus = np.array([bus.NodeName == "load4" for bus in network.buses])
+    assert (results.bus_V_mag[3][is_load_bus] == 0).all()
+    assert (results.bus_V_mag[3][~is_load_bus] > 2000).all()
+
+def test_generator_setpoint_scenarios():
+    settings = PowerFlowSettings()
+    network = load_case(os.path.join("positive_seq", "IEEE-14_prior_solution.RAW"), settings)
+
+    Vset = np.array([generator.Vset for generator in network.generators])
+    scenarios = [Scenario(generator_Vset=Vset), Scenario(generator_Vset=Vset * 1.01)]
+
+    results = BatchPowerFlow(network, settings).solve(scenarios)
+
+    assert results.is_success.all()
+    generator_buses = [network.buses.index(generator.bus) for generator in network.generators]
+    assert np.allclose(results.bus_V_mag[0][generator_buses], Vset)
+    assert np.allclose(results.bus_V_mag[1][generator_buses], Vset * 1.01)
+
+def test_scenarios_do_not_depend_on_each_other():
+    settings = PowerFlowSettings()
+    #A feeder with switched capacitors, which the device controller switches differently under heavy load.
+    network = load_case(os.path.join("three_phase", "r1_12_47_1", "node.glm"), settings)
+    assert len(network.capacitors) > 0
+
+    load_P = np.array([load.P for load in network.loads])
+    load_Q = np.array([load.Q for load in network.loads])
+    scales = [0.3, 1.6, 0.3]
+    scenarios = [Scenario(load_P=load_P * scale, load_Q=load_Q * scale) for scale in scales]
+    capacitor_switches = [capacitor.switch for capacitor in network.capacitors]
+
+    for workers in [1, 2]:
+        results = BatchPowerFlow(network, settings, workers=workers).solve(scenarios)
+
+        assert results.is_success.all()
+        assert np.allclose(results.bus_V_mag[0], results.bus_V_mag[2])
+        assert [capacitor.switch for capacitor in network.capacitors] == capacitor_switches
+
+    for load in network.loads:
+        load.P *= 0.3
+        load.Q *= 0.3
+
+    expected = PowerFlow(network, settings).execute()
+    assert np.allclose(results.bus_V_r[0], expected.bus_V_r)
+    assert np.allclose(results.bus_V_i[0], expected.bus_V_i)
@@ -0,0 +1,71 @@
+import os
+from logic.benchmark import BenchmarkCase, BenchmarkRecord, BenchmarkRunner, find_regressions, get_scaling_exponents, get_test_cases
+from logic.syntheticfeeder import replicate_glm_feeder
+
+CURR_DIR = os.path.realpath(os.path.dirname(os.path.dirname(__file__)))
+
+FEEDER = """clock {
+    timestamp '2000-01-01 0:00:00';
+}
+
+object node:1 {
+    name source;
+    bustype SWING;
+    phases ABCN;
+}
+
+object overhead_line:2 {
+    name line;
+    from source;
+    to load node;
+    configuration config;
+}
+
+object line_configuration: {
+    name config;
+}
+
+object load:3 {
+    name load node;
+    phases ABCN;
+}
+
+object voltdump {
+    filename result.csv;
+}
+"""
+
+def test_replicated_feeders_share_the_swing_bus():
+    glm = replicate_glm_feeder(FEEDER, 3)
+
+    assert glm.count("clock {") == 1
+    assert glm.count("bustype SWING") == 1
+    assert glm.count("object voltdump") == 1
+    assert glm.count("object overhead_line") == 3
+    assert "name load node_copy2;" in glm
+    assert "to load node_copy1;" in glm
+    assert "configuration config_copy2;" in glm
+    assert "object load:11 {" in glm
+    assert glm.count("from source;") == 3
+
+def test_regressions_and_scaling():
+    baseline = [BenchmarkRecord("case", "default", True, 1.0, 1.0, 3, 100.0, 10)]
+    records = [BenchmarkRecord("case", "default", True, 1.0, 2.0, 4, 100.0, 10)]
+
+    regressions = find_regressions(baseline, records)
+    assert sorted([regression.metric for regression in regressions]) == ["iterations", "solve_time"]
+    assert find_regressions(baseline, baseline) == []
+
+    series = [BenchmarkRecord(f"x{scale}", "default", True, scale, scale ** 2, 3, 100.0, 10 * scale, series="x", scale=scale) for scale in [1, 2, 4]]
+    exponents = get_scaling_exponents(series)[("x", "default")]
+    assert abs(exponents["parse_time"] - 1) < 1e-9
+    assert abs(exponents["solve_time"] - 2) < 1e-9
+
+def test_run_case():
+    (case,) = get_test_cases(os.path.join(CURR_DIR, "data"), "IEEE-14_prior_solution")
+    record = BenchmarkRunner().run_case(case, "default")
+
+    assert record.error is None
+    assert record.is_success
+    assert record.matrix_size > 0 and record.peak_rss > 0
+    assert record.parse_time > 0 and record.solve_time > 0
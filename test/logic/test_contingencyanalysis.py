@@ -0,0 +1,71 @@
+import os
+import numpy as np
+import pytest
+from logic.contingencyanalysis import CONTINGENCY_GENERATOR, CONTINGENCY_LINE, ContingencyAnalysis, ContingencyReport, ContingencyResult, Violation
+from logic.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+from models.singlephase.generator import Generator
+
+CURR_DIR = os.path.realpath(os.path.dirname(os.path.dirname(__file__)))
+
+def load_case(file_name, settings):
+    return NetworkLoader(settings).from_file(os.path.join(CURR_DIR, "data", "positive_seq", file_name))
+
+def test_contingencies_match_fresh_solves():
+    settings = PowerFlowSettings()
+    network = load_case("IEEE-14_prior_solution.RAW", settings)
+
+    analysis = ContingencyAnalysis(network, settings)
+    contingencies = analysis.get_contingencies()
+    report = analysis.execute(contingencies)
+
+    assert len(report.results) == len(contingencies)
+    #Unsolvable contingencies rank first.
+    is_success = [result.is_success for result in report.results]
+    assert is_success == sorted(is_success)
+    #Every element is back in service.
+    assert all(element.status for (_, element) in contingencies)
+
+    for contingency_type in [CONTINGENCY_LINE, CONTINGENCY_GENERATOR]:
+        result = next(result for result in report.results if result.contingency_type == contingency_type and result.is_success)
+
+        fresh_network = load_case("IEEE-14_prior_solution.RAW", settings)
+        fresh_elements = fresh_network.lines if contingency_type == CONTINGENCY_LINE else fresh_network.generators
+        elements = network.lines if contingency_type == CONTINGENCY_LINE else network.generators
+        fresh_elements[elements.index(result.element)].status = False
+
+        expected = PowerFlow(fresh_network, settings).execute()
+        assert expected.is_success
+        assert np.allclose(result.v_final, expected.v_final, atol=1e-4)
+
+def test_islanding_ranks_after_divergence():
+    islanding = ContingencyResult(CONTINGENCY_LINE, None, "1-2", False, True, 0, [])
+    diverged = ContingencyResult(CONTINGENCY_LINE, None, "2-3", False, False, 12, [])
+    violated = ContingencyResult(CONTINGENCY_LINE, None, "3-4", True, False, 3, [Violation("low_voltage", "bus 4", 0.85, 0.9, 5)])
+    solved = ContingencyResult(CONTINGENCY_LINE, None, "4-5", True, False, 3, [])
+
+    report = ContingencyReport([], [solved, islanding, violated, diverged])
+    assert report.results == [diverged, islanding, violated, solved]
+
+def test_out_of_service_generator_leaves_bus_to_other_generators():
+    settings = PowerFlowSettings()
+    expected = PowerFlow(load_case("IEEE-14_prior_solution.RAW", settings), settings).execute()
+
+    #A second, out of service, unit on the bus of the first generator does not change the solution.
+    network = load_case("IEEE-14_prior_solution.RAW", settings)
+    generator = network.generators[0]
+    spare = Generator(generator.bus, 0, generator.Vset, 0, 0, 0, 0, 0, None, 100, None)
+    spare.status = False
+    network.generators.append(spare)
+
+    results = PowerFlow(network, settings).execute()
+    assert results.is_success
+    assert np.allclose(results.v_final, expected.v_final, atol=1e-6)
+
+def test_contingency_analysis_requires_transmission_network():
+    settings = PowerFlowSettings()
+    network = NetworkLoader(settings).from_file(os.path.join(CURR_DIR, "data", "three_phase", "ieee_four_bus", "node.glm"))
+
+    with pytest.raises(Exception, match="transmission"):
+        ContingencyAnalysis(network, settings)
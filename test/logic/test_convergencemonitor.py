@@ -0,0 +1,35 @@
+from logic.convergencemonitor import STOP_DIVERGED, STOP_NOT_FINITE, STOP_OSCILLATING, STOP_STALLED, ConvergenceMonitor
+
+class Iteration:
+    def __init__(self, err_max) -> None:
+        self.err_max = err_max
+
+def check_errors(errors, is_warm_start = False, monitor = None, tolerance = 0):
+    if monitor is None:
+        monitor = ConvergenceMonitor()
+    monitor.reset(is_warm_start, tolerance)
+
+    for (idx, err) in enumerate(errors):
+        reason = monitor.check(Iteration(err))
+        if reason != None:
+            return (idx, reason)
+
+    return (None, None)
+
+def test_converging_solves_continue():
+    assert check_errors([100, 5, 0.1, 1e-3, 1e-6]) == (None, None)
+    #Cold starts may wander for a while before NR settles.
+    assert check_errors([18, 100, 95, 55, 70, 220, 180, 750, 820, 170, 92, 94, 94, 19, 13, 120, 48, 9.9, 0.26]) == (None, None)
+    #Warm starts may get worse once before converging.
+    assert check_errors([0.2, 2.4, 2.2, 0.49, 0.17, 0.017, 3.3e-4], is_warm_start=True) == (None, None)
+    #Errors that wander just above the tolerance before dipping below it.
+    noise = [1.5e-05, 1.3e-05, 2.9e-05, 2.2e-05, 1.6e-05, 1.3e-05, 6.3e-05, 2.5e-05, 1.4e-05, 2.1e-05, 1.4e-05]
+    assert check_errors([2.1e3, 4.2e2, 0.12] + noise * 4, tolerance=1e-5) == (None, None)
+    assert check_errors([2.1e3, 4.2e2, 0.12] + noise * 4) == (19, STOP_STALLED)
+
+def test_hopeless_solves_stop():
+    assert check_errors([1, float("nan")]) == (1, STOP_NOT_FINITE)
+    assert check_errors([10, 1, 0.5, 1e4]) == (3, STOP_DIVERGED)
+    assert check_errors([1, 2, 1.5, 1.2, 1.1, 1.3], monitor=ConvergenceMonitor(stall_iterations=5)) == (5, STOP_STALLED)
+    assert check_errors([1, 0.5, 2, 3, 2, 3, 2, 3]) == (7, STOP_OSCILLATING)
+    assert check_errors([0.1, 0.2, 0.4, 0.8], is_warm_start=True) == (3, STOP_DIVERGED)
@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from sympy import symbols
+from logic.derivativecache import DerivativeCache
+from logic.lagrangesegment import LagrangeSegment, variable_names
+
+CURR_DIR = os.path.realpath(os.path.dirname(os.path.dirname(__file__)))
+
+def test_store_and_load(tmp_path):
+    source = (
+        "def f0(a0, a1):\n    return a0 * a1\n\n"
+        "def f1(a0, a1):\n    return a0\n\n"
+        "def primal_kernel(a0, a1):\n    return (a0, )\n\n"
+        "def dual_kernel(a0, a1):\n    return ()\n"
+    )
+    derivatives = [{"variable": "x", "eqn": "f0", "constant": None, "terms": [["x", "f1"]]}]
+    kernels = {"primal_kernel": ["f1"], "dual_kernel": []}
+
+    DerivativeCache(str(tmp_path)).store("segment", source, derivatives, kernels)
+
+    #A second cache reads the file written by the first, and compiles the functions.
+    cache = DerivativeCache(str(tmp_path))
+    assert cache.load("other segment") == None
+
+    compiled = cache.load("segment")
+    eqn_eval, constant_eval, term_evals = compiled.get("x")
+    assert 6 == eqn_eval(2, 3)
+    assert constant_eval == None
+    assert "x" == term_evals[0][0]
+    assert 2 == term_evals[0][1](2, 3)
+
+    kernel, output_indices = compiled.get_kernel(False)
+    assert (2,) == kernel(2, 3)
+    assert 0 == output_indices[term_evals[0][1]]
+
+    #The second load compiles nothing, the bytecode was kept next to the cache file.
+    eqn_eval, _, _ = DerivativeCache(str(tmp_path)).load("segment").get("x")
+    assert 6 == eqn_eval(2, 3)
+
+def test_segment_loads_from_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(LagrangeSegment, "_cache", DerivativeCache(str(tmp_path)))
+
+    def build_lagrange(constants, primals, duals):
+        (a,) = constants
+        x, y = primals
+        return np.dot(duals, [a * x * y - 1, x - y])
+
+    names = (variable_names("a"), variable_names("x y"), variable_names("Lx Ly"))
+    generated_segment = LagrangeSegment(build_lagrange, *names)
+    generated = generated_segment.get_derivatives()
+    assert generated_segment._lagrange != None
+
+    #Loading from the cache builds no expressions.
+    cached_segment = LagrangeSegment(build_lagrange, *names)
+    cached = cached_segment.get_derivatives()
+    assert cached_segment._lagrange == None
+
+    args = [2, 3, 5, 7, 11]
+    for variable in cached_segment.variables:
+        assert generated[variable].eqn_eval(*args) == cached[variable].eqn_eval(*args)
+        assert list(generated[variable].variable_evals.keys()) == list(cached[variable].variable_evals.keys())
+
+    (a, y) = symbols("a y")
+    assert a * y == cached["Lx"].variable_exprs["x"]
+
+def test_kernel_matches_derivatives(tmp_path, monkeypatch):
+    monkeypatch.setattr(LagrangeSegment, "_cache", DerivativeCache(str(tmp_path)))
+
+    def build_lagrange(constants, primals, duals):
+        G, B = constants
+        Vr, Vi = primals
+        #The 1/(Vr**2 + Vi**2) denominators are shared between the kernel outputs.
+        return np.dot(duals, [(G * Vr + B * Vi) / (Vr ** 2 + Vi ** 2), (G * Vi - B * Vr) / (Vr ** 2 + Vi ** 2)])
+
+    segment = LagrangeSegment(build_lagrange, variable_names("G B"), variable_names("Vr Vi"), variable_names("Lr Li"))
+
+    args = [0.5, -0.25, 1.1, 0.3, 0.7, -0.2]
+    for is_dual in [False, True]:
+        kernel, output_indices = segment.get_kernel(is_dual)
+        outputs = kernel(*args)
+
+        assert len(outputs) == len(output_indices)
+        for (eval_func, output_index) in output_indices.items():
+            assert np.isclose(eval_func(*args), outputs[output_index], rtol=1E-14)
+
+def test_shared_cache_dir_is_refused(tmp_path):
+    cache = DerivativeCache(str(tmp_path / "cache"))
+    cache.store("segment", "def f0():\n    return 1\n", [], {"primal_kernel": [], "dual_kernel": []})
+    assert ((tmp_path / "cache").stat().st_mode & 0o777) == 0o700
+
+    #Entries are executed when loaded, so a directory others can write to is not read.
+    (tmp_path / "cache").chmod(0o777)
+    with pytest.raises(PermissionError):
+        DerivativeCache(str(tmp_path / "cache")).load("segment")
+
+def test_warm_solve_does_not_import_sympy(tmp_path):
+    script = (
+        "import sys\n"
+        "from logic.networkloader import NetworkLoader\n"
+        "from logic.powerflow import PowerFlow\n"
+        "from logic.powerflowsettings import PowerFlowSettings\n"
+        f"network = NetworkLoader(PowerFlowSettings()).from_file({repr(os.path.join(CURR_DIR, 'data', 'three_phase', 'ieee_four_bus', 'node.glm'))})\n"
+        "assert PowerFlow(network).execute().is_success\n"
+        "print('sympy' in sys.modules)\n"
+    )
+    env = dict(os.environ)
+    env["XDG_CACHE_HOME"] = str(tmp_path)
+    env["PYTHONPATH"] = os.pathsep.join([os.path.join(CURR_DIR, "..", "src"), env.get("PYTHONPATH", "")])
+
+    #The first solve derives the kernels and fills the cache, the second only loads them.
+    outputs = [subprocess.run([sys.executable, "-c", script], env=env, check=True, capture_output=True, text=True).stdout for _ in range(2)]
+    assert outputs[0].splitlines()[-1] == "True"
+    assert outputs[1].splitlines()[-1] == "False"
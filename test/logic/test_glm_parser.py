@@ -0,0 +1,55 @@
+from ditto.readers.gridlabd.glm_parser import iterate_glm_records, GlmObject, GlmSchedule
+from ditto.readers.gridlabd.read import read_gld_objects_and_schedules
+
+def test_nested_objects_and_recursive_includes(tmp_path):
+    (tmp_path / "include").mkdir()
+    (tmp_path / "include" / "loads.glm").write_text(
+        'object load { name load1; phases AN; constant_power_A 1000+200j VA; }\n'
+    )
+    (tmp_path / "include" / "all.glm").write_text('#include "loads.glm"\n')
+    (tmp_path / "node.glm").write_text(
+        'module powerflow {\n'
+        '    solver_method NR;\n'
+        '}\n'
+        '#include "include/all.glm"\n'
+        'object meter {\n'
+        '    name meter1; // the feeder head\n'
+        '    object triplex_meter:7 {\n'
+        '        phases AS;\n'
+        '    };\n'
+        '    phases ABCN;\n'
+        '}\n'
+        'schedule residential {\n'
+        '    weekdays {\n'
+        '        * 0-11 * * * 0.5;\n'
+        '    }\n'
+        '}\n'
+    )
+
+    records = list(iterate_glm_records(str(tmp_path / "node.glm")))
+
+    assert [type(record) for record in records] == [GlmObject, GlmObject, GlmObject, GlmSchedule]
+
+    load, meter, triplex_meter, schedule = records
+    assert load["constant_power_A"] == "1000+200j"
+    assert load.units["constant_power_A"] == "VA"
+    assert dict(meter) == {"name": "meter1", "phases": "ABCN"}
+    assert triplex_meter["name"] == "triplex_meter:7"
+    assert triplex_meter["parent"] == "meter1"
+    assert schedule.entries == [("* 0-11 * * *", "0.5")]
+
+def test_read_objects_and_schedules(tmp_path):
+    (tmp_path / "node.glm").write_text(
+        'object overhead_line { from n1; to n2; phases ABC; length 100; }\n'
+        'object line_spacing { name spacing; distance_AB 24 in; }\n'
+        'object house { name house1; }\n'
+        'schedule residential { * * * * * 0.75; }\n'
+    )
+
+    objects, schedules = read_gld_objects_and_schedules(str(tmp_path / "node.glm"))
+
+    assert list(objects.keys()) == ["n1-n2", "spacing"]
+    assert objects["spacing"]["distance_AB"] == "2.0"
+    assert objects["n1-n2"]._length == "100"
+    assert not hasattr(objects["n1-n2"], "_nominal_voltage")
+    assert schedules == {"residential": "0.75"}
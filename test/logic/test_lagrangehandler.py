@@ -1,97 +1,101 @@
 import numpy as np
 from sympy import symbols
-from logic.lagrangesegment import LagrangeSegment
+from logic.lagrangesegment import LagrangeSegment, variable_names
 
-def test_linear_eqn():
-    constants = a, b = symbols("a b")
-    primals = x, y = symbols("x y")
-    duals = Lx, Ly = symbols("Lx Ly")
+a, b = symbols("a b")
+x, y = symbols("x y")
+Lx, Ly = symbols("Lx Ly")
+
+def build_linear_lagrange(constants, primals, duals):
+    a, b = constants
+    x, y = primals
 
     eqns = [
         a * x - b * y,
         -a * x + b * y + 5
     ]
 
-    lagrange = np.dot(duals, eqns)
+    return np.dot(duals, eqns)
 
-    lh = LagrangeSegment(lagrange, constants, primals, duals)
+def build_nonlinear_lagrange(constants, primals, duals):
+    a, b = constants
+    x, y = primals
+
+    eqns = [
+        a * x ** 2 - b * y,
+        -a * x + b * x * y + 5
+    ]
+
+    return np.dot(duals, eqns)
+
+def test_linear_eqn():
+    lh = LagrangeSegment(build_linear_lagrange, variable_names("a b"), variable_names("x y"), variable_names("Lx Ly"))
 
     assert 4 == len(lh.get_derivatives())
 
-    dxentry = lh.get_derivatives()[x]
+    dxentry = lh.get_derivatives()["x"]
     assert (Lx * a - Ly * a) == dxentry.expr
     assert 2 == len(dxentry.variable_exprs)
-    assert a == dxentry.variable_exprs[Lx]
-    assert -a == dxentry.variable_exprs[Ly]
+    assert a == dxentry.variable_exprs["Lx"]
+    assert -a == dxentry.variable_exprs["Ly"]
 
-    dyentry = lh.get_derivatives()[y]
+    dyentry = lh.get_derivatives()["y"]
     assert (-Lx * b + Ly * b) == dyentry.expr
     assert 2 == len(dyentry.variable_exprs)
-    assert -b == dyentry.variable_exprs[Lx]
-    assert b == dyentry.variable_exprs[Ly]    
+    assert -b == dyentry.variable_exprs["Lx"]
+    assert b == dyentry.variable_exprs["Ly"]    
 
-    dLxentry = lh.get_derivatives()[Lx]
+    dLxentry = lh.get_derivatives()["Lx"]
     assert (a * x - b * y) == dLxentry.expr
     assert 2 == len(dLxentry.variable_exprs)
-    assert a == dLxentry.variable_exprs[x]
-    assert -b == dLxentry.variable_exprs[y]  
+    assert a == dLxentry.variable_exprs["x"]
+    assert -b == dLxentry.variable_exprs["y"]  
 
-    dLyentry = lh.get_derivatives()[Ly]
+    dLyentry = lh.get_derivatives()["Ly"]
     assert (-a * x + b * y + 5) == dLyentry.expr
     assert 2 == len(dLyentry.variable_exprs)
-    assert -a == dLyentry.variable_exprs[x]
-    assert b == dLyentry.variable_exprs[y]
+    assert -a == dLyentry.variable_exprs["x"]
+    assert b == dLyentry.variable_exprs["y"]
     assert -5 == dLyentry.constant_expr
 
 
 def test_nonlinear_eqn():
-    constants = a, b = symbols("a b")
-    primals = x, y = symbols("x y")
-    duals = Lx, Ly = symbols("Lx Ly")
-
-    eqns = [
-        a * x ** 2 - b * y,
-        -a * x + b * x * y + 5
-    ]
-
-    lagrange = np.dot(duals, eqns)
-
-    lh = LagrangeSegment(lagrange, constants, primals, duals)
+    lh = LagrangeSegment(build_nonlinear_lagrange, variable_names("a b"), variable_names("x y"), variable_names("Lx Ly"))
 
     assert 4 == len(lh.get_derivatives())
 
-    dxentry = lh.get_derivatives()[x]
+    dxentry = lh.get_derivatives()["x"]
     assert (2 * a * x * Lx + (- a + b * y) * Ly) == dxentry.expr
     assert 4 == len(dxentry.variable_exprs)
-    assert 2 * a * Lx == dxentry.variable_exprs[x]
-    assert b * Ly == dxentry.variable_exprs[y]
-    assert 2 * a * x == dxentry.variable_exprs[Lx]
-    assert -a + b * y == dxentry.variable_exprs[Ly]
+    assert 2 * a * Lx == dxentry.variable_exprs["x"]
+    assert b * Ly == dxentry.variable_exprs["y"]
+    assert 2 * a * x == dxentry.variable_exprs["Lx"]
+    assert -a + b * y == dxentry.variable_exprs["Ly"]
     assert 2 * a * x * Lx + b * y * Ly == dxentry.constant_expr
 
-    dyentry = lh.get_derivatives()[y]
+    dyentry = lh.get_derivatives()["y"]
     assert (-b * Lx + b * x * Ly) == dyentry.expr
     assert 4 == len(dyentry.variable_exprs)
-    assert b * Ly == dyentry.variable_exprs[x]
-    assert 0 == dyentry.variable_exprs[y]
-    assert -b == dyentry.variable_exprs[Lx]
-    assert b * x == dyentry.variable_exprs[Ly]
+    assert b * Ly == dyentry.variable_exprs["x"]
+    assert 0 == dyentry.variable_exprs["y"]
+    assert -b == dyentry.variable_exprs["Lx"]
+    assert b * x == dyentry.variable_exprs["Ly"]
     assert b * x * Ly == dyentry.constant_expr  
 
-    dLxentry = lh.get_derivatives()[Lx]
+    dLxentry = lh.get_derivatives()["Lx"]
     assert (a * x ** 2 - b * y) == dLxentry.expr
     assert 4 == len(dLxentry.variable_exprs)
-    assert 2 * a * x == dLxentry.variable_exprs[x]
-    assert -b == dLxentry.variable_exprs[y]
-    assert 0 == dLxentry.variable_exprs[Lx]
-    assert 0 == dLxentry.variable_exprs[Ly]
+    assert 2 * a * x == dLxentry.variable_exprs["x"]
+    assert -b == dLxentry.variable_exprs["y"]
+    assert 0 == dLxentry.variable_exprs["Lx"]
+    assert 0 == dLxentry.variable_exprs["Ly"]
     assert a * x ** 2 == dLxentry.constant_expr  
 
-    dLyentry = lh.get_derivatives()[Ly]
+    dLyentry = lh.get_derivatives()["Ly"]
     assert (-a * x + b * x * y + 5) == dLyentry.expr
     assert 4 == len(dLyentry.variable_exprs)
-    assert -a + b * y == dLyentry.variable_exprs[x]
-    assert b * x == dLyentry.variable_exprs[y]
-    assert 0 == dLyentry.variable_exprs[Lx]
-    assert 0 == dLyentry.variable_exprs[Ly]
+    assert -a + b * y == dLyentry.variable_exprs["x"]
+    assert b * x == dLyentry.variable_exprs["y"]
+    assert 0 == dLyentry.variable_exprs["Lx"]
+    assert 0 == dLyentry.variable_exprs["Ly"]
     assert b * x * y - 5 == dLyentry.constant_expr  
\ No newline at end of file
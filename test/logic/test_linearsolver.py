@@ -0,0 +1,74 @@
+import numpy as np
+from scipy.sparse import csc_matrix, random as sparse_random, identity
+from scipy.sparse.linalg import spsolve
+from logic.linearsolver import SparseLULinearSolver
+from logic.powerflowsettings import PowerFlowSettings
+
+def build_system(seed):
+    rng = np.random.default_rng(seed)
+    A = sparse_random(40, 40, density=0.1, random_state=seed, format="csc") + identity(40, format="csc") * 4
+    b = rng.standard_normal(40)
+    return csc_matrix(A), b
+
+def test_splu_matches_spsolve():
+    solver = SparseLULinearSolver(PowerFlowSettings())
+    A, b = build_system(1)
+
+    x = solver.solve(A, b, np.zeros(len(b)))
+
+    assert np.allclose(x, spsolve(A, b))
+
+def test_splu_reuses_column_ordering():
+    solver = SparseLULinearSolver(PowerFlowSettings())
+    A, b = build_system(2)
+
+    solver.solve(A, b, np.zeros(len(b)))
+    assert not solver.lu_is_permuted
+    ordered_fill = solver.lu.L.nnz + solver.lu.U.nnz
+
+    A_scaled = A.copy()
+    A_scaled.data *= 1.5
+    x = solver.solve(A_scaled, b, np.zeros(len(b)))
+
+    assert solver.lu_is_permuted
+    assert solver.lu.L.nnz + solver.lu.U.nnz <= ordered_fill
+    assert np.allclose(x, spsolve(A_scaled, b))
+
+def test_factor_reuse_takes_chord_steps():
+    solver = SparseLULinearSolver(PowerFlowSettings(factor_reuse_iterations=2))
+    A, b = build_system(3)
+
+    x = solver.solve(A, b, np.zeros(len(b)))
+    x = solver.solve(A, b, x)
+
+    assert solver.factorization_count == 1
+    assert solver.reused_solve_count == 1
+    assert np.allclose(x, spsolve(A, b))
+
+def test_singular_matrix_returns_nan():
+    solver = SparseLULinearSolver(PowerFlowSettings())
+    A = csc_matrix(np.array([[1.0, 1.0], [1.0, 1.0]]))
+
+    x = solver.solve(A, np.ones(2), np.zeros(2))
+
+    assert np.isnan(x).all()
+
+def test_low_rank_update_matches_updated_matrix():
+    solver = SparseLULinearSolver(PowerFlowSettings())
+    A, b = build_system(4)
+
+    solver.solve(A, b, np.zeros(len(b)))
+    solver.solve(A * 1.5, b, np.zeros(len(b)))
+    assert solver.lu_is_permuted
+
+    delta = csc_matrix(([2.0, -1.0, 0.5, 3.0], ([3, 3, 7, 20], [3, 7, 7, 5])), shape=A.shape)
+    A_updated = A * 1.5 + delta
+    solver.update_factors(delta)
+    solver.reset()
+
+    #A chord step from zero is a plain solve with the (updated) factors.
+    x = solver.solve(A_updated, b, np.zeros(len(b)))
+
+    assert solver.factorization_count == 2
+    assert solver.reused_solve_count == 1
+    assert np.allclose(x, spsolve(A_updated, b))
@@ -0,0 +1,54 @@
+import os
+import numpy as np
+from logic.networkloader import NetworkLoader
+from logic.nrsolver import NRSolver
+from logic.powerflowsettings import PowerFlowSettings
+from models.singlephase.capacitor import CapSwitchState
+
+CURR_DIR = os.path.realpath(os.path.dirname(os.path.dirname(__file__)))
+
+def load_network(relative_path, settings):
+    network = NetworkLoader(settings).from_file(os.path.join(CURR_DIR, "data", relative_path))
+    network.assign_matrix(settings.infeasibility_analysis)
+    return network
+
+def stamp_linear(solver: NRSolver, tx_factor):
+    Y = solver.create_matrix_builder()
+    J = np.zeros(solver.network.size_Y)
+    solver.stamp_linear(Y, J, tx_factor)
+    return Y.to_matrix().toarray(), J
+
+def assert_same_stamps(cached: NRSolver, direct: NRSolver, tx_factor):
+    Y_cached, J_cached = stamp_linear(cached, tx_factor)
+    Y_direct, J_direct = stamp_linear(direct, tx_factor)
+
+    assert np.allclose(Y_cached, Y_direct, rtol=1e-12, atol=1e-12)
+    assert np.allclose(J_cached, J_direct, rtol=1e-12, atol=1e-12)
+
+def test_cached_stamps_match_direct_stamps():
+    settings = PowerFlowSettings(infeasibility_analysis=True)
+    network = load_network(os.path.join("positive_seq", "IEEE-118_prior_solution.RAW"), settings)
+
+    cached = NRSolver(settings, network, None)
+    direct = NRSolver(PowerFlowSettings(infeasibility_analysis=True, cache_linear_stamps=False), network, None)
+
+    for tx_factor in [0, 0.3, 1, 0.001]:
+        assert_same_stamps(cached, direct, tx_factor)
+
+    assert cached.linear_stamp_cache.version == network.matrix_version
+
+def test_invalidated_capacitor_is_restamped():
+    settings = PowerFlowSettings()
+    network = load_network(os.path.join("three_phase", "ieee_four_bus_cap", "node.glm"), settings)
+
+    cached = NRSolver(settings, network, None)
+    direct = NRSolver(PowerFlowSettings(cache_linear_stamps=False), network, None)
+
+    assert_same_stamps(cached, direct, 0)
+    assert_same_stamps(cached, direct, 0.5)
+
+    capacitor = network.capacitors[0]
+    capacitor.switch = CapSwitchState.OPEN
+    cached.invalidate_element(capacitor)
+
+    assert_same_stamps(cached, direct, 0.5)
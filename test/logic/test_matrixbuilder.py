@@ -0,0 +1,52 @@
+import numpy as np
+from scipy.sparse import csc_matrix
+from logic.matrixbuilder import MatrixBuilder
+from logic.powerflowsettings import PowerFlowSettings
+
+def stamp_entries(Y: MatrixBuilder, entries):
+    for (row, col, value) in entries:
+        Y.stamp(row, col, value)
+
+def test_reused_pattern_matches_direct_assembly():
+    Y = MatrixBuilder(PowerFlowSettings(reuse_matrix_pattern=True))
+
+    linear = [(0, 0, 2.0), (1, 1, 3.0), (0, 1, -1.0)]
+    stamp_entries(Y, linear)
+    linear_index = Y.get_usage()
+
+    for iteration in range(3):
+        nonlinear = [(1, 0, 0.5 * iteration), (0, 0, 1.0 + iteration), (2, 2, 4.0), (1, 1, iteration)]
+        stamp_entries(Y, nonlinear)
+
+        entries = linear + nonlinear
+        expected = csc_matrix(([e[2] for e in entries], ([e[0] for e in entries], [e[1] for e in entries])))
+
+        assert np.allclose(Y.to_matrix().toarray(), expected.toarray())
+
+        Y.clear(retain_idx=linear_index)
+
+def test_reused_pattern_is_preallocated():
+    Y = MatrixBuilder(PowerFlowSettings(reuse_matrix_pattern=True))
+
+    stamp_entries(Y, [(0, 0, 1.0), (1, 1, 1.0), (0, 1, 2.0)])
+    first = Y.to_matrix()
+
+    Y.clear()
+    stamp_entries(Y, [(0, 0, 5.0), (1, 1, 0.0), (0, 1, 2.0)])
+    second = Y.to_matrix()
+
+    assert first is second
+    assert second[0, 0] == 5.0
+
+def test_changed_pattern_is_rebuilt():
+    Y = MatrixBuilder(PowerFlowSettings(reuse_matrix_pattern=True))
+
+    stamp_entries(Y, [(0, 0, 1.0), (1, 1, 1.0)])
+    Y.to_matrix()
+
+    Y.clear()
+    stamp_entries(Y, [(0, 0, 1.0), (1, 0, 7.0), (1, 1, 1.0)])
+    matrix = Y.to_matrix()
+
+    assert matrix[1, 0] == 7.0
+    assert matrix[1, 1] == 1.0
@@ -0,0 +1,59 @@
+import os
+import pytest
+from logic.networkcache import NetworkCache, hash_sources
+from logic.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+
+CURR_DIR = os.path.realpath(os.path.dirname(__file__))
+DATA_DIR = os.path.join(CURR_DIR, "..", "data", "three_phase")
+
+def test_key_covers_includes(tmp_path):
+    (tmp_path / "loads.glm").write_text('object load { name load1; phases AN; }\n')
+    (tmp_path / "node.glm").write_text('#include "loads.glm"\nobject node { name node1; phases ABCN; }\n')
+
+    cache = NetworkCache(str(tmp_path / "cache"))
+    key = cache.get_key(str(tmp_path / "node.glm"), "ditto")
+
+    assert key == cache.get_key(str(tmp_path / "node.glm"), "ditto")
+    assert key != cache.get_key(str(tmp_path / "node.glm"), "direct")
+
+    (tmp_path / "loads.glm").write_text('object load { name load2; phases AN; }\n')
+    assert key != cache.get_key(str(tmp_path / "node.glm"), "ditto")
+
+def test_key_covers_parser_sources(tmp_path):
+    (tmp_path / "parsers").mkdir()
+    (tmp_path / "parsers" / "parser.py").write_text("VALUE = 1\n")
+    (tmp_path / "model.py").write_text("class Model: pass\n")
+
+    digest = hash_sources(str(tmp_path), ["parsers", "model.py"])
+    assert digest == hash_sources(str(tmp_path), ["parsers", "model.py"])
+
+    (tmp_path / "parsers" / "parser.py").write_text("VALUE = 2\n")
+    assert digest != hash_sources(str(tmp_path), ["parsers", "model.py"])
+
+def test_cache_dir_must_be_private(tmp_path):
+    cache_dir = tmp_path / "cache"
+    NetworkCache(str(cache_dir))
+    assert (cache_dir.stat().st_mode & 0o777) == 0o700
+
+    #Other users could plant entries, which are unpickled when loaded.
+    cache_dir.chmod(0o777)
+    with pytest.raises(PermissionError):
+        NetworkCache(str(cache_dir))
+
+def test_cached_network_solves_the_same(tmp_path):
+    glm_file_path = os.path.join(DATA_DIR, "gc_12_47_1", "node.glm")
+
+    uncached = PowerFlow(NetworkLoader(PowerFlowSettings()).from_file(glm_file_path), PowerFlowSettings()).execute()
+
+    settings = PowerFlowSettings(network_cache=True, network_cache_dir=str(tmp_path / "cache"))
+    NetworkLoader(settings).from_file(glm_file_path)
+    network = NetworkLoader(settings).from_file(glm_file_path)
+    cached = PowerFlow(network, settings).execute()
+
+    assert len(os.listdir(tmp_path / "cache")) == 1
+
+    assert cached.is_success
+    assert cached.iterations == uncached.iterations
+    assert abs(cached.max_residual - uncached.max_residual) < 1E-12
@@ -0,0 +1,84 @@
+import os
+from logic.convergencemonitor import ConvergenceMonitor, NullConvergenceMonitor
+from logic.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+
+CURR_DIR = os.path.realpath(os.path.dirname(os.path.dirname(__file__)))
+
+def load_case(casename, settings):
+    return NetworkLoader(settings).from_file(os.path.join(CURR_DIR, "data", "positive_seq", f"{casename}.RAW"))
+
+def test_iteration_callback():
+    iterations = []
+    settings = PowerFlowSettings(iteration_callback=iterations.append)
+    network = load_case("IEEE-14_stressed_1", settings)
+    results = PowerFlow(network, settings).execute()
+
+    assert results.is_success
+    assert [iteration.iteration_num for iteration in iterations] == list(range(results.iterations + 1))
+    assert iterations[-1].err_max < settings.tolerance
+    assert iterations[0].step_length >= iterations[0].err_max
+
+    #The unknown with the largest error is a bus voltage or a load current.
+    label = iterations[0].err_label
+    assert label.startswith("bus:") or label.startswith("load:")
+
+def test_failing_solves_stop_early():
+    settings = PowerFlowSettings()
+    network = load_case("IEEE-14_stressed_2_fixed", settings)
+    powerflow = PowerFlow(network, settings)
+    results = powerflow.execute()
+
+    nrsolver = powerflow.device_controller.homotopy.nrsolver
+    assert not results.is_success
+    assert results.iterations < settings.max_iters - 1
+    assert nrsolver.stop_reason != None
+
+    #Starting from a point the solve already failed from, the solve is treated as a warm start.
+    results = powerflow.execute(results.v_final)
+    assert not results.is_success
+    assert results.iterations < 5
+
+    settings = PowerFlowSettings(convergence_monitor=NullConvergenceMonitor())
+    results = PowerFlow(load_case("IEEE-14_stressed_2_fixed", settings), settings).execute()
+    assert results.iterations == settings.max_iters - 1
+
+def test_line_search():
+    iterations = []
+    settings = PowerFlowSettings(line_search=True, iteration_callback=iterations.append)
+    network = load_case("IEEE-14_stressed_1", settings)
+    results = PowerFlow(network, settings).execute()
+
+    assert results.is_success
+    assert all([0 < iteration.step_size <= 1 for iteration in iterations])
+    assert iterations[-1].residual_norm < iterations[0].residual_norm
+
+def test_residual_norm_of_stored_iterations():
+    iterations = []
+    settings = PowerFlowSettings(iteration_callback=iterations.append)
+    network = load_case("IEEE-14_stressed_1", settings)
+    results = PowerFlow(network, settings).execute()
+
+    #Read after the solve, when the matrix of every iteration has been refilled.
+    assert results.is_success
+    assert abs(iterations[0].residual_norm - 13.61) < 0.01
+    assert abs(iterations[2].residual_norm - 0.0704) < 1e-4
+
+def test_residual_norm_only_computed_when_needed():
+    class RecordingMonitor(ConvergenceMonitor):
+        def check(self, iteration):
+            iterations.append(iteration)
+            return super().check(iteration)
+
+    iterations = []
+    settings = PowerFlowSettings(convergence_monitor=RecordingMonitor())
+    assert PowerFlow(load_case("IEEE-14_stressed_1", settings), settings).execute().is_success
+    assert all([iteration.residual_norm is None for iteration in iterations])
+
+    iterations = []
+    monitor = RecordingMonitor()
+    monitor.needs_residual_norm = True
+    settings = PowerFlowSettings(convergence_monitor=monitor)
+    assert PowerFlow(load_case("IEEE-14_stressed_1", settings), settings).execute().is_success
+    assert all([iteration.residual_norm > 0 for iteration in iterations])
@@ -0,0 +1,54 @@
+import os
+import numpy as np
+import pytest
+from logic.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+
+CURR_DIR = os.path.realpath(os.path.dirname(os.path.dirname(__file__)))
+
+def execute_case(relative_path, settings):
+    network = NetworkLoader(settings).from_file(os.path.join(CURR_DIR, "data", relative_path))
+    return PowerFlow(network, settings).execute()
+
+def test_bus_views_match_arrays():
+    results = execute_case(os.path.join("positive_seq", "GS-4_stressed.RAW"), PowerFlowSettings(infeasibility_analysis=True, voltage_limiting=True))
+
+    assert results._bus_results is None
+    assert np.allclose([bus.V_mag for bus in results.bus_results], results.bus_V_mag)
+    assert np.allclose([bus.V_deg for bus in results.bus_results], results.bus_V_deg)
+    assert np.allclose([bus.lambda_r for bus in results.bus_results], results.bus_lambda_r)
+
+    inf_P = sum([gen.P for gen in results.report_infeasible() if gen.P > 0])
+    assert np.isclose(inf_P, results.infeasibility_totals[0])
+
+def test_residuals_are_lazy():
+    results = execute_case(os.path.join("positive_seq", "GS-4_prior_solution.RAW"), PowerFlowSettings())
+
+    assert results._residuals is None
+    assert results.max_residual < 1e-8
+    assert len(results.residuals) == len(results.v_final)
+
+def test_detached_results_without_residuals():
+    results = execute_case(os.path.join("positive_seq", "GS-4_prior_solution.RAW"), PowerFlowSettings())
+
+    results.detach()
+
+    assert not results.has_residuals
+    with pytest.raises(Exception, match="Residuals"):
+        results.max_residual
+
+def test_vectorized_residuals_match_elements():
+    results = execute_case(os.path.join("three_phase", "gc_12_47_1", "node.glm"), PowerFlowSettings(infeasibility_analysis=True))
+    network = results.network
+
+    element_residuals = np.zeros(len(results.v_final))
+    for element in network.get_NR_invariant_elements() + network.get_NR_variable_elements() + [network.optimization]:
+        for (index, value) in element.calculate_residuals(network, results.v_final).items():
+            element_residuals[index] += value
+
+    assert np.allclose(results.residuals, element_residuals, rtol=0, atol=1e-7)
+
+    breakdown = results.calculate_residual_breakdown()
+    assert "Load" in breakdown and "optimization" in breakdown
+    assert np.allclose(sum(breakdown.values()), results.residuals, rtol=0, atol=1e-7)
@@ -0,0 +1,46 @@
+import json
+import os
+from logic.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+from logic.profiler import PHASE_LINEAR_SOLVE, PHASE_PARSE, NullProfiler, Profiler
+
+CURR_DIR = os.path.realpath(os.path.dirname(os.path.dirname(__file__)))
+
+def test_summary_and_traces(tmp_path):
+    profiler = Profiler()
+    with profiler.section("outer"):
+        for _ in range(3):
+            with profiler.section("inner"):
+                pass
+    profiler.count("iterations", 2)
+    profiler.record("nnz", 10)
+    profiler.record("nnz", 12)
+
+    summary = profiler.get_summary()
+    assert list(summary["phases"].keys()) == ["outer", "inner"]
+    assert summary["phases"]["inner"]["count"] == 3
+    assert summary["phases"]["outer"]["total"] >= summary["phases"]["inner"]["total"]
+    assert summary["counters"] == {"iterations": 2}
+    assert summary["metrics"]["nnz"] == {"last": 12, "max": 12}
+
+    profiler.output_json(tmp_path / "profile.json")
+    profiler.output_chrome_trace(tmp_path / "trace.json")
+
+    trace = json.load(open(tmp_path / "trace.json"))
+    assert len([event for event in trace["traceEvents"] if event["ph"] == "X"]) == 4
+    assert json.load(open(tmp_path / "profile.json"))["events"][0]["phase"] == "outer"
+
+def test_profiled_solve():
+    settings = PowerFlowSettings(profile=True)
+    network = NetworkLoader(settings).from_file(os.path.join(CURR_DIR, "data", "positive_seq", "IEEE-14_prior_solution.RAW"))
+    results = PowerFlow(network, settings).execute()
+
+    summary = settings.profiler.get_summary()
+    assert results.is_success
+    assert summary["phases"][PHASE_PARSE]["count"] == 1
+    assert summary["phases"][PHASE_LINEAR_SOLVE]["count"] == summary["counters"]["nr_iterations"]
+    assert summary["metrics"]["fill_in"]["last"] >= 1
+
+def test_profiling_is_off_by_default():
+    assert isinstance(PowerFlowSettings().profiler, NullProfiler)
@@ -0,0 +1,50 @@
+import os
+import pytest
+from logic.parsers.raw.Data import Data, Field, Generator, read_buses, read_records
+
+CURR_DIR = os.path.realpath(os.path.dirname(os.path.dirname(__file__)))
+
+class Record:
+    def __init__(self):
+        self.b = -1
+
+def test_read_records_fills_defaults_and_optional_fields():
+    fields = [
+        Field('i', 0, int),
+        Field('a', 1, float, 2.5),
+        Field('name', 2, str, 'none'),
+        Field('b', 3, int, 0, min_length=3),
+        Field('x', 0, float, line=1)
+    ]
+    records = [
+        [['1', '', 'first', '7'], ['0.5']],
+        [['2', '3.25'], ['1e-3']]
+    ]
+
+    (first, second) = read_records(Record, records, fields)
+
+    assert (first.i, first.a, first.name, first.b, first.x) == (1, 2.5, 'first', 7, 0.5)
+    assert (second.i, second.a, second.name, second.b, second.x) == (2, 3.25, 'none', -1, 1e-3)
+    assert type(first.i) == int and type(first.a) == float
+
+def test_read_records_requires_fields_without_default():
+    with pytest.raises(Exception):
+        read_records(Record, [[['']]], [Field('i', 0, int)])
+
+def test_bus_comments_and_generator_wind_fields():
+    (bus,) = read_buses([['5', 'BUS 5', '138.0', '2', '1', '1', '1', '1.02', '-3.5 / comment']], 32)
+    assert (bus.i, bus.name, bus.ide, bus.vm, bus.va) == (5, 'BUS 5', 2, 1.02, -3.5)
+
+    row = ['5', '1', '10', '2', '50', '-50', '1.02', '0', '100', '0', '1', '0', '0', '1', '1', '100', '90', '0', '1', '1.0000']
+    row += ['0'] * 6 + ['1', '0.95']
+    (generator,) = read_records(Generator, [[row]], Generator.get_fields(33))
+    assert (generator.pg, generator.wmod, generator.wpf, generator.f1) == (10.0, 1, 0.95, 1.0)
+
+def test_read_case():
+    data = Data()
+    data.read(os.path.join(CURR_DIR, "data", "positive_seq", "IEEE-14_prior_solution.RAW"))
+
+    assert len(data.raw.buses) == 14
+    assert data.raw.slack_buses == [1]
+    assert len(data.raw.generators) == 5
+    assert len(data.raw.nontransformer_branches) + len(data.raw.two_wind_xfmrs) == 20
@@ -80,6 +80,38 @@ def test_IEEE_14_prior_solution():
     mat_result = loadmat(get_positiveseq_mat_result("IEEE-14_prior_solution"))
     assert_mat_comparison(mat_result, results)
 
+def test_factor_reuse_IEEE_14_prior_solution():
+    results = execute_positiveseq_raw("IEEE-14_prior_solution", PowerFlowSettings(factor_reuse_iterations=3))
+    assert results.is_success
+    assert results.max_residual < 1e-8
+    mat_result = loadmat(get_positiveseq_mat_result("IEEE-14_prior_solution"))
+    assert_mat_comparison(mat_result, results)
+
+def test_spsolve_linear_solver():
+    results = execute_positiveseq_raw("GS-4_prior_solution", PowerFlowSettings(linear_solver="spsolve"))
+    assert results.is_success
+    assert results.max_residual < 1e-8
+
+def test_numpy_stamping_infeasibility():
+    settings = PowerFlowSettings(infeasibility_analysis=True, voltage_limiting=True, stamping_backend="numpy")
+    results = execute_positiveseq_raw("GS-4_stressed", settings)
+    assert results.is_success
+    assert results.max_residual < 1e-8
+
+def test_numba_stamping_infeasibility():
+    settings = PowerFlowSettings(infeasibility_analysis=True, voltage_limiting=True, stamping_backend="numba")
+    results = execute_positiveseq_raw("GS-4_stressed", settings)
+    assert results.is_success
+    assert results.max_residual < 1e-8
+
+def test_adaptive_tx_stepping_IEEE_14_stressed_1():
+    #Few iterations per solve, so that the direct solve fails and tx stepping takes over.
+    settings = PowerFlowSettings(tx_stepping=True, infeasibility_analysis=True, voltage_limiting=True, max_iters=4)
+    results = execute_positiveseq_raw("IEEE-14_stressed_1", settings)
+    assert results.is_success
+    assert results.tx_percent == 0
+    assert results.max_residual < 1e-8
+
 def test_isolated_grnded_xfmr_network():
     next_idx = count()
 
@@ -0,0 +1,153 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+from logic.networkloader import NetworkLoader
+from logic.networkpostprocessor import NetworkPostProcessor
+from logic.postprocessingsettings import PostProcessingSettings
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+from logic.resultstore import ResultStoreReader, ResultStoreWriter
+
+CURR_DIR = os.path.realpath(os.path.dirname(__file__))
+CASE_DIR = os.path.join(CURR_DIR, "data", "three_phase", "ieee_four_bus")
+
+def execute_quasi_time_series(workers, calculate_residuals = True, case_dir = CASE_DIR, loadfile_name = None, hours = 12, chunk_hours = 5):
+    settings = PowerFlowSettings()
+    network_file = os.path.join(case_dir, "node.glm")
+    network = NetworkLoader(settings).from_file(network_file)
+
+    postprocessing_settings = PostProcessingSettings(
+        loadfile_name = os.path.join(case_dir, "loadfile.csv") if loadfile_name is None else loadfile_name,
+        loadfile_start = 0,
+        loadfile_end = hours,
+        network_file = network_file,
+        workers = workers,
+        chunk_hours = chunk_hours,
+        calculate_residuals = calculate_residuals
+    )
+    postprocessor = NetworkPostProcessor(postprocessing_settings, PowerFlow(network, settings))
+    return postprocessor.execute_quasi_time_series()
+
+def test_quasi_time_series_serial():
+    results = execute_quasi_time_series(workers=1)
+
+    assert list(results.powerflow_snapshot_results.keys()) == list(range(12))
+    for snapshot_results in results.powerflow_snapshot_results.values():
+        assert snapshot_results.is_success
+        assert snapshot_results.max_residual < 1e-4
+
+def test_quasi_time_series_parallel_matches_serial():
+    serial = execute_quasi_time_series(workers=1)
+    parallel = execute_quasi_time_series(workers=2, calculate_residuals=False)
+
+    assert list(parallel.powerflow_snapshot_results.keys()) == list(range(12))
+    for hour, serial_results in serial.powerflow_snapshot_results.items():
+        parallel_results = parallel.powerflow_snapshot_results[hour]
+        assert parallel_results.is_success
+        assert not parallel_results.has_residuals
+        assert np.allclose(parallel_results.v_final, serial_results.v_final, rtol=1e-6, atol=1e-3)
+        assert [load.P for load in parallel_results.load_results] == [load.P for load in serial_results.load_results]
+
+def test_quasi_time_series_parallel_matches_serial_with_devices(tmp_path):
+    #A feeder with switched capacitors. In a serial run the capacitors switched under the heavy load of
+    #hour 1 stay switched in hour 2, so the chunk starting at hour 2 must start from the same devices.
+    case_dir = os.path.join(CURR_DIR, "data", "three_phase", "r1_12_47_1")
+    network = NetworkLoader(PowerFlowSettings()).from_file(os.path.join(case_dir, "node.glm"))
+    postprocessor = NetworkPostProcessor(PostProcessingSettings(), PowerFlow(network))
+
+    scales = [0.3, 1.6, 0.3, 0.3]
+    loadfile = dict([(postprocessor.get_load_name(load), [abs(complex(load.P, load.Q)) * scale for scale in scales]) for load in network.loads])
+    pd.DataFrame(loadfile).to_csv(tmp_path / "loadfile.csv", index=False)
+
+    serial = execute_quasi_time_series(1, False, case_dir, str(tmp_path / "loadfile.csv"), len(scales), 2)
+    parallel = execute_quasi_time_series(2, False, case_dir, str(tmp_path / "loadfile.csv"), len(scales), 2)
+
+    for hour in range(len(scales)):
+        (serial_results, parallel_results) = (serial.powerflow_snapshot_results[hour], parallel.powerflow_snapshot_results[hour])
+        assert serial_results.is_success and parallel_results.is_success
+        assert np.allclose(parallel_results.bus_V_mag, serial_results.bus_V_mag, rtol=1e-6, atol=1e-3)
+
+def test_quasi_time_series_parallel_starts_from_solved_base_case(tmp_path):
+    #The base case is solved under heavy load first, as run_solver does, which switches capacitors. A serial
+    #run continues from those devices, so the workers must start from them too, not from the network file.
+    case_dir = os.path.join(CURR_DIR, "data", "three_phase", "r1_12_47_1")
+    network_file = os.path.join(case_dir, "node.glm")
+
+    scales = [0.3, 0.3, 0.3, 0.3]
+    network = NetworkLoader(PowerFlowSettings()).from_file(network_file)
+    postprocessor = NetworkPostProcessor(PostProcessingSettings(), PowerFlow(network))
+    loadfile = dict([(postprocessor.get_load_name(load), [abs(complex(load.P, load.Q)) * scale for scale in scales]) for load in network.loads])
+    pd.DataFrame(loadfile).to_csv(tmp_path / "loadfile.csv", index=False)
+
+    results = {}
+    for workers in [1, 2]:
+        network = NetworkLoader(PowerFlowSettings()).from_file(network_file)
+        for load in network.loads:
+            (load.P, load.Q) = (load.P * 1.6, load.Q * 1.6)
+        powerflow = PowerFlow(network)
+        assert powerflow.execute().is_success
+
+        postprocessing_settings = PostProcessingSettings(
+            loadfile_name = str(tmp_path / "loadfile.csv"),
+            loadfile_start = 0,
+            loadfile_end = len(scales),
+            network_file = network_file,
+            workers = workers,
+            chunk_hours = 2,
+            calculate_residuals = False
+        )
+        results[workers] = NetworkPostProcessor(postprocessing_settings, powerflow).execute_quasi_time_series()
+
+    for hour in range(len(scales)):
+        (serial_results, parallel_results) = (results[1].powerflow_snapshot_results[hour], results[2].powerflow_snapshot_results[hour])
+        assert serial_results.is_success and parallel_results.is_success
+        assert np.allclose(parallel_results.bus_V_mag, serial_results.bus_V_mag, rtol=1e-6, atol=1e-3)
+
+def test_quasi_time_series_result_store(tmp_path):
+    results = execute_quasi_time_series(workers=1)
+    results.output(str(tmp_path / "qsts"), "store")
+
+    reader = ResultStoreReader(tmp_path / "qsts_qsts_store")
+    assert list(reader.get_hours()) == list(range(12))
+
+    hours, selection, values = reader.read_buses(buses=["load4", "node2:B"], start_hour=3, end_hour=7)
+    assert list(hours) == [3, 4, 5, 6, 7]
+    assert len(selection) == 4
+    for (row, hour) in enumerate(hours):
+        snapshot_results = results.powerflow_snapshot_results[hour]
+        assert np.allclose(values["V_mag"][row], snapshot_results.bus_V_mag[selection])
+
+    hours, selection, values = reader.read_loads(start_hour=10)
+    assert list(hours) == [10, 11]
+    assert np.allclose(values["P"][1], results.powerflow_snapshot_results[11].load_P)
+
+def test_reopened_result_store_is_replaced(tmp_path):
+    results = execute_quasi_time_series(workers=1)
+
+    with ResultStoreWriter(tmp_path / "store", chunk_size=5) as writer:
+        for hour, snapshot_results in results.powerflow_snapshot_results.items():
+            writer.append(hour, snapshot_results)
+
+    #A shorter series written to the same store leaves none of the earlier chunks behind.
+    with ResultStoreWriter(tmp_path / "store", chunk_size=5) as writer:
+        for hour in [8, 9]:
+            writer.append(hour, results.powerflow_snapshot_results[hour])
+
+    assert list(ResultStoreReader(tmp_path / "store").get_hours()) == [8, 9]
+    assert sorted([path.name for path in (tmp_path / "store").glob("chunk_*.npz")]) == ["chunk_00000.npz"]
+
+def test_run_solver_keeps_base_case_and_time_series_stores(tmp_path):
+    outputfile = str(tmp_path / "out")
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([os.path.join(CURR_DIR, "..", "src"), env.get("PYTHONPATH", "")])
+
+    subprocess.run([
+        sys.executable, os.path.join(CURR_DIR, "..", "src", "run_solver.py"), os.path.join(CASE_DIR, "node.glm"),
+        "--loadfile", os.path.join(CASE_DIR, "loadfile.csv"), "--loadstart", "0", "--loadend", "4",
+        "--outputfile", outputfile, "--outputformat", "store", "--loglevel", "WARNING"
+        ], env=env, check=True, capture_output=True)
+
+    assert list(ResultStoreReader(f"{outputfile}_store").get_hours()) == [0]
+    assert list(ResultStoreReader(f"{outputfile}_qsts_store").get_hours()) == [0, 1, 2, 3]
@@ -5,9 +5,12 @@ from logic.powerflow import PowerFlow
 from logic.networkloader import NetworkLoader
 from logic.powerflowresults import PowerFlowResults
 from logic.powerflowsettings import PowerFlowSettings
+from models.singlephase.switch import SwitchStatus
 import os
+import re
 import numpy as np
 import csv
+import pytest
 
 CURR_DIR = os.path.realpath(os.path.dirname(__file__))
 DATA_DIR = os.path.join(CURR_DIR, "data", "three_phase")
@@ -188,6 +191,52 @@ def test_ieee_four_bus_underground_long_lines():
 def test_ieee_four_bus_switch():
     assert_glm_case_gridlabd_results("ieee_four_bus_switch")
 
+def test_ieee_four_bus_open_switch_deenergizes_load(caplog):
+    settings = PowerFlowSettings()
+    network = NetworkLoader(settings).from_file(get_glm_case_file("ieee_four_bus_switch"))
+    for switch in network.switches:
+        switch.status = SwitchStatus.OPEN
+
+    results = PowerFlow(network, settings).execute()
+
+    assert results.is_success
+    assert results.max_residual < 1e-6
+    #The de-energized buses are reported, as the network may have been disconnected by mistake.
+    assert results.deenergized_bus_count == 3
+    assert "de-energized" in caplog.text and "load4" in caplog.text
+    for bus_result in results.bus_results:
+        if bus_result.bus.NodeName == "load4":
+            assert bus_result.V_mag == 0
+        else:
+            assert bus_result.V_mag > 2000
+
+def test_separate_feeders_solved_as_islands(tmp_path):
+    #Two copies of the same feeder in one file, each with its own swing bus.
+    with open(get_glm_case_file("ieee_four_bus_switch"), "r") as f:
+        feeder = f.read()
+    copy = re.sub(r"\b(node\d|load4|switch_1)\b", r"\1_copy", feeder)
+    copy = re.sub(r"\b(overhead_line|transformer|switch):(\d+)", r"\1:9\2", copy)
+    filepath = os.path.join(tmp_path, "node.glm")
+    with open(filepath, "w") as f:
+        f.write(feeder + copy)
+
+    settings = PowerFlowSettings()
+    network = NetworkLoader(settings).from_file(filepath)
+    results = PowerFlow(network, settings).execute()
+
+    assert results.is_success
+    assert network.islands.count == 2
+    assert network.islands.energized.all()
+    assert results.deenergized_bus_count == 0
+
+    bus_count = len(network.buses) // 2
+    assert np.allclose(results.bus_V_mag[:bus_count], results.bus_V_mag[bus_count:])
+
+    expected = load_gridlabd_csv("ieee_four_bus_switch")
+    for (name, voltages) in list(expected.items()):
+        expected[name + "_copy"] = voltages
+    assert_busresults_gridlabdvoltdump(results, expected)
+
 def test_ieee_four_bus_fuse():
     assert_glm_case_gridlabd_results("ieee_four_bus_fuse")
 
@@ -266,6 +315,9 @@ def test_gc_12_47_1_simplified():
 def test_gc_12_47_1_subset():
     assert_glm_case_gridlabd_results("gc_12_47_1_subset")
 
+def test_gc_12_47_1_subset_incremental_device_control():
+    assert_glm_case_gridlabd_results("gc_12_47_1_subset", PowerFlowSettings(incremental_device_control=True))
+
 def test_gc_12_47_1_no_cap():
     assert_glm_case_gridlabd_results("gc_12_47_1_no_cap")
 
@@ -350,4 +402,91 @@ def test_triplex_load_class():
     assert_glm_case_gridlabd_results("triplex_load_class")
 
 def test_unbalanced_triplex_load():
-    assert_glm_case_gridlabd_results("unbalanced_triplex_load")
\ No newline at end of file
+    assert_glm_case_gridlabd_results("unbalanced_triplex_load")
+
+
+def test_ieee_four_bus_cap_numpy_stamping():
+    assert_glm_case_gridlabd_results("ieee_four_bus_cap", PowerFlowSettings(stamping_backend="numpy"))
+
+def test_regulator_center_tap_xfmr_and_triplex_line_numpy_stamping():
+    assert_glm_case_gridlabd_results("regulator_center_tap_xfmr_and_triplex_line", PowerFlowSettings(stamping_backend="numpy"))
+
+def test_regulator_center_tap_xfmr_and_triplex_line_numba_stamping():
+    #Runs the numpy backend when numba isn't installed.
+    assert_glm_case_gridlabd_results("regulator_center_tap_xfmr_and_triplex_line", PowerFlowSettings(stamping_backend="numba"))
+
+def test_gc_12_47_1_direct_glm_parser():
+    assert_glm_case_gridlabd_results("gc_12_47_1", PowerFlowSettings(glm_parser="direct"))
+
+def test_regulator_center_tap_xfmr_and_triplex_line_direct_glm_parser():
+    assert_glm_case_gridlabd_results("regulator_center_tap_xfmr_and_triplex_line", PowerFlowSettings(glm_parser="direct"))
+
+#Cases that neither parser can read: malformed values, references to missing objects and singular line
+#impedances in the files.
+UNPARSEABLE_CASES = ["case_118_full", "case_300", "ieee_123", "ieee_123_no_regulator", "ieee_37", "ieee_37_no_regulator", "r2_12_47_2", "swing_and_line_to_zip"]
+
+def get_glm_cases():
+    return [casename for casename in sorted(os.listdir(DATA_DIR)) if os.path.isfile(get_glm_case_file(casename)) and not casename in UNPARSEABLE_CASES]
+
+#Returns the network, and the results with the solved voltage of each bus (None when the solve raises).
+def parse_and_solve(casename, glm_parser):
+    settings = PowerFlowSettings(glm_parser=glm_parser)
+    network = NetworkLoader(settings).from_file(get_glm_case_file(casename))
+
+    try:
+        results = PowerFlow(network, settings).execute()
+    except Exception:
+        return (network, None, None)
+
+    V = results.bus_V_r + 1j * results.bus_V_i
+    return (network, results, dict([((bus.NodeName, bus.NodePhase), V[idx]) for (idx, bus) in enumerate(network.buses)]))
+
+#Comparing every case takes minutes, so by default only the cases with an input file below this size are
+#compared (all but the taxonomy feeders and the largest test networks). ALL_GLM_CASES=1 compares every case.
+COMPARED_CASE_MAX_BYTES = 100000
+
+def get_compared_glm_cases():
+    if os.environ.get("ALL_GLM_CASES") == "1":
+        return get_glm_cases()
+
+    return [casename for casename in get_glm_cases() if os.path.getsize(get_glm_case_file(casename)) < COMPARED_CASE_MAX_BYTES]
+
+@pytest.mark.parametrize("casename", get_compared_glm_cases())
+def test_direct_glm_parser_matches_ditto(casename):
+    ditto_network, ditto_results, ditto_V = parse_and_solve(casename, "ditto")
+    direct_network, direct_results, direct_V = parse_and_solve(casename, "direct")
+
+    assert len(direct_network.buses) == len(ditto_network.buses)
+    assert direct_network.size_Y == ditto_network.size_Y
+
+    assert (direct_results is None) == (ditto_results is None)
+    if ditto_results is not None:
+        assert direct_results.is_success == ditto_results.is_success
+        assert direct_V.keys() == ditto_V.keys()
+        for (bus, V) in ditto_V.items():
+            assert abs(direct_V[bus] - V) <= 1e-6 * max(abs(V), 1), f"{bus}: {direct_V[bus]} (direct), {V} (ditto)"
+
+#Known misclassification, kept by both parsers for parity: any object with power_1 or power_2 is read as a
+#triplex load, here a meter (which would otherwise be refused, for its triplex phases). Fixing it means
+#changing both parsers together, and this test with them.
+@pytest.mark.parametrize("glm_parser", ["ditto", "direct"])
+def test_object_with_power_1_is_a_triplex_load(tmp_path, glm_parser):
+    with open(get_glm_case_file("triplex_load_class"), "r") as f:
+        glm = f.read()
+
+    glm += """
+object meter {
+	name R1-12-47-1_meter_9;
+	phases CS;
+	parent R1-12-47-1_tm_556;
+	power_1 500+250j;
+	nominal_voltage 120;
+}
+"""
+    (tmp_path / "node.glm").write_text(glm)
+
+    network = NetworkLoader(PowerFlowSettings(glm_parser=glm_parser)).from_file(str(tmp_path / "node.glm"))
+
+    load = next(load for load in network.loads if load.load_num == "9")
+    assert (load.phase, load.triplex_phase, load.P, load.Q) == ("1", "C", 500, 250)
+    assert load.from_bus.NodeName == "R1-12-47-1_tm_556"